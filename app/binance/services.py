@@ -1,7 +1,7 @@
 from app.binance.client import place_order
 from app.binance.websocket import listen_order_updates
 from app.models.order import Order, OrderStatus
-from app.database import SessionLocal
+from app.database import session_scope
 from datetime import datetime
 import asyncio
 
@@ -11,19 +11,16 @@ def create_order(symbol, user_id, signal_id, qty, side="BUY"):
         print("❌ Order failed:", response)
         return None
 
-    db = SessionLocal()
-    order = Order(
-        user_id=user_id,
-        signal_id=signal_id,
-        side=side,
-        qty=float(response["origQty"]),
-        price=float(response.get("price") or 0),
-        status=OrderStatus.new,
-        ts=datetime.utcnow()
-    )
-    db.add(order)
-    db.commit()
-    db.close()
+    with session_scope() as db:
+        db.add(Order(
+            user_id=user_id,
+            signal_id=signal_id,
+            side=side,
+            qty=float(response["origQty"]),
+            price=float(response.get("price") or 0),
+            status=OrderStatus.new,
+            ts=datetime.utcnow()
+        ))
     return response
 
 async def run_listener():
@@ -1,5 +1,5 @@
 import json, requests, websockets, asyncio, os
-from app.database import SessionLocal
+from app.database import SessionLocal, session_scope
 from app.models.order import Order, OrderStatus
 
 BASE_URL = os.getenv("BINANCE_BASE_URL", "https://testnet.binance.vision")
@@ -12,15 +12,17 @@ async def listen_order_updates():
     ws_url = f"{WS_BASE}/{listenKey}"
     print(f"🔗 Listening to WebSocket: {ws_url}")
 
+    db = SessionLocal()  # one session for the stream; its connection is pooled between messages
     async with websockets.connect(ws_url) as ws:
         async for msg in ws:
             data = json.loads(msg)
             if data.get("e") == "ORDER_TRADE_UPDATE":
                 update = data["o"]
-                db = SessionLocal()
-                order = db.query(Order).filter(Order.id == update["i"]).first()
-                if order:
-                    order.status = update["X"]
-                    order.price = float(update.get("L") or order.price)
-                    db.commit()
-                db.close()
+                try:
+                    with session_scope(db):
+                        order = db.query(Order).filter(Order.id == update["i"]).first()
+                        if order:
+                            order.status = update["X"]
+                            order.price = float(update.get("L") or order.price)
+                except Exception as e:
+                    print(f"❌ Order update {update.get('i')} failed: {e}")
@@ -1,16 +1,134 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 from app.config import settings
 
 # Base class for models
 Base = declarative_base()
 
+
+# ---------------- Pool checkout metrics ----------------
+# upper bounds (ms) of the wait-time histogram; the last bucket is open-ended
+CHECKOUT_BUCKETS_MS = (1, 5, 25, 100, 500, 2000)
+
+
+class CheckoutStats:
+    """How long callers waited for a connection from the pool (includes connect time for new ones)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.timeouts = 0
+            self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def observe(self, ms: float, timed_out: bool = False):
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self.timeouts += timed_out
+            i = 0
+            while i < len(CHECKOUT_BUCKETS_MS) and ms > CHECKOUT_BUCKETS_MS[i]:
+                i += 1
+            self.buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}ms" for b in CHECKOUT_BUCKETS_MS] + [f">{CHECKOUT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.count,
+                "avg_wait_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_wait_ms": round(self.max_ms, 3),
+                "timeouts": self.timeouts,
+                "wait_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+checkout_stats = {"primary": CheckoutStats(), "replica": CheckoutStats()}  # by pool logging name
+
+
+class _TimedCheckout:
+    """Pool mixin: times every checkout (the wait for a free slot + connect if one is opened)."""
+
+    def _do_get(self):
+        stats = checkout_stats[self.logging_name]
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            stats.observe((time.perf_counter() - t0) * 1000, timed_out=True)
+            raise
+        stats.observe((time.perf_counter() - t0) * 1000)
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def _engine_options() -> dict:
+    if settings.DB_PGBOUNCER:
+        # PgBouncer (transaction pooling) owns the pool: open/close a server slot per checkout.
+        # Session state (SET, advisory locks, LISTEN) doesn't survive between transactions there.
+        return {"poolclass": TimedNullPool}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SEC,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # Create engine
-engine = create_engine(settings.DATABASE_URL, echo=False, future=True)
+engine = create_engine(settings.DATABASE_URL, echo=False, future=True,
+                       pool_logging_name="primary", **_engine_options())
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica: routed to by app/services/read_router.py
+replica_engine = (
+    create_engine(settings.DATABASE_REPLICA_URL, echo=False, future=True,
+                  pool_logging_name="replica", **_engine_options())
+    if settings.DATABASE_REPLICA_URL else None
+)
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+)
+
+
+def db_pool_stats() -> dict:
+    """Pool occupancy + checkout wait metrics per engine (for /health)."""
+    report = {}
+    for eng in (engine, replica_engine):
+        if eng is None:
+            continue
+        pool = eng.pool
+        stats = {"mode": "pgbouncer" if settings.DB_PGBOUNCER else "queue"}
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(),
+                         idle=pool.checkedin(), overflow=pool.overflow())
+        stats.update(checkout_stats[pool.logging_name].snapshot())
+        report[pool.logging_name] = stats
+    return report
+
+
 # Dependency for FastAPI routes
 def get_db():
     db = SessionLocal()
@@ -18,15 +136,21 @@ def get_db():
         yield db
     finally:
         db.close()
-        
-from sqlalchemy import event
-from decimal import Decimal
-
-@event.listens_for(SessionLocal, "before_flush")
-def convert_decimal_before_flush(session, flush_context, instances):
-    for instance in session.new.union(session.dirty):
-        for attr in instance.__dict__:
-            value = getattr(instance, attr)
-            if isinstance(value, Decimal):
-                setattr(instance, attr, float(value))
 
+
+@contextmanager
+def session_scope(db: Session = None):
+    """
+    One unit of work: commit on success, rollback on error, then release the connection.
+    Long-running loops create one session up front and pass it in on every iteration;
+    the session object is reused while its connection goes back to the pool in between.
+    """
+    db = db or SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -6,13 +6,25 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.routes.auth import SECRET_KEY, ALGORITHM  # ✅ use same values as in auth.py
+from app.services.principal_cache import issued_at, principal_cache, token_key
+from app.services.read_router import read_router
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")  # ✅ MUST match your /auth/token endpoint
 
-def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+
+def resolve_user_id(token: str, db: Session) -> int:
     """
-    Extract user_id from JWT and verify the user exists.
+    Decode a JWT and verify the user exists. Returns the user id or raises 401.
+    Shared by header auth (get_user_id) and query-string auth (event stream).
+    A token verified once is served from principal_cache (no decode, no query)
+    until it expires, its cache TTL runs out, or it is revoked. A miss loads the
+    user and the token's stored revocation in one query.
     """
+    key = token_key(token)
+    cached = principal_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
@@ -23,13 +35,20 @@ def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_d
                 detail="Invalid token: user_id missing",
             )
 
-        user = db.query(User).filter(User.id == user_id).first()
+        user, denylisted = principal_cache.load_user(db, key, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
             )
 
+        if principal_cache.is_revoked(key, user, issued_at(payload), denylisted):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token revoked",
+            )
+
+        principal_cache.put(key, user.id, payload.get("exp"))
         return user.id
 
     except JWTError:
@@ -37,3 +56,25 @@ def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_d
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+
+def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Extract user_id from JWT and verify the user exists.
+    """
+    user_id = resolve_user_id(token, db)
+    db.info["user_id"] = user_id  # the request's get_db session: its writes pin the user (read_router)
+    return user_id
+
+
+def get_read_db(user_id: int = Depends(get_user_id)):
+    """
+    Session for read-only user routes: the replica if configured and healthy,
+    the primary right after this user's own writes. Never write through it.
+    """
+    db = read_router.session(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
@@ -3,7 +3,6 @@ import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-import subprocess
 
 # 🧩 Import all routers
 from app.routes import (
@@ -15,11 +14,16 @@ from app.routes import (
     trade,
     orders,
     auth,
-    binance_test
+    binance_test,
+    ohlcv,
+    stream
 )
 
 # 🧠 Background monitor
-from app.services.monitor import monitor_positions
+from app.services.monitor import monitor_positions, stop_monitor
+from app.services.audit_sink import audit_sink
+from app.services.retention import start_partition_maintenance, stop_partition_maintenance
+from app.config import settings
 
 # 🧾 Logging
 from app.logger import setup_logging
@@ -63,7 +67,9 @@ routers = [
     trade,
     orders,
     auth,
-    binance_test
+    binance_test,
+    ohlcv,
+    stream
 ]
 
 for r in routers:
@@ -88,13 +94,26 @@ def start_monitor_loop():
 
 @app.on_event("startup")
 def start_background_tasks():
-    """Starts position monitor in a separate thread to avoid blocking FastAPI."""
-    # Start monitor
-    t = threading.Thread(target=start_monitor_loop, daemon=True)
-    t.start()
-
-    # Start stage4 script as subprocess (optional)
-    subprocess.Popen([
-        "C:\\Users\\Admin\\Tradebot\\strategy\\venv\\Scripts\\python.exe",
-        "C:\\Users\\Admin\\Tradebot\\strategy\\run_stage4.py"
-    ])
+    """Starts position monitor in a separate thread to avoid blocking FastAPI.
+
+    Stage-4 signals come from the standalone strategy worker (strategy/worker.py),
+    not from the API process, so extra uvicorn workers don't duplicate it.
+    """
+    # Pre-create upcoming signals / audit_logs partitions (inserts never run DDL)
+    start_partition_maintenance()
+
+    # Start batched audit writer (replays any journal left by a crash)
+    audit_sink.start()
+
+    # Start monitor (sharded across workers via monitor_leases)
+    if settings.MONITOR_IN_API:
+        t = threading.Thread(target=start_monitor_loop, daemon=True)
+        t.start()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    """Hands this worker's monitor shard back and drains queued audit events."""
+    stop_monitor()
+    stop_partition_maintenance()
+    audit_sink.stop()
@@ -9,4 +9,7 @@ from .risk_settings import RiskSettings
 from .strategy import Strategy
 from .approval import Approval
 from .execution import Execution
-from .audit_log import AuditLog
\ No newline at end of file
+from .audit_log import AuditLog
+from .monitor_lease import MonitorLease
+from .pnl_rollup import PnlRollup
+from .revoked_token import RevokedToken
@@ -14,12 +14,12 @@ class Approval(Base):
     __tablename__ = "approvals"
 
     id = Column(Integer, primary_key=True, index=True)
-    signal_id = Column(Integer, ForeignKey("signals.id"), nullable=False)
+    signal_id = Column(Integer, nullable=False, index=True)  # signals is partitioned: no FK
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(Enum(ApprovalAction), nullable=False)
     reason = Column(String, nullable=True)
     ts = Column(DateTime, default=datetime.utcnow)
 
     # Relationships (optional but useful for ORM navigation)
-    signal = relationship("Signal", backref="approvals")
+    signal = relationship("Signal", primaryjoin="foreign(Approval.signal_id) == Signal.id", backref="approvals")
     user = relationship("User", backref="approvals")
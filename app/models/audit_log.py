@@ -1,11 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from app.database import Base
 from datetime import datetime 
 
 class AuditLog(Base):
+    """Range-partitioned by month on ts (PK = id + ts); old months are archived by retention.py."""
     __tablename__ = "audit_logs"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     who = Column(String)  # user_id or system
     what = Column(String)  # e.g., SIGNAL_APPROVED
     payload_json = Column(String)
-    ts = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    ts = Column(DateTime, primary_key=True, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_audit_logs_who_ts", "who", "ts"),
+        {"postgresql_partition_by": "RANGE (ts)"},
+    )
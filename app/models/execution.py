@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
 from app.database import Base
+from app.models.types import FloatNumeric
 from datetime import datetime 
 
 class Execution(Base):
     __tablename__ = "executions"
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
-    fill_price = Column(Numeric)
-    qty = Column(Numeric)
+    fill_price = Column(FloatNumeric)
+    qty = Column(FloatNumeric)
     ts = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
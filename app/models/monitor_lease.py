@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+
+class MonitorLease(Base):
+    """One row per live position-monitor worker; heartbeat_at older than the TTL = dead."""
+    __tablename__ = "monitor_leases"
+    worker_id = Column(String, primary_key=True)  # host:pid:nonce
+    hostname = Column(String)
+    pid = Column(Integer)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow, index=True)
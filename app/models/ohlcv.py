@@ -1,15 +1,23 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from sqlalchemy import Column, String, Double, DateTime
 from app.database import Base
 
 class OHLCV(Base):
+    """
+    Candles keyed by (symbol, timeframe, ts).
+    The table is range-partitioned by month on ts (see app/services/partitions.py),
+    so range scans only touch the partitions they need.
+    """
     __tablename__ = "ohlcv"
 
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, nullable=False)
-    timeframe = Column(String, nullable=False)
-    ts = Column(DateTime, nullable=False)   # timestamp
-    open = Column(Numeric, nullable=False)
-    high = Column(Numeric, nullable=False)
-    low = Column(Numeric, nullable=False)
-    close = Column(Numeric, nullable=False)
-    volume = Column(Numeric, nullable=False)
+    symbol = Column(String(20), primary_key=True)
+    timeframe = Column(String(8), primary_key=True)
+    ts = Column(DateTime, primary_key=True)   # candle open time (UTC)
+    open = Column(Double, nullable=False)
+    high = Column(Double, nullable=False)
+    low = Column(Double, nullable=False)
+    close = Column(Double, nullable=False)
+    volume = Column(Double, nullable=False)
+
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (ts)"},
+    )
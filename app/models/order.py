@@ -1,6 +1,7 @@
 
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
 from app.database import Base
+from app.models.types import FloatNumeric
 import enum
 from datetime import datetime 
 
@@ -15,12 +16,12 @@ class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    signal_id = Column(Integer, ForeignKey("signals.id"))
+    signal_id = Column(Integer, index=True)  # signals is partitioned: no FK
     side = Column(String)
-    qty = Column(Numeric)
-    price = Column(Numeric)
-    sl = Column(Numeric, nullable=True)
-    tp = Column(Numeric, nullable=True)
+    qty = Column(FloatNumeric)
+    price = Column(FloatNumeric)
+    sl = Column(FloatNumeric, nullable=True)
+    tp = Column(FloatNumeric, nullable=True)
     binance_order_id = Column(String, nullable=True)
     status = Column(Enum(OrderStatus), default=OrderStatus.NEW)
     ts = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from app.database import Base
+from app.models.types import FloatNumeric
+from datetime import datetime
+
+
+class PnlRollup(Base):
+    """
+    Per-user PnL per day (D), ISO week (W, starts Monday) and month (M).
+    Maintained by app/services/pnl_rollups.py; the primary key is the range-read index.
+    """
+    __tablename__ = "pnl_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(String(1), primary_key=True)     # D / W / M
+    period_start = Column(Date, primary_key=True)
+    realized = Column(FloatNumeric, nullable=False, default=0)
+    unrealized = Column(FloatNumeric, nullable=False, default=0)   # latest mark of open positions
+    max_dd = Column(FloatNumeric, nullable=False, default=0)       # lowest point since period start (<= 0)
+    trades = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
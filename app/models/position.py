@@ -1,6 +1,7 @@
 
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
 from app.database import Base
+from app.models.types import FloatNumeric
 from sqlalchemy.schema import Index
 from datetime import datetime
 import enum
@@ -16,15 +17,15 @@ class Position(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
     symbol = Column(String, nullable=False)
-    qty = Column(Numeric, nullable=False)
-    avg_price = Column(Numeric, nullable=False)
-    sl = Column(Numeric, nullable=False)
-    tp = Column(Numeric, nullable=False)
+    qty = Column(FloatNumeric, nullable=False)
+    avg_price = Column(FloatNumeric, nullable=False)
+    sl = Column(FloatNumeric, nullable=False)
+    tp = Column(FloatNumeric, nullable=False)
     side = Column(String, nullable=False)
     status = Column(Enum(PositionState), default=PositionState.OPEN)
     opened_at = Column(DateTime, default=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
-    exit_price = Column(Numeric, nullable=True)
+    exit_price = Column(FloatNumeric, nullable=True)
 
     __table_args__ = (
         Index("idx_position_user_symbol", "user_id", "symbol"),
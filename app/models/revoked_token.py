@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """Logged-out tokens (by principal_cache.token_key), kept until they expire."""
+    __tablename__ = "revoked_tokens"
+    token_key = Column(String, primary_key=True)  # sha256 of the token
+    user_id = Column(Integer, index=True)
+    expires_at = Column(DateTime, index=True)  # UTC; the row is useless after this
@@ -1,10 +1,11 @@
 # app/models/signal_db.py
 
 from sqlalchemy import (
-    Column, Integer, String, Numeric, DateTime, Enum, ForeignKey, Index, Boolean
+    Column, Integer, String, DateTime, Enum, ForeignKey, Index, Boolean, text
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import FloatNumeric
 import enum
 from datetime import datetime
 
@@ -20,16 +21,21 @@ class SignalStatus(enum.Enum):
 
 
 class Signal(Base):
+    """
+    Range-partitioned by month on created_at (PK = id + created_at), so history can be
+    detached and archived by app/services/retention.py. Nothing references signals
+    by foreign key any more: Postgres can't point an FK at (id) alone here.
+    """
     __tablename__ = "signals"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     strategy_id = Column(Integer, ForeignKey("strategies.id"), nullable=True)
     symbol = Column(String, nullable=False)
     side = Column(String, nullable=False)
-    entry = Column(Numeric(18, 8), nullable=False)
-    sl = Column(Numeric(18, 8), nullable=False)
-    tp = Column(Numeric(18, 8))
-    qty = Column(Numeric(18, 8))
+    entry = Column(FloatNumeric(18, 8), nullable=False)
+    sl = Column(FloatNumeric(18, 8), nullable=False)
+    tp = Column(FloatNumeric(18, 8))
+    qty = Column(FloatNumeric(18, 8))
     ttl_sec = Column(Integer)
     ctx_json = Column(String)
 
@@ -43,7 +49,7 @@ class Signal(Base):
     approved_at = Column(DateTime)
     rejected_by = Column(Integer, ForeignKey("users.id"))
     rejected_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     ts = Column(DateTime, default=datetime.utcnow)
 
     payload_hash = Column(String)
@@ -58,5 +64,7 @@ class Signal(Base):
 
     __table_args__ = (
         Index("idx_signal_symbol_side", "symbol", "side"),
-        Index("idx_signal_active", "active"),  # helps fast filtering
+        Index("idx_signal_active", "active", postgresql_where=text("active")),  # only live rows
+        Index("idx_signal_status_created", "status", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
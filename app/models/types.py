@@ -0,0 +1,20 @@
+# app/models/types.py
+"""Shared column types."""
+from sqlalchemy import Numeric
+from sqlalchemy.types import TypeDecorator
+
+
+class FloatNumeric(TypeDecorator):
+    """
+    NUMERIC in the database, float in Python.
+
+    Prices, quantities and PnL used to load as Decimal and were coerced back to float
+    by a before_flush hook that walked every attribute of every dirty object. Here the
+    driver's Decimals become floats once, in the result processor, and floats bind
+    as-is: nothing runs at flush time.
+    """
+    impl = Numeric
+    cache_ok = True
+
+    def __init__(self, precision=None, scale=None):
+        super().__init__(precision=precision, scale=scale, asdecimal=False)
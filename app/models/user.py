@@ -9,4 +9,5 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     role = Column(String)
     password_hash = Column(String)  # Added this
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    tokens_revoked_at = Column(DateTime, nullable=True)  # logout everywhere: tokens with iat <= this are revoked
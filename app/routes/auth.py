@@ -1,14 +1,16 @@
 # app/routes/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import check_login_allowed, reset_login_attempts, run_bcrypt
 import os
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -25,8 +27,11 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Generate a JWT token"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # iat_ms: per-user revocation cutoff (iat alone is whole seconds)
+    iat_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    to_encode.update({"exp": expire, "iat": now, "iat_ms": iat_ms})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -46,15 +51,10 @@ def get_current_user(authorization: str = Header(None), db: Session = Depends(ge
 
     token = authorization.split(" ")[1]
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    from app.dependencies import resolve_user_id  # app.dependencies imports this module
+    user_id = resolve_user_id(token, db)  # same checks as every other route, revocation included
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -63,12 +63,12 @@ def get_current_user(authorization: str = Header(None), db: Session = Depends(ge
 
 # ---------------- REGISTER ----------------
 @router.post("/register")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     existing_user = db.query(User).filter(User.email == user.email).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = get_password_hash(user.password)
+    hashed_pw = await run_bcrypt(get_password_hash, user.password)
     new_user = User(username=user.username, email=user.email, password_hash=hashed_pw, role="user")
     db.add(new_user)
     db.commit()
@@ -78,7 +78,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 # ---------------- LOGIN (JSON) ----------------
 @router.post("/login")
-def login_user(body: dict, db: Session = Depends(get_db)):
+async def login_user(body: dict, db: Session = Depends(get_db)):
     """Login for frontend apps (React, etc.)"""
     username = body.get("username")
     password = body.get("password")
@@ -86,9 +86,11 @@ def login_user(body: dict, db: Session = Depends(get_db)):
     if not username or not password:
         raise HTTPException(status_code=400, detail="Username and password required")
 
+    check_login_allowed(username)
     user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await run_bcrypt(verify_password, password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid username or password")
+    reset_login_attempts(username)
 
     token_data = {"sub": user.username, "user_id": user.id}
     access_token = create_access_token(data=token_data)
@@ -97,17 +99,40 @@ def login_user(body: dict, db: Session = Depends(get_db)):
 
 # ---------------- TOKEN LOGIN (for Swagger) ----------------
 @router.post("/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login via form (for Swagger /docs)"""
+    check_login_allowed(form_data.username)
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await run_bcrypt(verify_password, form_data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid username or password")
+    reset_login_attempts(form_data.username)
 
     token_data = {"sub": user.username, "user_id": user.id}
     access_token = create_access_token(data=token_data)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+# ---------------- LOGOUT ----------------
+@router.post("/logout")
+def logout(
+    everywhere: bool = False,
+    token: str = Depends(OAuth2PasswordBearer(tokenUrl="/auth/token")),
+    db: Session = Depends(get_db),
+):
+    """Revoke this token (or, with everywhere=true, every token issued to the user so far)."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user_id = payload.get("user_id")
+    if everywhere and user_id:
+        principal_cache.revoke_user(db, user_id)
+    else:
+        principal_cache.revoke_token(db, token, user_id=user_id, exp=payload.get("exp"))
+    return {"msg": "Logged out"}
+
+
 # ---------------- CURRENT USER ----------------
 @router.get("/me")
 def read_users_me(current_user: User = Depends(get_current_user)):
@@ -1,7 +1,13 @@
 # app/routes/health.py
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
-from app.database import SessionLocal
+from app.database import SessionLocal, db_pool_stats
+from app.services.monitor import monitor_status
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import pool_stats
+from app.services.audit_sink import audit_sink
+from app.services.read_router import read_router
+from app.services.response_cache import response_cache
 import requests, time
 
 router = APIRouter(prefix="/health", tags=["Health"])
@@ -14,15 +20,22 @@ def health_check():
     """
     🔹 Full System Health Check
     Checks:
-    - Database connection
+    - Database connection + pool checkout waits
     - Binance Testnet API
     - Background monitor heartbeat
+    - Auth principal cache hit rate
     - App uptime
     """
     status = {
         "database": "unknown",
+        "db_pool": db_pool_stats(),
+        "read_routing": read_router.stats(),
+        "response_cache": response_cache.stats(),
         "binance_testnet": "unknown",
-        "background_monitor": "active ✅ (async task running)",
+        "background_monitor": monitor_status(),
+        "auth_cache": principal_cache.stats(),
+        "auth_hash_pool": pool_stats(),
+        "audit_sink": audit_sink.stats(),
         "uptime_check": int(time.time())
     }
 
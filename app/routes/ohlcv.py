@@ -0,0 +1,107 @@
+# app/routes/ohlcv.py
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_db
+from app.dependencies import get_user_id
+from app.services.ohlcv_store import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_TARGET_POINTS,
+    downsample_ohlcv,
+    iter_ohlcv_columns,
+    ohlcv_bounds,
+    pick_bucket_seconds,
+    timeframe_to_seconds,
+    to_naive_utc,
+)
+
+router = APIRouter(prefix="/ohlcv", tags=["OHLCV"])
+
+MAX_CHUNK_SIZE = 50000
+MAX_POINTS = 20000
+
+
+@router.get("")
+def get_ohlcv_range(
+    symbol: str,
+    timeframe: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=MAX_CHUNK_SIZE),
+    user_id: int = Depends(get_user_id),
+):
+    """
+    Stream candles for symbol/timeframe in [start, end) as NDJSON.
+    Each line is one columnar chunk:
+        {"ts": [epoch_ms...], "open": [...], "high": [...], "low": [...], "close": [...], "volume": [...]}
+    Example: GET /ohlcv?symbol=BTCUSDT&timeframe=5m&start=2025-01-01
+    """
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    symbol = symbol.replace("/", "").upper()
+
+    def stream():
+        # own session: the response outlives the request-scoped get_db session
+        db = SessionLocal()
+        try:
+            for chunk in iter_ohlcv_columns(db, symbol, timeframe, start, end, limit, chunk_size):
+                yield json.dumps(chunk, separators=(",", ":")) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/{symbol}/{timeframe}")
+def get_ohlcv_downsampled(
+    symbol: str,
+    timeframe: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Optional[str] = Query(None, description="Bucket size, e.g. 1h, 4h, 1d"),
+    points: int = Query(DEFAULT_TARGET_POINTS, ge=10, le=MAX_POINTS),
+    user_id: int = Depends(get_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    Candles aggregated server-side for charting, in one round trip.
+    Pass `bucket` for a fixed bucket size, otherwise the bucket is chosen so the
+    range fits into about `points` candles (a year of 1m data -> ~2000 points).
+    Example: GET /ohlcv/BTCUSDT/1m?start=2025-01-01&points=2000
+    """
+    symbol = symbol.replace("/", "").upper()
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    try:
+        timeframe_to_seconds(timeframe)
+        bucket_sec = timeframe_to_seconds(bucket) if bucket else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if start is None or end is None:
+        first_ts, last_ts = ohlcv_bounds(db, symbol, timeframe)
+        if first_ts is None:
+            raise HTTPException(status_code=404, detail=f"No OHLCV data for {symbol} {timeframe}")
+        start = start or first_ts
+        end = end or last_ts + timedelta(seconds=timeframe_to_seconds(timeframe))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    if bucket_sec is None:
+        bucket_sec = pick_bucket_seconds(timeframe, start, end, points)
+
+    data = downsample_ohlcv(db, symbol, timeframe, start, end, bucket_sec)
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "bucket_sec": bucket_sec,
+        "points": len(data["ts"]),
+        **data,
+    }
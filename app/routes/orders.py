@@ -1,11 +1,11 @@
 # app/routes/orders.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from app.database import get_db
 from app.models.order import Order
 from app.dependencies import get_user_id  # safer, avoids 401
+from app.services.read_router import read_router
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -22,38 +22,42 @@ def to_float(value):
 
 @router.get("/")
 def get_user_orders(
+    request: Request,
     user_id: int = Depends(get_user_id),  # use same approach as positions.py
-    db: Session = Depends(get_db)
 ):
     """
     Fetch orders from the database for the logged-in user only.
+    Cached per user until their next order (ETag / 304 on unchanged polls).
     """
+    def load():
+        with read_router.scoped(user_id) as db:
+            # ✅ Fetch only this user's orders
+            orders = (
+                db.query(Order)
+                .filter(Order.user_id == user_id)
+                .order_by(Order.ts.desc())
+                .all()
+            )
+
+            result = []
+            for o in orders:
+                result.append({
+                    "id": o.id,
+                    "user_id": o.user_id,
+                    "signal_id": o.signal_id,
+                    "side": o.side,
+                    "qty": to_float(o.qty),
+                    "price": to_float(o.price),
+                    "sl": to_float(o.sl),
+                    "tp": to_float(o.tp),
+                    "binance_order_id": o.binance_order_id,
+                    "status": o.status.value if hasattr(o.status, "value") else o.status,
+                    "ts": o.ts.isoformat() if o.ts else None,
+                })
+            return result
+
     try:
-        # ✅ Fetch only this user's orders
-        orders = (
-            db.query(Order)
-            .filter(Order.user_id == user_id)
-            .order_by(Order.ts.desc())
-            .all()
-        )
-
-        result = []
-        for o in orders:
-            result.append({
-                "id": o.id,
-                "user_id": o.user_id,
-                "signal_id": o.signal_id,
-                "side": o.side,
-                "qty": to_float(o.qty),
-                "price": to_float(o.price),
-                "sl": to_float(o.sl),
-                "tp": to_float(o.tp),
-                "binance_order_id": o.binance_order_id,
-                "status": o.status.value if hasattr(o.status, "value") else o.status,
-                "ts": o.ts.isoformat() if o.ts else None,
-            })
-
-        return result
+        return response_cache.respond(request, ["orders"], load, user_id=user_id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
@@ -1,19 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
 from typing import Optional
 
-import requests
-
 from app.database import get_db
-from app.models.daily_pnl import DailyPnl
-from app.models.position import Position
 from app.dependencies import get_user_id
+from app.services.pnl_tracker import pnl_tracker
+from app.services import pnl_rollups
+from app.services.read_router import read_router
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/pnl", tags=["PnL"])
 
-BINANCE_BASE_URL = "https://testnet.binance.vision/api/v3"
-
 
 # ✅ 1️⃣ Live PnL (Today's realized + unrealized)
 @router.get("/today")
@@ -23,93 +21,81 @@ async def get_today_pnl(
 ):
     """
     ✅ Returns today's Profit & Loss (PnL):
-        - realized: from DailyPnl table
-        - unrealized: calculated live from Binance testnet prices
-        - max_dd: from DB (max drawdown)
+        - realized: closes recorded today
+        - unrealized: open positions marked at the monitor's latest prices
+        - max_dd: max drawdown of today's realized PnL
+    Served from the in-memory PnL tracker (no exchange calls per request).
     """
-    daily_pnl = (
-        db.query(DailyPnl)
-        .filter(DailyPnl.user_id == user_id, DailyPnl.date == date.today())
-        .first()
-    )
-    realized = float(daily_pnl.realized) if daily_pnl and daily_pnl.realized else 0.0
-    max_dd = float(daily_pnl.max_dd) if daily_pnl and daily_pnl.max_dd else 0.0
-
-    # Get open positions for live unrealized
-    positions = db.query(Position).filter(
-        Position.user_id == user_id, Position.status == "OPEN"
-    ).all()
-
-    unrealized_total = 0.0
-
-    for pos in positions:
-        symbol = pos.symbol.upper()
-        qty = float(pos.qty)
-        entry = float(pos.avg_price)
-
-        try:
-            resp = requests.get(f"{BINANCE_BASE_URL}/ticker/price", params={"symbol": symbol})
-            data = resp.json()
-            current_price = float(data.get("price", 0))
-
-            if pos.side.upper() == "BUY":
-                pnl = (current_price - entry) * qty
-            else:
-                pnl = (entry - current_price) * qty
-
-            unrealized_total += pnl
-
-        except Exception as e:
-            print(f"[WARN] Could not fetch price for {symbol}: {e}")
+    pnl = pnl_tracker.snapshot(db, user_id)
+    realized = pnl["realized"]
+    unrealized_total = pnl["unrealized"]
 
     return {
-        "date": date.today().isoformat(),
+        "date": pnl["date"],
         "realized": round(realized, 2),
         "unrealized": round(unrealized_total, 2),
-        "max_drawdown": round(max_dd, 2),
+        "max_drawdown": round(pnl["max_dd"], 2),
         "total_pnl": round(realized + unrealized_total, 2)
     }
 
 
-# ✅ 2️⃣ Historical Summary PnL (last X days)
+# ✅ 2️⃣ Historical Summary PnL (any range, by day / week / month)
 @router.get("/summary")
 def get_pnl_summary(
+    request: Request,
     days: Optional[int] = 7,
+    period: str = Query("D", pattern="^[DWM]$", description="D = daily, W = weekly, M = monthly rows"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
     user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_db)
 ):
     """
-    Returns total realized PnL for the user over the past X days (default = 7).
-    Example: GET /pnl/summary?days=30
+    Returns realized / unrealized PnL and drawdown for the user per period, plus range totals.
+    The range is [start, end] (default: the last `days` days up to today).
+    One indexed read of the pnl_rollups table, cached per user until their next close
+    (unrealized marks refresh within RESPONSE_CACHE_TTL_SEC).
+    Rows are listed under "daily_breakdown" for period=D (as before rollups existed)
+    and under "breakdown" for W / M; each row has "date" and "period_start".
+    Example: GET /pnl/summary?period=W&start=2025-01-01
     """
-    try:
-        start_date = date.today() - timedelta(days=days)
-        records = (
-            db.query(DailyPnl)
-            .filter(DailyPnl.user_id == user_id, DailyPnl.date >= start_date)
-            .order_by(DailyPnl.date.asc())
-            .all()
-        )
+    end = end or date.today()
+    start = start or end - timedelta(days=days)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
 
-        if not records:
-            return {"message": "No PnL records found for this user."}
+    def load():
+        with read_router.scoped(user_id) as db:
+            rows = pnl_rollups.summary(db, user_id, period, start, end)
 
-        total_pnl = sum(r.realized for r in records)
+        if not rows:
+            return {"message": "No PnL records found for this user."}
 
+        first = rows[0]
+        breakdown = [
+            {
+                "date": r.PnlRollup.period_start.isoformat(),  # pre-rollup key, kept for existing clients
+                "period_start": r.PnlRollup.period_start.isoformat(),
+                "realized": round(r.PnlRollup.realized, 4),
+                "unrealized": round(r.PnlRollup.unrealized, 4),
+                "max_drawdown": round(r.PnlRollup.max_dd, 4),
+                "trades": r.PnlRollup.trades,
+            }
+            for r in rows
+        ]
         return {
             "user_id": user_id,
-            "days": days,
-            "total_realized_pnl": round(total_pnl, 4),
-            "daily_breakdown": [
-                {
-                    "date": r.date.isoformat(),
-                    "realized": round(r.realized, 4),
-                    "unrealized": round(r.unrealized or 0, 4),
-                    "max_drawdown": round(r.max_dd or 0, 4),
-                }
-                for r in records
-            ],
+            "period": period,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "days": (end - start).days,
+            "total_realized_pnl": round(first.total_realized, 4),
+            "total_trades": int(first.total_trades or 0),
+            "worst_drawdown": round(first.worst_dd, 4),
+            # period=D keeps the original "daily_breakdown" list; weekly / monthly rows are new
+            "daily_breakdown" if period == "D" else "breakdown": breakdown,
         }
 
+    try:
+        return response_cache.respond(request, ["pnl"], load, user_id=user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch PnL summary: {str(e)}")
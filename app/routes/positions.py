@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.position import Position
-from app.dependencies import get_user_id
+from app.dependencies import get_user_id, get_read_db
+from app.services.pnl_tracker import pnl_tracker, position_pnl
 from datetime import datetime
 
 router = APIRouter(tags=["positions"])
@@ -25,9 +26,22 @@ def to_iso(value):
     return None
 
 
+def current_pnl(user_id: int, pos: Position, db: Session):
+    """Realized PnL for closed positions, latest tracked mark for open ones."""
+    if pos.exit_price is not None:
+        return round(position_pnl(pos.side, float(pos.avg_price), float(pos.exit_price), float(pos.qty)), 2)
+    unrealized = pnl_tracker.position_unrealized(db, user_id, pos.id)
+    return round(unrealized, 2) if unrealized is not None else None
+
+
 @router.get("/positions")
-async def get_positions(user_id: int = Depends(get_user_id), db: Session = Depends(get_db)):
-    positions = db.query(Position).filter(Position.user_id == user_id).all()
+async def get_positions(
+    user_id: int = Depends(get_user_id),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
+    # the listing can lag on the replica; the PnL tracker hydrates its cache from the primary
+    positions = read_db.query(Position).filter(Position.user_id == user_id).all()
 
     result = []
     for pos in positions:
@@ -44,7 +58,7 @@ async def get_positions(user_id: int = Depends(get_user_id), db: Session = Depen
             "exit_price": to_float(pos.exit_price),
             "opened_at": to_iso(pos.opened_at),
             "closed_at": to_iso(pos.closed_at),
-            "pnl": round((to_float(pos.avg_price or 0) - 2500.0) * to_float(pos.qty or 0), 2),  # example calc
+            "pnl": current_pnl(user_id, pos, db),
         })
 
     return result
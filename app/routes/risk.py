@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from datetime import date
 from app.database import get_db
@@ -6,21 +6,27 @@ from app.models.risk_settings import RiskSettings
 from app.models.daily_pnl import DailyPnl
 from app.schemas.risk import RiskOut
 from app.dependencies import get_user_id
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+from app.services.response_cache import response_cache
 
 router = APIRouter(tags=["risk"])
 
 # ------------------ GET: Fetch risk + daily PnL ------------------
 @router.get("/risk", response_model=RiskOut)
-async def get_risk_settings(user_id: int = Depends(get_user_id), db: Session = Depends(get_db)):
-    """Fetch current risk settings and today's PnL for user."""
-    settings = db.query(RiskSettings).filter(RiskSettings.user_id == user_id).first()
-    daily_pnl = db.query(DailyPnl).filter(DailyPnl.user_id == user_id, DailyPnl.date == date.today()).first()
-    return RiskOut(
-        capital=settings.capital if settings else 100000,
-        risk_per_trade_pct=settings.risk_per_trade_pct if settings else 0.01,
-        max_daily_loss_pct=settings.max_daily_loss_pct if settings else 0.02,
-        today_loss=daily_pnl.realized if daily_pnl else 0
-    )
+async def get_risk_settings(request: Request, user_id: int = Depends(get_user_id), db: Session = Depends(get_db)):
+    """Fetch current risk settings and today's PnL for user (cached until a risk update or close)."""
+    def load():
+        settings = db.query(RiskSettings).filter(RiskSettings.user_id == user_id).first()
+        daily_pnl = db.query(DailyPnl).filter(DailyPnl.user_id == user_id, DailyPnl.date == date.today()).first()
+        return RiskOut(
+            capital=settings.capital if settings else 100000,
+            risk_per_trade_pct=settings.risk_per_trade_pct if settings else 0.01,
+            max_daily_loss_pct=settings.max_daily_loss_pct if settings else 0.02,
+            today_loss=daily_pnl.realized if daily_pnl else 0
+        )
+
+    return response_cache.respond(request, ["risk"], load, user_id=user_id)
 
 # ------------------ POST: Create risk settings ------------------
 @router.post("/risk/setup")
@@ -45,6 +51,7 @@ async def setup_risk_settings(
     db.add(new_settings)
     db.commit()
     db.refresh(new_settings)
+    event_bus.publish(events.RISK_UPDATED, {}, user_id=user_id)  # drop cached limits on every worker
     return {"message": "Risk settings created successfully", "data": new_settings}
 
 # ------------------ PUT: Update risk settings ------------------
@@ -67,4 +74,5 @@ async def update_risk_settings(
 
     db.commit()
     db.refresh(settings)
+    event_bus.publish(events.RISK_UPDATED, {}, user_id=user_id)  # drop cached limits on every worker
     return {"message": "Risk settings updated successfully", "data": settings}
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from decimal import Decimal
 import json
 import tempfile
@@ -13,25 +14,52 @@ from app.database import get_db
 from app.schemas.signal import SignalOut
 from app.dependencies import get_user_id
 from app.models.singal_bd import Signal, SignalStatus
-from app.models.audit_log import AuditLog
 from app.models.risk_settings import RiskSettings
 from app.models.daily_pnl import DailyPnl
 from app.models.user import User
 from app.models.order import Order, OrderStatus
 from app.models.position import Position
-from app.utils.helpers import safe_json_dumps
 from app.services.suggestion_ingest import ingest_suggestions
 from app.auth import get_current_user
 from app.services.strategy_engine import generate_signal_from_ohlcv
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+from app.services.risk_engine import risk_engine
+from app.services.audit_sink import audit_sink
+from app.services.read_router import read_router
+from app.services.response_cache import response_cache
 
 router = APIRouter(tags=["signals"])
 
+SIGNAL_LIST = TypeAdapter(List[SignalOut])  # serializes cached responses once per change
+
+
+def signal_event_payload(sig: Signal) -> dict:
+    """Compact signal dict pushed to /stream subscribers."""
+    return {
+        "id": sig.id,
+        "symbol": sig.symbol,
+        "side": sig.side,
+        "entry": float(sig.entry) if sig.entry is not None else None,
+        "sl": float(sig.sl) if sig.sl is not None else None,
+        "tp": float(sig.tp) if sig.tp is not None else None,
+        "qty": float(sig.qty) if sig.qty is not None else None,
+        "status": sig.status.value if hasattr(sig.status, "value") else sig.status,
+        "created_at": sig.created_at,
+        "batch_id": sig.batch_id,
+    }
+
+
 # ---------------- GET ROUTES ----------------
 
 @router.get("/signals", response_model=List[SignalOut])
-async def get_all_signals(db: Session = Depends(get_db)):
-    """Fetch all signals."""
-    return db.query(Signal).order_by(Signal.created_at.desc()).all()
+async def get_all_signals(request: Request):
+    """Fetch all signals still in the live tables (older month partitions are archived)."""
+    def load():
+        with read_router.scoped() as db:
+            return db.query(Signal).order_by(Signal.created_at.desc()).all()
+
+    return response_cache.respond(request, ["signals"], load, adapter=SIGNAL_LIST)
 
 
 @router.get("/signals/pending", response_model=List[SignalOut])
@@ -85,6 +113,7 @@ async def import_signals_from_uploaded_csv(
             print(f"⚠️ Skipping row due to error: {e}")
 
     db.commit()
+    response_cache.invalidate("signals")  # no event for file imports: other workers catch up on TTL
     return {"message": f"✅ Imported {imported} signals from uploaded CSV file"}
 
 # ---------------- POST ROUTES ----------------
@@ -137,6 +166,14 @@ async def approve_signal(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch Binance filters: {e}")
 
+    # ✅ Pre-trade risk: per-trade loss, daily loss, exposure, symbol concentration
+    risk_engine.check_trade(db, user_id, {
+        "symbol": signal.symbol,
+        "entry": entry_price,
+        "sl": float(signal.sl),
+        "qty": qty,
+    })
+
     broker = BinanceBroker(db)
 
     try:
@@ -188,6 +225,17 @@ async def approve_signal(
         db.commit()
 
         print(f"✅ Order placed for {signal.symbol} | Binance ID: {result.get('orderId')}")
+        event_bus.publish(events.SIGNAL_UPDATED, signal_event_payload(signal))
+        event_bus.publish(events.POSITION_OPENED, {
+            "position_id": position.id,
+            "order_id": order.id,
+            "symbol": position.symbol,
+            "side": position.side,
+            "qty": float(position.qty),
+            "avg_price": float(position.avg_price),
+            "sl": float(position.sl),
+            "tp": float(position.tp),
+        }, user_id=user_id)
         return {
             "status": "success",
             "order_id": order.id,
@@ -235,16 +283,15 @@ async def reject_signal(
     signal.rejected_at = datetime.utcnow()
     db.commit()
 
-    db.add(AuditLog(
-        who=str(user_id),
-        what="SIGNAL_REJECTED",
-        payload_json=safe_json_dumps({
-            "signal_id": signal.id,
-            "cancel_result": cancel_result,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-    ))
-    db.commit()
+    audit_sink.record(user_id, "SIGNAL_REJECTED", {
+        "signal_id": signal.id,
+        "cancel_result": cancel_result,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+    event_bus.publish(events.SIGNAL_UPDATED, signal_event_payload(signal))
+    if order and order.binance_order_id:
+        # the signal event is global; the canceled order is this user's (drops their cached /orders)
+        event_bus.publish(events.ORDER_UPDATED, {"order_id": order.id, "status": "CANCELED"}, user_id=user_id)
 
     return {
         "status": "success",
@@ -274,9 +321,14 @@ def update_active_signals(signals: List[SignalCreate], db: Session = Depends(get
     db.query(Signal).filter(Signal.active == True).update({"active": False})
     db.commit()
 
-    batch_id = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    now = datetime.utcnow()
+    batch_id = now.strftime("%Y%m%d_%H%M%S")
 
+    new_signals = []
     for s in signals:
+        generated_at = s.generated_at
+        if generated_at is not None and generated_at.tzinfo is not None:
+            generated_at = generated_at.astimezone(timezone.utc).replace(tzinfo=None)
         sig = Signal(
             symbol=s.symbol,
             side=s.side,
@@ -286,24 +338,35 @@ def update_active_signals(signals: List[SignalCreate], db: Session = Depends(get
             qty=s.qty,
             strategy_id=s.strategy_id,
             status=SignalStatus.PENDING,
-            created_at=s.generated_at or datetime.utcnow(),
-            ts=datetime.utcnow(),
+            # partition key: server time, always in a pre-created month; the client's time goes to ts
+            created_at=now,
+            ts=generated_at or now,
             active=True,
             batch_id=batch_id,
             source="auto"
         )
         db.add(sig)
+        new_signals.append(sig)
 
+    # flush for ids, then build the push payload once before commit expires the rows
+    db.flush()
+    batch_payload = {"batch_id": batch_id, "signals": [signal_event_payload(sig) for sig in new_signals]}
     db.commit()
+
+    event_bus.publish(events.SIGNALS_BATCH, batch_payload)
     return {"status": "ok", "inserted": len(signals), "batch_id": batch_id}
 
 
 @router.get("/signals/active", response_model=List[SignalOut])
-async def get_active_signals(db: Session = Depends(get_db)):
-    """Return active signals only."""
-    return (
-        db.query(Signal)
-        .filter(Signal.active == True)
-        .order_by(Signal.created_at.desc())
-        .all()
-    )
+async def get_active_signals(request: Request):
+    """Return active signals only (cached until the next batch / signal update; 304 if unchanged)."""
+    def load():
+        with read_router.scoped() as db:
+            return (
+                db.query(Signal)
+                .filter(Signal.active == True)
+                .order_by(Signal.created_at.desc())
+                .all()
+            )
+
+    return response_cache.respond(request, ["signals"], load, adapter=SIGNAL_LIST)
@@ -0,0 +1,61 @@
+# app/routes/stream.py
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.dependencies import resolve_user_id
+from app.services.event_bus import event_bus
+from app.utils.helpers import safe_json_dumps
+
+router = APIRouter(tags=["Stream"])
+
+HEARTBEAT_SEC = 15
+
+
+def stream_user_id(
+    token: str = Query(..., description="JWT (EventSource cannot send headers)"),
+    db: Session = Depends(get_db),
+) -> int:
+    """Sync dependency: FastAPI runs it in the threadpool, so the auth queries never block the event loop."""
+    try:
+        return resolve_user_id(token, db)
+    finally:
+        db.close()  # the stream is long-lived; don't hold a pooled connection
+
+
+@router.get("/stream")
+async def stream_events(request: Request, user_id: int = Depends(stream_user_id)):
+    """
+    Server-Sent Events stream of dashboard changes:
+        signals.batch     - new Stage-4 batch from /signals/update_active
+        signals.updated   - a signal was approved / rejected
+        positions.opened  - position opened for this user
+        positions.closed  - position closed (SL/TP) for this user
+        orders.updated    - one of this user's orders changed (e.g. canceled on reject)
+        pnl.tick          - this user's unrealized PnL after each monitor pass
+    """
+    sub = event_bus.subscribe(user_id=user_id)
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['topic']}\ndata: {safe_json_dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,329 @@
+# app/services/audit_sink.py
+"""
+Batched, crash-safe audit log writer.
+
+Request paths call `audit_sink.record(who, what, payload)` instead of adding an
+AuditLog row and committing. The event is appended to a local journal segment
+and queued in memory. A flusher thread writes the queue to `audit_logs` as one
+multi-row INSERT whenever AUDIT_BATCH_SIZE events are waiting or
+AUDIT_FLUSH_SEC has passed.
+
+Journal: AUDIT_JOURNAL_DIR/<host>-<pid>/audit-<n>.jsonl. Every process that records
+(API workers, a standalone monitor, scripts) owns its own directory and holds a
+flock on its `.lock` while it runs. Each flush rotates to a new segment. A segment
+is deleted only after its rows are committed. At startup the directories of dead
+owners (lock free) are adopted, one recovering process at a time, and their
+segments replayed first; a live process's segments are never touched.
+Delivery is at-least-once: a crash between the COMMIT and the unlink replays that
+segment. Lines are flushed to the OS on write, so they survive a process crash.
+Segments are fsynced before their rows are inserted.
+
+A segment that keeps failing for a reason other than the DB being unreachable
+(e.g. a NUL byte in a payload) is retried MAX_ATTEMPTS times, then written row by
+row; rows that still fail go to AUDIT_JOURNAL_DIR/dead-letter.jsonl instead of
+blocking every later event.
+
+`stop()` (app shutdown) drains the queue before returning.
+"""
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import exc, insert
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, other processes' journals are left alone
+    fcntl = None
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.audit_log import AuditLog
+from app.services.partitions import ensure_partition_for, forget_partition
+from app.utils.helpers import safe_json_dumps
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = "audit-*.jsonl"
+LOCK_FILE = ".lock"
+RECOVER_LOCK_FILE = ".recover.lock"
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+RETRY_BACKOFF_SEC = 5.0
+MAX_ATTEMPTS = 5   # failures of one segment (DB reachable) before its bad rows are dead-lettered
+
+
+class AuditSink:
+    def __init__(self, journal_dir=settings.AUDIT_JOURNAL_DIR, batch_size=settings.AUDIT_BATCH_SIZE,
+                 flush_interval=settings.AUDIT_FLUSH_SEC, max_pending=settings.AUDIT_MAX_PENDING):
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending = []        # rows in the current segment
+        self._sealed = []         # [(segment path, rows)] rotated, not yet committed
+        self._segment = None
+        self._segment_path = None
+        self._seq = 0
+        self._owner_dir = None
+        self._owner_lock = None   # held open (and flocked) for the life of the process
+        self._attempts = {}       # segment path -> failed writes while the DB was reachable
+        self._thread = None
+        self._stopping = False
+        self.written = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+
+    # ------------------------
+    # Producer side
+    # ------------------------
+    def record(self, who, what: str, payload=None, ts: datetime = None):
+        """Queue one audit event (never touches the DB on the caller's thread)."""
+        row = {
+            "who": str(who),
+            "what": what,
+            "payload_json": payload if isinstance(payload, str) else safe_json_dumps(payload or {}),
+            "ts": (ts or datetime.utcnow()).isoformat(),
+        }
+        line = json.dumps(row) + "\n"
+        self.start()
+        with self._cond:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(line)
+            self._segment.flush()  # in the OS page cache: survives a process crash
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    # ------------------------
+    # Lifecycle
+    # ------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is not None:
+                return
+            os.makedirs(self.journal_dir, exist_ok=True)
+            recover_lock = _flock(os.path.join(self.journal_dir, RECOVER_LOCK_FILE))
+            try:
+                self._claim_dir()
+                self._recover()
+            finally:
+                recover_lock.close()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything queued, then stop the flusher."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._pending) + sum(len(rows) for _, rows in self._sealed),
+                "written": self.written,
+                "failed_flushes": self.failed_flushes,
+                "dead_lettered": self.dead_lettered,
+            }
+
+    # ------------------------
+    # Journal segments
+    # ------------------------
+    def _open_segment(self):
+        self._seq += 1
+        self._segment_path = os.path.join(self._owner_dir, f"audit-{time.time_ns()}-{self._seq:06d}.jsonl")
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        """Seal the current segment (caller holds the lock)."""
+        if self._segment is None:
+            return
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment.close()
+        if self._pending:
+            self._sealed.append((self._segment_path, self._pending))
+        else:
+            _unlink(self._segment_path)
+        self._segment, self._segment_path, self._pending = None, None, []
+
+    def _claim_dir(self):
+        """Create and lock this process's journal directory (caller holds the recover lock)."""
+        self._owner_dir = os.path.join(self.journal_dir, f"{socket.gethostname()}-{os.getpid()}")
+        os.makedirs(self._owner_dir, exist_ok=True)
+        self._owner_lock = _flock(os.path.join(self._owner_dir, LOCK_FILE))
+
+    def _recover(self):
+        """Adopt segments of dead processes, then queue every segment in our directory."""
+        if fcntl is not None:
+            for entry in sorted(os.listdir(self.journal_dir)):
+                other = os.path.join(self.journal_dir, entry)
+                if other == self._owner_dir or not os.path.isdir(other):
+                    continue
+                lock = _flock(os.path.join(other, LOCK_FILE), blocking=False)
+                if lock is None:
+                    continue  # owner still running
+                try:
+                    self._adopt(glob.glob(os.path.join(other, SEGMENT_PATTERN)))
+                    _unlink(os.path.join(other, LOCK_FILE))
+                finally:
+                    lock.close()
+                try:
+                    os.rmdir(other)
+                except OSError:
+                    pass
+            # segments from before per-process directories
+            self._adopt(glob.glob(os.path.join(self.journal_dir, SEGMENT_PATTERN)))
+
+        for path in sorted(glob.glob(os.path.join(self._owner_dir, SEGMENT_PATTERN))):
+            rows = []
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # torn last line from a crash mid-write
+            if rows:
+                self._sealed.append((path, rows))
+                logger.info(f"[AuditSink] replaying {len(rows)} events from {path}")
+            else:
+                _unlink(path)
+
+    def _adopt(self, paths):
+        for path in paths:
+            os.replace(path, os.path.join(self._owner_dir, os.path.basename(path)))
+
+    # ------------------------
+    # Flusher
+    # ------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+                if self._pending:
+                    self._rotate()
+                batches = list(self._sealed)
+
+            ok = True
+            for path, rows in batches:
+                dead_before = self.dead_lettered
+                error = self._write(rows)
+                if error is not None and not _transient(error):
+                    self._attempts[path] = self._attempts.get(path, 0) + 1
+                    if self._attempts[path] >= MAX_ATTEMPTS:
+                        error = self._dead_letter(path, rows)
+                if error is not None:
+                    ok = False
+                    break
+                self._attempts.pop(path, None)
+                _unlink(path)
+                with self._cond:
+                    self._sealed.remove((path, rows))
+                    self.written += len(rows) - (self.dead_lettered - dead_before)
+
+            if not ok:
+                self._shed_memory()
+                if stopping:
+                    logger.error("[AuditSink] DB unavailable at shutdown; events stay in the journal for replay")
+                    break
+                time.sleep(RETRY_BACKOFF_SEC)
+                continue
+            if stopping:
+                with self._cond:
+                    if not self._pending:
+                        if self._segment is not None:
+                            self._rotate()
+                        break
+
+    def _write(self, rows):
+        """Insert `rows` in one transaction. Returns None on success, else the exception."""
+        db = SessionLocal()
+        rows = [{**row, "ts": datetime.fromisoformat(row["ts"])} for row in rows]
+        months = {row["ts"].date().replace(day=1) for row in rows}
+        try:
+            # partitions first, in this transaction, before any DML (normally pre-created already)
+            for month in months:
+                ensure_partition_for(db, AuditLog.__tablename__, month)
+            for start in range(0, len(rows), self.batch_size):
+                db.execute(insert(AuditLog), rows[start:start + self.batch_size])
+            db.commit()
+            return None
+        except Exception as e:
+            db.rollback()
+            for month in months:
+                forget_partition(AuditLog.__tablename__, month)
+            self.failed_flushes += 1
+            logger.warning(f"[AuditSink] flush of {len(rows)} events failed, will retry: {e}")
+            return e
+        finally:
+            db.close()
+
+    def _dead_letter(self, path, rows):
+        """Write the segment row by row; rows the DB rejects go to the dead-letter file."""
+        dead = []
+        for row in rows:
+            error = self._write([row])
+            if error is not None and _transient(error):
+                return error  # DB went away meanwhile: retry the segment later
+            if error is not None:
+                dead.append(row)
+        if dead:
+            with open(os.path.join(self.journal_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+                for row in dead:
+                    f.write(json.dumps(row) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.dead_lettered += len(dead)
+            logger.error(f"[AuditSink] {len(dead)} events from {path} rejected by the DB, moved to {DEAD_LETTER_FILE}")
+        return None
+
+    def _shed_memory(self):
+        """While the DB is down, keep at most max_pending rows in memory; the rest stay on disk."""
+        with self._cond:
+            queued = sum(len(rows) for _, rows in self._sealed)
+            while self._sealed and queued > self.max_pending:
+                path, rows = self._sealed.pop()
+                queued -= len(rows)
+                logger.warning(f"[AuditSink] {path} left for replay on next start")
+
+
+def _transient(error) -> bool:
+    """The DB (or the pool) was unreachable: retry the same rows later."""
+    return isinstance(error, (exc.OperationalError, exc.InterfaceError, exc.DisconnectionError, exc.TimeoutError))
+
+
+def _flock(path, blocking=True):
+    """Open `path` with an exclusive flock; None if another process holds it (non-blocking)."""
+    f = open(path, "a")
+    if fcntl is None:
+        return f
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+audit_sink = AuditSink()
@@ -3,21 +3,24 @@ from abc import ABC, abstractmethod
 import asyncio
 import requests
 import redis
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, date
-import json
 import time
 import hmac
 import hashlib
 from typing import Dict, Any
-from decimal import Decimal
 
 from app.models.order import Order, OrderStatus
 from app.models.position import Position
 from app.models.execution import Execution
 from app.models.daily_pnl import DailyPnl
-from app.models.audit_log import AuditLog
 from app.config import settings
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+from app.services.audit_sink import audit_sink
+from app.services import pnl_rollups
 
 BINANCE_API_KEY = settings.BINANCE_API_KEY
 BINANCE_API_SECRET = settings.BINANCE_API_SECRET
@@ -184,59 +187,114 @@ class BinanceBroker(BrokerAdapter):
         return query.all()
 
     # ------------------------
-    # Close position
+    # Close positions (batched)
     # ------------------------
-    async def close_position(self, position: Position, close_price: float, reason: str):
-        execution = Execution(
-            order_id=position.order_id,
-            fill_price=close_price,
-            qty=position.qty,
-            ts=datetime.utcnow(),
-        )
-        self.db.add(execution)
-
-        position.status = "CLOSED"
-        position.closed_at = datetime.utcnow()
-        position.exit_price = close_price
-
-        avg_price = float(position.avg_price)
-        qty = float(position.qty)
-        if position.side.upper() == "BUY":
-            pnl = (close_price - avg_price) * qty
-        else:
-            pnl = (avg_price - close_price) * qty
-
-        daily_pnl = self.db.query(DailyPnl).filter(
-            DailyPnl.user_id == position.user_id,
-            DailyPnl.date == date.today(),
-        ).first()
-
-        if not daily_pnl:
-            daily_pnl = DailyPnl(
-                user_id=position.user_id,
-                date=date.today(),
-                realized=0.0,
-                unrealized=0.0,
-                max_dd=0.0,
-            )
-            self.db.add(daily_pnl)
+    async def close_positions(self, items) -> list:
+        """
+        Close many positions in one transaction. `items` = [(position, close_price, reason), ...].
+
+        - one UPDATE ... WHERE status = 'OPEN' RETURNING claims the rows: a position that
+          is already closed (another worker, a retry) is skipped, never booked twice
+        - executions are bulk inserted; audit rows go to the batched audit sink
+        - daily_pnl and the D/W/M pnl_rollups are upserted with `realized = realized + x`,
+          so concurrent closes for the same user can't lose each other's PnL
+        Returns one dict per position actually closed.
+        """
+        prices, reasons = {}, {}
+        for position, close_price, reason in items:
+            prices.setdefault(position.id, float(close_price))
+            reasons.setdefault(position.id, reason)
+        if not prices:
+            return []
+
+        now = datetime.utcnow()
+        rows = self.db.execute(
+            update(Position)
+            .where(Position.id.in_(prices), Position.status == "OPEN")
+            .values(status="CLOSED", closed_at=now, exit_price=case(prices, value=Position.id))
+            .returning(Position.id, Position.user_id, Position.order_id, Position.symbol,
+                       Position.side, Position.qty, Position.avg_price)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        closed = []
+        for row in sorted(rows, key=lambda r: r.id):
+            close_price = prices[row.id]
+            qty = float(row.qty)
+            direction = 1 if row.side.upper() == "BUY" else -1
+            closed.append({
+                "position_id": row.id,
+                "user_id": row.user_id,
+                "order_id": row.order_id,
+                "symbol": row.symbol,
+                "side": row.side,
+                "qty": qty,
+                "exit_price": close_price,
+                "pnl": direction * (close_price - float(row.avg_price)) * qty,
+                "reason": reasons[row.id],
+            })
 
+        for pid in prices.keys() - {c["position_id"] for c in closed}:
+            print(f"⚠️ Position {pid} already closed elsewhere, skipping")
+        if not closed:
+            self.db.rollback()
+            return []
 
-        daily_pnl.realized = (daily_pnl.realized or Decimal(0)) + Decimal(str(pnl))
+        self.db.execute(insert(Execution), [
+            {"order_id": c["order_id"], "fill_price": c["exit_price"], "qty": c["qty"], "ts": now}
+            for c in closed
+        ])
+        self._book_daily_pnl(closed, date.today())
+        pnl_rollups.book_realized(self.db, closed, date.today())
 
-        daily_pnl.max_dd = min(daily_pnl.max_dd or 0, daily_pnl.realized)
+        self.db.commit()
 
-        self.db.add(AuditLog(
-            who=str(position.user_id),
-            what="POSITION_CLOSED",
-            payload_json=json.dumps({
-                "symbol": position.symbol,
-                "reason": reason,
-                "pnl": float(pnl),
-                "close_price": float(close_price),
-                "timestamp": datetime.utcnow().isoformat()
-            })
+        for position, _, _ in items:
+            if position.id in prices:
+                self.db.expire(position)
+        for c in closed:
+            audit_sink.record(c["user_id"], "POSITION_CLOSED", {
+                "symbol": c["symbol"],
+                "reason": c["reason"],
+                "pnl": c["pnl"],
+                "close_price": c["exit_price"],
+                "timestamp": now.isoformat(),
+            }, ts=now)
+            print(f"✅ Position {c['position_id']} closed at {c['exit_price']} | PnL: {c['pnl']:.2f}")
+            event_bus.publish(events.POSITION_CLOSED, {
+                "position_id": c["position_id"],
+                "symbol": c["symbol"],
+                "side": c["side"],
+                "exit_price": c["exit_price"],
+                "pnl": c["pnl"],
+                "reason": c["reason"],
+            }, user_id=c["user_id"])
+        return closed
+
+    def _book_daily_pnl(self, closed: list, day: date):
+        """Atomic per-user `realized += sum(pnl)` upsert; max_dd tracks the lowest running total."""
+        per_user = {}
+        for c in closed:
+            total, low = per_user.get(c["user_id"], (0.0, 0.0))
+            total += c["pnl"]
+            per_user[c["user_id"]] = (total, min(low, total))  # low = min(0, running batch total)
+
+        stmt = pg_insert(DailyPnl).values([
+            {"user_id": user_id, "date": day, "realized": total, "unrealized": 0.0, "max_dd": low}
+            for user_id, (total, low) in sorted(per_user.items())  # fixed lock order across workers
+        ])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyPnl.user_id, DailyPnl.date],
+            set_={
+                # SET expressions see the pre-update row
+                "realized": func.coalesce(DailyPnl.realized, 0) + stmt.excluded.realized,
+                "max_dd": func.least(
+                    func.coalesce(DailyPnl.max_dd, 0),
+                    func.coalesce(DailyPnl.realized, 0) + stmt.excluded.max_dd,
+                ),
+            },
         ))
 
-        self.db.commit()
-        print(f"✅ Position {position.id} closed at {close_price} | PnL: {pnl:.2f}")
+    async def close_position(self, position: Position, close_price: float, reason: str):
+        closed = await self.close_positions([(position, close_price, reason)])
+        return closed[0] if closed else None
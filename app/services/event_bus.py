@@ -0,0 +1,160 @@
+# app/services/event_bus.py
+"""
+Process-wide pub/sub for domain events (new signal batch, position opened/closed,
+PnL ticks).
+
+Producers call `event_bus.publish(topic, data, user_id=...)` from any thread.
+Each event is built once and fanned out to every subscriber, so N connected
+dashboards cost one computation. With EVENT_BUS_BACKEND=redis events go through
+a Redis channel, so subscribers on every API worker see events published by any
+worker (including the monitor thread).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from app.config import settings
+from app.utils.helpers import safe_json_dumps
+
+logger = logging.getLogger(__name__)
+
+# Topics
+SIGNALS_BATCH = "signals.batch"
+SIGNAL_UPDATED = "signals.updated"
+POSITION_OPENED = "positions.opened"
+ORDER_UPDATED = "orders.updated"
+POSITION_CLOSED = "positions.closed"
+PNL_TICK = "pnl.tick"
+RISK_UPDATED = "risk.updated"
+AUTH_REVOKED = "auth.revoked"
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, user_id: Optional[int]):
+        self.loop = loop
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event: dict) -> bool:
+        # user-scoped events only go to that user's streams
+        return event.get("user_id") is None or event.get("user_id") == self.user_id
+
+    def _put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow client: drop the oldest event rather than block producers
+            self.queue.get_nowait()
+            self.queue.put_nowait(event)
+
+
+class EventBus:
+    def __init__(self, backend: str = "memory", redis_url: str = None, channel: str = "trading-events"):
+        self.backend = backend
+        self.channel = channel
+        self._subscribers = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = redis_url
+        self._redis_thread = None
+
+    # ------------------------
+    # Publishing
+    # ------------------------
+    def publish(self, topic: str, data: dict, user_id: Optional[int] = None):
+        """Publish an event. Safe to call from sync routes, async handlers and background threads."""
+        event = {"topic": topic, "user_id": user_id, "ts": time.time(), "data": data}
+        if self.backend == "redis" and self._ensure_redis():
+            try:
+                self._redis.publish(self.channel, safe_json_dumps(event))
+                return
+            except Exception as e:
+                logger.warning(f"[EventBus] Redis publish failed, delivering locally: {e}")
+        self._dispatch(event)
+
+    def _dispatch(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+
+        for sub in subscribers:
+            if sub.wants(event) and not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub._put, event)
+
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"[EventBus] listener error on {event['topic']}: {e}", exc_info=True)
+
+    # ------------------------
+    # Subscribing
+    # ------------------------
+    def add_listener(self, callback: Callable[[dict], None]):
+        """Register a synchronous in-process callback for every event (e.g. cache invalidation)."""
+        with self._lock:
+            self._listeners.append(callback)
+        if self.backend == "redis":
+            self._ensure_redis()
+
+    def subscribe(self, user_id: Optional[int] = None) -> _Subscriber:
+        """Register a subscriber bound to the running event loop. Pair with `unsubscribe`."""
+        sub = _Subscriber(asyncio.get_running_loop(), user_id)
+        with self._lock:
+            self._subscribers.add(sub)
+        if self.backend == "redis":
+            self._ensure_redis()
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def cross_process(self) -> bool:
+        """True when events from other workers and the standalone monitor reach this process."""
+        return self.backend == "redis"
+
+    # ------------------------
+    # Redis backend
+    # ------------------------
+    def _ensure_redis(self) -> bool:
+        if self._redis is not None:
+            return True
+        with self._lock:
+            if self._redis is not None:
+                return True
+            try:
+                import redis
+                client = redis.Redis.from_url(self._redis_url)
+                client.ping()
+            except Exception as e:
+                logger.warning(f"[EventBus] Redis unavailable ({e}); using in-process delivery")
+                self.backend = "memory"
+                return False
+            self._redis = client
+            self._redis_thread = threading.Thread(target=self._redis_listen, daemon=True)
+            self._redis_thread.start()
+            return True
+
+    def _redis_listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                self._dispatch(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"[EventBus] bad message on {self.channel}: {e}")
+
+
+event_bus = EventBus(backend=settings.EVENT_BUS_BACKEND, redis_url=settings.REDIS_URL)
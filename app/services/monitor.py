@@ -1,9 +1,43 @@
+# app/services/monitor.py
+"""
+Sharded position monitor.
+
+Every API worker (or standalone `python -m app.services.monitor` process) runs one
+monitor. Each pass it heartbeats its row in `monitor_leases`, reads the set of live
+workers (heartbeat younger than MONITOR_LEASE_TTL_SEC) and only polls positions whose
+symbol hashes onto its own slot:
+
+    crc32(symbol) % live_workers == index of this worker in the sorted live set
+
+Adding or removing a worker re-partitions the symbols on the next pass. While the
+membership is changing two workers can briefly own the same symbol; the close itself
+is guarded (`UPDATE ... WHERE status = 'OPEN'`), so a position is still closed once.
+
+Sharding needs EVENT_BUS_BACKEND=redis: every worker's PnL tracker must see the
+pnl.tick of every shard. On the in-process bus only one monitor polls: the worker in
+slot 0 watches every symbol and the others stay on standby (still heartbeating),
+taking over within MONITOR_LEASE_TTL_SEC if it dies. Extra monitors never multiply
+exchange polling; they only add capacity once the bus is redis.
+"""
 import asyncio
 import logging
-from datetime import datetime
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from app.config import settings
 from app.database import SessionLocal
+from app.models.monitor_lease import MonitorLease
 from app.models.position import Position
-from app.services.broker import BinanceBroker
+from app.services.broker import BinanceBroker, clean_symbol
+from app.services.event_bus import event_bus, PNL_TICK
+from app.services import pnl_rollups
+from app.services.pnl_tracker import position_pnl
 
 # -------------------------------
 # Logging configuration
@@ -13,29 +47,117 @@ logging.basicConfig(
     format="%(asctime)s | %(levelname)s | %(message)s"
 )
 
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_stop = threading.Event()
+_state = {"worker_id": WORKER_ID, "shard": None, "shards": None, "positions": 0, "heartbeat_at": None}
+_last_rollup_mark = 0.0
+SHARDED = settings.EVENT_BUS_BACKEND == "redis"  # ticks only cross processes over Redis; else one active monitor
+
+
+# -------------------------------
+# Lease / sharding
+# -------------------------------
+def _db_utcnow():
+    return func.timezone("utc", func.now())  # DB clock: no skew between hosts
+
+
+def heartbeat(db) -> tuple:
+    """Renew this worker's lease, reap dead ones, return (shard index, live worker count)."""
+    db.execute(
+        insert(MonitorLease)
+        .values(worker_id=WORKER_ID, hostname=socket.gethostname(), pid=os.getpid(),
+                started_at=_db_utcnow(), heartbeat_at=_db_utcnow())
+        .on_conflict_do_update(index_elements=[MonitorLease.worker_id],
+                               set_={"heartbeat_at": _db_utcnow()})
+    )
+    cutoff = _db_utcnow() - timedelta(seconds=settings.MONITOR_LEASE_TTL_SEC)
+    db.query(MonitorLease).filter(MonitorLease.heartbeat_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+
+    live = [w for (w,) in db.query(MonitorLease.worker_id).order_by(MonitorLease.worker_id)]
+    if WORKER_ID not in live:  # our own row was reaped after a long stall; it is back next pass
+        live = sorted(live + [WORKER_ID])
+    return live.index(WORKER_ID), len(live)
+
+
+def release_lease():
+    """Drop this worker's lease so the others pick up its symbols on their next pass."""
+    db = SessionLocal()
+    try:
+        db.query(MonitorLease).filter(MonitorLease.worker_id == WORKER_ID).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        logging.warning(f"[Monitor] could not release lease: {e}")
+    finally:
+        db.close()
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    # crc32, not hash(): identical in every process regardless of PYTHONHASHSEED
+    return zlib.crc32(clean_symbol(symbol).encode()) % shards
+
+
+def monitor_status() -> dict:
+    """This worker's current shard assignment (for /health)."""
+    return dict(_state)
+
+
+def stop_monitor():
+    _stop.set()
+    release_lease()  # don't wait out the TTL: the process may exit before the loop wakes
+
+
 # -------------------------------
 # Monitor function
 # -------------------------------
 async def monitor_positions():
     """
-    Background task to monitor open positions:
+    Background task to monitor open positions of this worker's shard:
     - Prints live prices
     - Tracks SL/TP
     - Updates exit_price/closed_at when closed
-    Runs every 10 seconds.
+    Runs every MONITOR_INTERVAL_SEC seconds (10 by default).
     """
-    while True:
-        db = SessionLocal()
+    global _last_rollup_mark
+    logging.info(f"[Monitor] worker {WORKER_ID} started")
+    if not SHARDED:
+        logging.warning("[Monitor] EVENT_BUS_BACKEND is not redis: not sharding, one monitor watches every symbol")
+    db = SessionLocal()  # reused every pass; close() hands its connection back to the pool
+    standby = False
+    while not _stop.is_set():
         try:
+            shard, shards = heartbeat(db)
+            if not SHARDED:
+                if shard != 0:
+                    if not standby:
+                        logging.info(f"[Monitor] another monitor is active ({shards} live): standing by")
+                    standby = True
+                    _state.update(shard=None, shards=shards, positions=0, heartbeat_at=datetime.utcnow().isoformat())
+                    continue
+                standby = False
+                shard, shards = 0, 1
+            _state.update(shard=shard, shards=shards, heartbeat_at=datetime.utcnow().isoformat())
+
             broker = BinanceBroker(db)
-            open_positions = await broker.positions(user_id=None)  # fetch all users
-            logging.info(f"Found {len(open_positions)} open positions.")
+            open_positions = [
+                p for p in await broker.positions(user_id=None)  # fetch all users
+                if shard_of(p.symbol, shards) == shard
+            ]
+            _state["positions"] = len(open_positions)
+            logging.info(f"Shard {shard + 1}/{shards}: {len(open_positions)} open positions.")
+
+            # per-user marks for the pnl.tick event: {user_id: {position_id: {price, unrealized}}}
+            marks = {}
+            prices = {}    # clean symbol -> last price seen this pass
+            to_close = []  # (position, price, reason): closed together in one transaction
 
             for pos in open_positions:
                 db.refresh(pos)
                 symbol = pos.symbol.replace("/", "")
                 quote = await broker.get_quote(symbol)
                 current_price = quote.get("last", 0.0)
+                prices[clean_symbol(symbol)] = current_price
 
                 # Print live position info
                 logging.info(
@@ -46,15 +168,56 @@ async def monitor_positions():
                 # Check SL/TP and close position if hit
                 if (pos.side.upper() == "BUY" and current_price >= pos.tp) or \
                    (pos.side.upper() == "SELL" and current_price <= pos.tp):
-                    await broker.close_position(pos, current_price, "TAKE_PROFIT")
+                    to_close.append((pos, current_price, "TAKE_PROFIT"))
 
                 elif (pos.side.upper() == "BUY" and current_price <= pos.sl) or \
                      (pos.side.upper() == "SELL" and current_price >= pos.sl):
-                    await broker.close_position(pos, current_price, "STOP_LOSS")
+                    to_close.append((pos, current_price, "STOP_LOSS"))
+
+                elif current_price:
+                    direction = 1 if pos.side.upper() == "BUY" else -1
+                    unrealized = direction * (current_price - float(pos.avg_price)) * float(pos.qty)
+                    marks.setdefault(pos.user_id, {})[pos.id] = {"price": current_price, "unrealized": unrealized}
+
+            if to_close:
+                await broker.close_positions(to_close)
+
+            # one computation per pass, fanned out to every connected dashboard
+            # (each worker publishes the marks of its own shard)
+            for user_id, user_marks in marks.items():
+                event_bus.publish(PNL_TICK, {
+                    "unrealized": round(sum(m["unrealized"] for m in user_marks.values()), 2),
+                    "positions": user_marks,
+                }, user_id=user_id)
+
+            # one writer for the unrealized snapshot, marked from every open position (all shards),
+            # re-using this pass's prices and quoting the other shards' symbols
+            if shard == 0 and time.monotonic() - _last_rollup_mark >= settings.PNL_ROLLUP_MARK_SEC:
+                _last_rollup_mark = time.monotonic()
+                unrealized = {}
+                for p in await broker.positions(user_id=None):
+                    symbol = clean_symbol(p.symbol)
+                    if symbol not in prices:
+                        prices[symbol] = (await broker.get_quote(symbol)).get("last", 0.0)
+                    pnl = position_pnl(p.side, float(p.avg_price), prices[symbol], float(p.qty)) if prices[symbol] else 0.0
+                    unrealized[p.user_id] = unrealized.get(p.user_id, 0.0) + pnl
+                pnl_rollups.record_marks(db, unrealized)
 
         except Exception as e:
+            db.rollback()
             logging.error(f"[Monitor Error] {e}", exc_info=True)
         finally:
             db.close()
+            await asyncio.sleep(settings.MONITOR_INTERVAL_SEC)  # also after a standby `continue`
+
+    release_lease()
+    logging.info(f"[Monitor] worker {WORKER_ID} stopped")
+
 
-        await asyncio.sleep(10)
+if __name__ == "__main__":
+    # standalone monitor (MONITOR_IN_API=false): with EVENT_BUS_BACKEND=redis run as many as
+    # needed, they shard themselves; without it extra ones only stand by for failover
+    try:
+        asyncio.run(monitor_positions())
+    except KeyboardInterrupt:
+        release_lease()
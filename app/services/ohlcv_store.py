@@ -0,0 +1,181 @@
+# app/services/ohlcv_store.py
+"""
+Read/write access to the partitioned `ohlcv` table.
+
+Writers go through `upsert_candles` so re-fetching the same candle updates it
+instead of violating the (symbol, timeframe, ts) primary key. Readers use
+`iter_ohlcv_columns` to stream a range as columnar chunks, or
+`downsample_ohlcv` to aggregate a range into chart-sized buckets in SQL.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.ohlcv import OHLCV
+from app.services.partitions import ensure_monthly_partitions
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def to_naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps in the table are naive UTC; aware query params are converted to match."""
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_epoch_ms(ts: datetime) -> int:
+    """Naive timestamps in the table are UTC."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+def upsert_candles(db: Session, symbol: str, timeframe: str, candles: Iterable[dict]) -> int:
+    """
+    Insert or update candles for one symbol/timeframe.
+    Each candle is a dict with ts (datetime) + open/high/low/close/volume.
+    Missing monthly partitions are created first. Does not commit.
+    """
+    rows = [
+        {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "ts": c["ts"],
+            **{col: float(c[col]) for col in PRICE_COLUMNS},
+        }
+        for c in candles
+        if c.get("ts") is not None
+    ]
+    if not rows:
+        return 0
+
+    ensure_monthly_partitions(db, OHLCV.__tablename__, min(r["ts"] for r in rows), max(r["ts"] for r in rows))
+
+    stmt = pg_insert(OHLCV)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OHLCV.symbol, OHLCV.timeframe, OHLCV.ts],
+        set_={col: stmt.excluded[col] for col in PRICE_COLUMNS},
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+def iter_ohlcv_columns(
+    db: Session,
+    symbol: str,
+    timeframe: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict]:
+    """
+    Stream candles in [start, end) ordered by ts as columnar chunks:
+        {"ts": [epoch_ms, ...], "open": [...], ..., "volume": [...]}
+    Uses a server-side cursor so memory stays bounded by `chunk_size`.
+    """
+    query = (
+        select(OHLCV.ts, OHLCV.open, OHLCV.high, OHLCV.low, OHLCV.close, OHLCV.volume)
+        .where(OHLCV.symbol == symbol, OHLCV.timeframe == timeframe)
+        .order_by(OHLCV.ts.asc())
+    )
+    if start is not None:
+        query = query.where(OHLCV.ts >= start)
+    if end is not None:
+        query = query.where(OHLCV.ts < end)
+    if limit:
+        query = query.limit(limit)
+
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        chunk = {"ts": [_to_epoch_ms(r[0]) for r in rows]}
+        for idx, col in enumerate(PRICE_COLUMNS, start=1):
+            chunk[col] = [r[idx] for r in rows]
+        yield chunk
+
+
+# ---------------- DOWNSAMPLING ----------------
+
+_TIMEFRAME_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+DEFAULT_TARGET_POINTS = 2000
+BUCKET_ORIGIN = datetime(1970, 1, 1)
+
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """
+    '5m' -> 300, '1h' -> 3600, '1d' -> 86400.
+    Units follow Binance: 'm' is minutes, 'M' (months, not fixed-length) is rejected.
+    """
+    tf = (timeframe or "").strip()
+    unit = tf[-1:] if tf[-1:] in ("m", "M") else tf[-1:].lower()  # 'H'/'D'/'W' are unambiguous, 'M' is not
+    try:
+        amount = int(tf[:-1])
+        seconds = amount * _TIMEFRAME_UNITS[unit]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid timeframe '{timeframe}'")
+    if amount <= 0:
+        raise ValueError(f"Invalid timeframe '{timeframe}': amount must be positive")
+    return seconds
+
+
+def ohlcv_bounds(db: Session, symbol: str, timeframe: str):
+    """(first_ts, last_ts) stored for symbol/timeframe, or (None, None)."""
+    return db.execute(
+        select(func.min(OHLCV.ts), func.max(OHLCV.ts))
+        .where(OHLCV.symbol == symbol, OHLCV.timeframe == timeframe)
+    ).one()
+
+
+def pick_bucket_seconds(timeframe: str, start: datetime, end: datetime, points: int) -> int:
+    """Smallest multiple of the base timeframe that fits [start, end) into `points` buckets."""
+    base = timeframe_to_seconds(timeframe)
+    span = max((end - start).total_seconds(), base)
+    per_point = math.ceil(span / max(points, 1))
+    return max(base, math.ceil(per_point / base) * base)
+
+
+def downsample_ohlcv(
+    db: Session,
+    symbol: str,
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+    bucket_sec: int,
+) -> dict:
+    """
+    Aggregate candles in [start, end) into `bucket_sec` buckets in one query
+    (date_bin + GROUP BY): first open, max high, min low, last close, summed volume.
+    Returns columnar lists like iter_ohlcv_columns.
+    """
+    # buckets are aligned to the epoch so the same range always bins the same way
+    bucket = func.date_bin(timedelta(seconds=bucket_sec), OHLCV.ts, BUCKET_ORIGIN).label("bucket")
+    query = (
+        select(
+            bucket,
+            array_agg(aggregate_order_by(OHLCV.open, OHLCV.ts.asc()))[1],
+            func.max(OHLCV.high),
+            func.min(OHLCV.low),
+            array_agg(aggregate_order_by(OHLCV.close, OHLCV.ts.desc()))[1],
+            func.sum(OHLCV.volume),
+        )
+        .where(
+            OHLCV.symbol == symbol,
+            OHLCV.timeframe == timeframe,
+            OHLCV.ts >= start,
+            OHLCV.ts < end,
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    rows = db.execute(query).all()
+
+    result = {"ts": [_to_epoch_ms(r[0]) for r in rows]}
+    for idx, col in enumerate(PRICE_COLUMNS, start=1):
+        result[col] = [r[idx] for r in rows]
+    return result
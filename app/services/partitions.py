@@ -0,0 +1,89 @@
+# app/services/partitions.py
+"""
+Helpers for monthly RANGE partitions on Postgres tables.
+
+Parent tables are declared with `postgresql_partition_by="RANGE (<col>)"`;
+child partitions are named `<table>_yYYYYmMM` and cover [month, next month).
+Upcoming partitions are pre-created by app/services/retention.py (at API startup
+and on a timer), never from inside an ORM flush.
+"""
+import threading
+from datetime import date, datetime
+from sqlalchemy import text
+
+_ensured = set()  # (table, month) already created by this process
+_ensured_lock = threading.Lock()
+
+
+def month_start(value) -> date:
+    """First day of the month containing `value` (date or datetime)."""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def next_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def iter_months(start, end):
+    """Yield the first day of every month between start and end (inclusive)."""
+    current = month_start(start)
+    last = month_start(end)
+    while current <= last:
+        yield current
+        current = next_month(current)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def ensure_monthly_partitions(conn, table: str, start, end) -> list:
+    """
+    Create any missing monthly partitions of `table` covering [start, end].
+    `conn` can be a Session or a Connection. Returns the partition names touched.
+    """
+    names = []
+    for month in iter_months(start, end):
+        name = partition_name(table, month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        ))
+        names.append(name)
+    return names
+
+
+def list_partitions(conn, table: str) -> list:
+    """Names of the partitions currently attached to `table`."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table}).all()
+    return [r[0] for r in rows]
+
+
+def ensure_partition_for(conn, table: str, value):
+    """
+    Create the partition holding `value` on the caller's own connection, once per process.
+    Call it BEFORE any DML in the transaction: the DDL takes ACCESS EXCLUSIVE on the parent,
+    which must not wait behind locks the same caller already holds. If the transaction
+    rolls back, call forget_partition() so the next attempt recreates it.
+    """
+    month = month_start(value or datetime.utcnow())
+    if (table, month) in _ensured:
+        return
+    ensure_monthly_partitions(conn, table, month, month)
+    with _ensured_lock:
+        _ensured.add((table, month))
+
+
+def forget_partition(table: str, month: date):
+    """Called when a partition is dropped (or its creation rolled back), so it is recreated."""
+    with _ensured_lock:
+        _ensured.discard((table, month))
@@ -0,0 +1,90 @@
+# app/services/password_hasher.py
+"""
+Bounded bcrypt pool and per-user login throttle for the /auth routes.
+
+bcrypt is deliberately slow (~100-300 ms per hash). Run inline or on the shared
+threadpool, a login burst ties up the threads the sync trading routes run on. Here:
+    - hashing runs on its own small executor (AUTH_HASH_WORKERS threads), so it
+      can never take more than that many cores
+    - at most AUTH_HASH_QUEUE requests may be running or waiting; past that the
+      route fails fast with 503 + Retry-After instead of queueing unboundedly
+    - each username gets LOGIN_MAX_ATTEMPTS attempts per LOGIN_WINDOW_SEC (429
+      after that, reset by a successful login), so one account can't be hammered
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+_executor = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+_attempts = {}  # username -> deque of attempt timestamps
+_attempts_lock = threading.Lock()
+
+
+# ------------------------
+# Bounded executor
+# ------------------------
+async def run_bcrypt(fn, *args):
+    """Run a bcrypt call (verify_password / get_password_hash) on the bounded pool."""
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight >= settings.AUTH_HASH_QUEUE:
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+# ------------------------
+# Per-user login throttle
+# ------------------------
+def check_login_allowed(username: str):
+    """Record a login attempt for `username`; 429 once the window's budget is spent."""
+    now = time.monotonic()
+    key = username.lower()
+    with _attempts_lock:
+        window = _attempts.setdefault(key, deque())
+        while window and window[0] <= now - settings.LOGIN_WINDOW_SEC:
+            window.popleft()
+        if len(window) >= settings.LOGIN_MAX_ATTEMPTS:
+            retry_after = int(window[0] + settings.LOGIN_WINDOW_SEC - now) + 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+        window.append(now)
+        if len(_attempts) > 10000:  # drop idle usernames so the table can't grow unbounded
+            for name in [n for n, w in _attempts.items() if not w or w[-1] <= now - settings.LOGIN_WINDOW_SEC]:
+                del _attempts[name]
+
+
+def reset_login_attempts(username: str):
+    with _attempts_lock:
+        _attempts.pop(username.lower(), None)
+
+
+def pool_stats() -> dict:
+    with _attempts_lock:
+        throttled = sum(1 for w in _attempts.values() if len(w) >= settings.LOGIN_MAX_ATTEMPTS)
+    return {
+        "workers": settings.AUTH_HASH_WORKERS,
+        "queue_limit": settings.AUTH_HASH_QUEUE,
+        "in_flight": _in_flight,
+        "throttled_users": throttled,
+    }
@@ -0,0 +1,118 @@
+# app/services/pnl_rollups.py
+"""
+Incrementally maintained PnL rollups (`pnl_rollups`): one row per user per day (D),
+ISO week (W) and month (M).
+
+    book_realized(db, closed, day)  - called by BinanceBroker.close_positions inside the
+                                      close transaction: realized += pnl, trades += n
+    record_marks(db, unrealized)    - called by the monitor every PNL_ROLLUP_MARK_SEC with
+                                      the mark of every user's open positions (all shards)
+    summary(db, user_id, ...)       - one indexed range read (totals via window functions)
+
+Every write is an `INSERT ... ON CONFLICT DO UPDATE` with relative SET expressions, so
+concurrent workers never lose each other's PnL. max_dd is the lowest point of the
+period's realized PnL, or realized + unrealized at each mark, whichever is lower.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.pnl_rollup import PnlRollup
+
+PERIODS = ("D", "W", "M")
+
+
+def period_start(period: str, day: date) -> date:
+    if period == "W":
+        return day - timedelta(days=day.weekday())
+    if period == "M":
+        return day.replace(day=1)
+    return day
+
+
+def _upsert(db: Session, rows: list, set_: dict):
+    rows.sort(key=lambda r: (r["user_id"], r["period"], r["period_start"]))  # fixed lock order across workers
+    stmt = pg_insert(PnlRollup).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[PnlRollup.user_id, PnlRollup.period, PnlRollup.period_start],
+        set_={name: expr(stmt.excluded) for name, expr in set_.items()},
+    ))
+
+
+def book_realized(db: Session, closed: list, day: date):
+    """Add a batch of closes (broker dicts with user_id / pnl) to the D, W and M rows of `day`."""
+    per_user = {}
+    for c in closed:
+        total, low, trades = per_user.get(c["user_id"], (0.0, 0.0, 0))
+        total += c["pnl"]
+        per_user[c["user_id"]] = (total, min(low, total), trades + 1)  # low = min(0, running batch total)
+
+    rows = [
+        {"user_id": user_id, "period": period, "period_start": period_start(period, day),
+         "realized": total, "unrealized": 0.0, "max_dd": low, "trades": trades}
+        for user_id, (total, low, trades) in per_user.items()
+        for period in PERIODS
+    ]
+    # SET expressions see the pre-update row
+    _upsert(db, rows, {
+        "realized": lambda ex: func.coalesce(PnlRollup.realized, 0) + ex.realized,
+        "max_dd": lambda ex: func.least(func.coalesce(PnlRollup.max_dd, 0),
+                                        func.coalesce(PnlRollup.realized, 0) + ex.max_dd),
+        "trades": lambda ex: func.coalesce(PnlRollup.trades, 0) + ex.trades,
+        "updated_at": lambda ex: func.timezone("utc", func.now()),
+    })
+
+
+def record_marks(db: Session, unrealized: dict, day: date = None):
+    """
+    Store `unrealized` ({user_id: current unrealized PnL of all their open positions})
+    and zero the stale non-zero marks of users whose positions have all closed today.
+    """
+    day = day or date.today()
+    unrealized = dict(unrealized)
+    stale = db.execute(
+        select(PnlRollup.user_id).where(
+            PnlRollup.period == "D", PnlRollup.period_start == day, PnlRollup.unrealized != 0,
+        )
+    ).scalars().all()
+    for user_id in stale:
+        unrealized.setdefault(user_id, 0.0)
+    if not unrealized:
+        return 0
+
+    rows = [
+        {"user_id": user_id, "period": period, "period_start": period_start(period, day),
+         "realized": 0.0, "unrealized": value, "max_dd": min(0.0, value), "trades": 0}
+        for user_id, value in unrealized.items()
+        for period in PERIODS
+    ]
+    _upsert(db, rows, {
+        "unrealized": lambda ex: ex.unrealized,
+        "max_dd": lambda ex: func.least(func.coalesce(PnlRollup.max_dd, 0),
+                                        func.coalesce(PnlRollup.realized, 0) + ex.unrealized),
+        "updated_at": lambda ex: func.timezone("utc", func.now()),
+    })
+    db.commit()
+    return len(unrealized)
+
+
+def summary(db: Session, user_id: int, period: str, start: date, end: date) -> list:
+    """Rows of `period` overlapping [start, end], each with the range totals attached."""
+    return (
+        db.query(
+            PnlRollup,
+            func.sum(PnlRollup.realized).over().label("total_realized"),
+            func.sum(PnlRollup.trades).over().label("total_trades"),
+            func.min(PnlRollup.max_dd).over().label("worst_dd"),
+        )
+        .filter(
+            PnlRollup.user_id == user_id,
+            PnlRollup.period == period,
+            PnlRollup.period_start >= period_start(period, start),
+            PnlRollup.period_start <= end,
+        )
+        .order_by(PnlRollup.period_start.asc())
+        .all()
+    )
@@ -0,0 +1,223 @@
+# app/services/pnl_tracker.py
+"""
+In-memory PnL aggregator.
+
+Keeps, per user, today's realized PnL, max drawdown, the running unrealized total
+and a mark for every open position. It is fed by the event bus:
+    positions.opened  -> start tracking the position
+    pnl.tick          -> re-mark positions at the monitor's latest prices
+    positions.closed  -> move the position's PnL from unrealized to realized
+so /pnl/today and /positions read totals in O(1) instead of querying the exchange.
+A user's book is hydrated from the DB the first time it is read. Events that arrive
+while the DB is being read are buffered and replayed onto the new book; closes the DB
+read already includes are recognised by position id and not booked twice.
+
+Books are only trusted indefinitely when the event bus crosses processes (redis). On
+the memory bus a standalone monitor's closes and other workers' opens never arrive
+here, so a book older than LOCAL_STATE_TTL_SEC is re-read from the DB (keeping the
+latest prices of positions that are still open).
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.daily_pnl import DailyPnl
+from app.models.position import Position
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+
+# closes this recent are checked against the DB snapshot at hydration (wider than one
+# local day, whatever the server timezone; late events of older closes are not re-booked)
+CLOSE_DEDUPE_WINDOW = timedelta(days=1)
+
+
+def position_pnl(side: str, entry: float, price: float, qty: float) -> float:
+    direction = 1 if (side or "").upper() == "BUY" else -1
+    return direction * (price - entry) * qty
+
+
+class _Mark:
+    __slots__ = ("symbol", "side", "qty", "entry", "price", "unrealized")
+
+    def __init__(self, symbol, side, qty, entry):
+        self.symbol = symbol
+        self.side = side
+        self.qty = qty
+        self.entry = entry
+        self.price = None
+        self.unrealized = 0.0
+
+
+class _UserBook:
+    def __init__(self):
+        self.day = date.today()
+        self.realized = 0.0
+        self.max_dd = 0.0
+        self.unrealized = 0.0
+        self.positions = {}  # position_id -> _Mark
+        self.closed_ids = set()  # closes already in `realized` (DB snapshot or applied event)
+        self.loaded_at = time.monotonic()
+
+    def fresh(self) -> bool:
+        """Kept current by events, or younger than the TTL."""
+        return event_bus.cross_process or time.monotonic() - self.loaded_at < settings.LOCAL_STATE_TTL_SEC
+
+    def roll_day(self):
+        today = date.today()
+        if self.day != today:
+            self.day = today
+            self.realized = 0.0
+            self.max_dd = 0.0
+            self.closed_ids.clear()
+
+
+class PnlTracker:
+    def __init__(self):
+        self._books = {}
+        self._hydrating = {}  # user_id -> [hydrations in flight, events seen meanwhile]
+        self._lock = threading.RLock()
+
+    # ------------------------
+    # Hydration
+    # ------------------------
+    def _book(self, db: Optional[Session], user_id: int) -> Optional[_UserBook]:
+        with self._lock:
+            book = self._books.get(user_id)
+            if db is None or (book is not None and book.fresh()):
+                return book
+            pending = self._hydrating.setdefault(user_id, [0, []])
+            pending[0] += 1
+
+        try:
+            book = self._load(db, user_id)
+        finally:
+            with self._lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    self._hydrating.pop(user_id, None)
+
+        with self._lock:
+            existing = self._books.get(user_id)
+            if existing is not None and existing.fresh():
+                return existing  # another request hydrated first (and replayed the buffer)
+            if existing is not None:
+                for pid, mark in existing.positions.items():
+                    if mark.price is not None:
+                        self._mark(book, pid, mark.price)
+            for topic, data in pending[1]:
+                self._apply(book, topic, data)
+            pending[1].clear()
+            self._books[user_id] = book
+            return book
+
+    def _load(self, db: Session, user_id: int) -> _UserBook:
+        today = date.today()
+        # one statement = one snapshot: today's realized and the closes it contains agree
+        realized, max_dd, closed_ids = db.execute(select(
+            select(DailyPnl.realized)
+            .where(DailyPnl.user_id == user_id, DailyPnl.date == today).scalar_subquery(),
+            select(DailyPnl.max_dd)
+            .where(DailyPnl.user_id == user_id, DailyPnl.date == today).scalar_subquery(),
+            select(func.array_agg(Position.id))
+            .where(Position.user_id == user_id, Position.status == "CLOSED",
+                   Position.closed_at >= datetime.utcnow() - CLOSE_DEDUPE_WINDOW).scalar_subquery(),
+        )).one()
+        open_positions = (
+            db.query(Position)
+            .filter(Position.user_id == user_id, Position.status == "OPEN")
+            .all()
+        )
+
+        book = _UserBook()
+        book.day = today
+        book.realized = float(realized or 0)
+        book.max_dd = float(max_dd or 0)
+        book.closed_ids.update(closed_ids or ())
+        for pos in open_positions:
+            book.positions[pos.id] = _Mark(pos.symbol, pos.side, float(pos.qty), float(pos.avg_price))
+        return book
+
+    # ------------------------
+    # Updates (event bus listener)
+    # ------------------------
+    def handle_event(self, event: dict):
+        topic = event.get("topic")
+        user_id = event.get("user_id")
+        data = event.get("data") or {}
+        if user_id is None:
+            return
+
+        with self._lock:
+            book = self._books.get(user_id)
+            if book is None:
+                pending = self._hydrating.get(user_id)
+                if pending is not None and topic != events.PNL_TICK:
+                    pending[1].append((topic, data))  # replayed once the DB read lands
+                return  # otherwise the first read's DB query will include this change
+            self._apply(book, topic, data)
+
+    def _apply(self, book: _UserBook, topic: str, data: dict):
+        """Caller holds the lock. Opens and closes are idempotent per position id."""
+        book.roll_day()
+
+        if topic == events.POSITION_OPENED:
+            if data["position_id"] not in book.closed_ids:
+                book.positions.setdefault(
+                    data["position_id"],
+                    _Mark(data["symbol"], data["side"], float(data["qty"]), float(data["avg_price"])),
+                )
+
+        elif topic == events.PNL_TICK:
+            for pid, mark in (data.get("positions") or {}).items():
+                self._mark(book, int(pid), float(mark["price"]))
+
+        elif topic == events.POSITION_CLOSED:
+            closed = book.positions.pop(data["position_id"], None)
+            if closed is not None:
+                book.unrealized -= closed.unrealized
+            if data["position_id"] in book.closed_ids:
+                return  # already in realized (hydrated from the DB, or a repeated event)
+            book.closed_ids.add(data["position_id"])
+            book.realized += float(data["pnl"])
+            book.max_dd = min(book.max_dd, book.realized)
+
+    def _mark(self, book: _UserBook, position_id: int, price: float):
+        mark = book.positions.get(position_id)
+        if mark is None or not price:
+            return
+        new_unrealized = position_pnl(mark.side, mark.entry, price, mark.qty)
+        book.unrealized += new_unrealized - mark.unrealized
+        mark.price = price
+        mark.unrealized = new_unrealized
+
+    # ------------------------
+    # Reads (O(1) once hydrated)
+    # ------------------------
+    def snapshot(self, db: Session, user_id: int) -> dict:
+        book = self._book(db, user_id)
+        with self._lock:
+            book.roll_day()
+            return {
+                "date": book.day.isoformat(),
+                "realized": book.realized,
+                "unrealized": book.unrealized,
+                "max_dd": book.max_dd,
+                "open_positions": len(book.positions),
+            }
+
+    def position_unrealized(self, db: Session, user_id: int, position_id: int) -> Optional[float]:
+        """Latest unrealized PnL for an open position, or None if it has not been marked yet."""
+        book = self._book(db, user_id)
+        mark = book.positions.get(position_id)
+        if mark is None or mark.price is None:
+            return None
+        return mark.unrealized
+
+
+pnl_tracker = PnlTracker()
+event_bus.add_listener(pnl_tracker.handle_event)
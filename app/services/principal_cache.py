@@ -0,0 +1,173 @@
+# app/services/principal_cache.py
+"""
+Cache of verified JWT principals.
+
+resolve_user_id used to decode the token and SELECT the user on every request. A
+token that verified once now maps straight to its user id until the earlier of
+    - the token's own `exp`
+    - AUTH_CACHE_TTL_SEC after it was verified (so a deleted user is noticed)
+Entries are keyed by a SHA-256 of the whole token (never the raw token, and never
+the signature alone: a forged payload carrying a valid signature must miss).
+
+Revocation is stored in the database first, so every worker sees it on its next miss:
+    revoke_token(db, token)    - a `revoked_tokens` row, until the token expires
+    revoke_user(db, user_id)   - users.tokens_revoked_at: every token with `iat` up to now
+then fans out on `auth.revoked` to drop cached entries. Only the redis event bus
+reaches other processes, so with the memory backend nothing is cached at all
+(event_bus.cross_process is False) and every request runs load_user: the user row
+and the token's revoked_tokens entry in one query, the same round trip as before
+the cache existed. Tokens carry `iat_ms`, so a login in the same second as a
+logout-everywhere is not caught by its cutoff.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issued_at(payload: dict) -> Optional[float]:
+    """Issue time in epoch seconds: `iat_ms` (ms) when present, else the whole-second `iat`."""
+    if payload.get("iat_ms") is not None:
+        return payload["iat_ms"] / 1000.0
+    return payload.get("iat")
+
+
+class PrincipalCache:
+    def __init__(self, ttl_sec: int = settings.AUTH_CACHE_TTL_SEC, max_entries: int = settings.AUTH_CACHE_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (user_id, expires_at)
+        self._revoked_tokens = {}       # key -> token exp (dropped once expired)
+        self._revoked_before = {}       # user_id -> tokens with iat <= this are revoked
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------
+    # Lookup / store
+    # ------------------------
+    def get(self, key: str) -> Optional[int]:
+        now = time.time()
+        with self._lock:
+            if not event_bus.cross_process:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, user_id: int, exp: Optional[float]):
+        now = time.time()
+        expires_at = now + self.ttl_sec
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now or not event_bus.cross_process:
+            return
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ------------------------
+    # Revocation
+    # ------------------------
+    def load_user(self, db: Session, key: str, user_id: int) -> Tuple[Optional[User], bool]:
+        """The user row and whether this token is in revoked_tokens, in one query."""
+        row = (
+            db.query(User, exists().where(RevokedToken.token_key == key))
+            .filter(User.id == user_id)
+            .first()
+        )
+        return (row[0], bool(row[1])) if row else (None, False)
+
+    def is_revoked(self, key: str, user: User, issued_at: Optional[float], denylisted: bool = False) -> bool:
+        """`issued_at` from issued_at(payload); `denylisted` from load_user."""
+        if denylisted:
+            return True
+        issued_at = issued_at or 0
+        with self._lock:
+            if key in self._revoked_tokens:
+                return True
+            cutoff = self._revoked_before.get(user.id)
+            if cutoff is not None and issued_at <= cutoff:
+                return True
+        return user.tokens_revoked_at is not None and (
+            issued_at <= user.tokens_revoked_at.replace(tzinfo=timezone.utc).timestamp()
+        )
+
+    def revoke_token(self, db: Session, token: str, user_id: Optional[int] = None, exp: Optional[float] = None):
+        key = token_key(token)
+        now = datetime.utcnow()
+        expires_at = datetime.utcfromtimestamp(float(exp)) if exp is not None else None
+        db.merge(RevokedToken(token_key=key, user_id=user_id, expires_at=expires_at))
+        # expired tokens fail verification anyway
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+        db.commit()
+        event_bus.publish(events.AUTH_REVOKED, {"token_key": key, "exp": exp}, user_id=user_id)
+
+    def revoke_user(self, db: Session, user_id: int):
+        before = time.time()
+        db.query(User).filter(User.id == user_id).update(
+            {User.tokens_revoked_at: datetime.utcfromtimestamp(before)}, synchronize_session=False
+        )
+        db.commit()
+        event_bus.publish(events.AUTH_REVOKED, {"before": before}, user_id=user_id)
+
+    def handle_event(self, event: dict):
+        if event.get("topic") != events.AUTH_REVOKED:
+            return
+        data = event.get("data") or {}
+        now = time.time()
+        with self._lock:
+            if data.get("token_key"):
+                key = data["token_key"]
+                self._entries.pop(key, None)
+                self._revoked_tokens[key] = data.get("exp") or now + self.ttl_sec
+            if data.get("before") is not None and event.get("user_id") is not None:
+                user_id = event["user_id"]
+                self._revoked_before[user_id] = max(self._revoked_before.get(user_id, 0), data["before"])
+                for key in [k for k, (uid, _) in self._entries.items() if uid == user_id]:
+                    del self._entries[key]
+            # expired tokens fail verification anyway
+            for key in [k for k, exp in self._revoked_tokens.items() if exp <= now]:
+                del self._revoked_tokens[key]
+
+    # ------------------------
+    # Metrics
+    # ------------------------
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "shared": event_bus.cross_process,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "revoked_tokens": len(self._revoked_tokens),
+        }
+
+
+principal_cache = PrincipalCache()
+event_bus.add_listener(principal_cache.handle_event)
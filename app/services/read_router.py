@@ -0,0 +1,138 @@
+# app/services/read_router.py
+"""
+Routes read-only dashboard queries to the read replica (DATABASE_REPLICA_URL).
+
+`read_router.session(user_id)` returns a replica session unless
+    - no replica is configured
+    - the replica was unreachable recently (REPLICA_RETRY_SEC): primary fallback
+    - the user wrote recently (REPLICA_PIN_SEC): read-your-writes on the primary
+A user is pinned when
+    - a primary session tagged with their id (see resolve_user_id) commits a flush
+    - a user-scoped write event is published (positions opened/closed, risk
+      settings, signal decisions), which reaches every worker over the event bus
+Shared reads (`session()` with no user: the signal lists) are pinned the same way
+by the global signal events, so a cache entry dropped by a new batch is not
+reloaded from a replica that hasn't replayed the batch yet. This listener is
+registered before response_cache's, so the pin is in place before the drop.
+Writes always go through SessionLocal / get_db.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import ReplicaSessionLocal, SessionLocal
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+# events that mean "this user's rows (or, without a user, the shared signal rows) just changed on the primary"
+WRITE_TOPICS = {events.POSITION_OPENED, events.POSITION_CLOSED, events.ORDER_UPDATED, events.SIGNAL_UPDATED,
+                events.RISK_UPDATED}
+
+
+class ReadRouter:
+    def __init__(self, pin_sec: int = settings.REPLICA_PIN_SEC, retry_sec: int = settings.REPLICA_RETRY_SEC):
+        self.pin_sec = pin_sec
+        self.retry_sec = retry_sec
+        self._pinned = {}            # user_id -> monotonic deadline
+        self._replica_down_until = 0.0
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return ReplicaSessionLocal is not None
+
+    # ------------------------
+    # Read-your-writes pinning
+    # ------------------------
+    def pin(self, user_id: Optional[int]):
+        """Keep `user_id`'s reads (None: the shared reads) on the primary for pin_sec."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pinned[user_id] = time.monotonic() + self.pin_sec
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            deadline = self._pinned.get(user_id)
+            if deadline is not None and deadline <= now:
+                del self._pinned[user_id]
+                deadline = None
+            return deadline is not None
+
+    def handle_event(self, event: dict):
+        if event.get("topic") in WRITE_TOPICS or event.get("topic") == events.SIGNALS_BATCH:
+            self.pin(event.get("user_id"))
+
+    # ------------------------
+    # Session selection
+    # ------------------------
+    def session(self, user_id: Optional[int] = None) -> Session:
+        if self.enabled and time.monotonic() >= self._replica_down_until and not self.is_pinned(user_id):
+            db = ReplicaSessionLocal()
+            try:
+                db.connection()  # check out now: an unreachable replica falls back here, not mid-query
+                self.replica_reads += 1
+                return db
+            except OperationalError as e:
+                db.close()
+                self._replica_down_until = time.monotonic() + self.retry_sec
+                self.fallbacks += 1
+                logger.warning(f"[ReadRouter] replica unreachable, reading from primary for {self.retry_sec}s: {e}")
+        self.primary_reads += 1
+        return SessionLocal()
+
+    @contextmanager
+    def scoped(self, user_id: Optional[int] = None):
+        """`with read_router.scoped(user_id) as db:` for loaders that only sometimes hit the DB."""
+        db = self.session(user_id)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pinned = sum(1 for d in self._pinned.values() if d > time.monotonic())
+        return {
+            "replica": "configured" if self.enabled else "off",
+            "replica_down": time.monotonic() < self._replica_down_until,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "pinned_users": pinned,
+        }
+
+
+read_router = ReadRouter()
+event_bus.add_listener(read_router.handle_event)
+
+
+# a primary session that knows its user (set in resolve_user_id) pins them once it commits a write
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _pin_writer(session):
+    # untagged sessions (monitor, audit sink, jobs) must not pin the shared reads
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        read_router.pin(session.info["user_id"])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_write(session):
+    session.info.pop("wrote", None)
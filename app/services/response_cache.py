@@ -0,0 +1,178 @@
+# app/services/response_cache.py
+"""
+Serialized-response cache with ETag / If-None-Match for read-heavy GET routes.
+
+    return response_cache.respond(request, ["signals"], load, adapter=SIGNAL_LIST)
+
+The key is (path, sorted query params, user). On a hit the stored JSON bytes are
+returned as-is, or a bodyless 304 when the client's If-None-Match carries the
+current ETag, so an unchanged poll costs a dict lookup. On a miss `load()` runs,
+the result is serialized once (through `adapter`, a pydantic TypeAdapter, when
+given) and stored.
+
+Entries are tagged and dropped when a domain event touches the tag (see
+INVALIDATIONS): global tags on any event of the topic, user tags only for the
+event's user. RESPONSE_CACHE_TTL_SEC bounds staleness for data that changes
+without an event.
+
+Only the redis event bus reaches every worker (and the standalone monitor). On
+the memory bus a worker never hears about writes made by another process, so
+entries live at most LOCAL_STATE_TTL_SEC there: responses can be that stale
+after a change made elsewhere, and the ETag still saves the body on unchanged polls.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.services import event_bus as events
+from app.services.event_bus import event_bus
+from app.services.read_router import read_router  # noqa: F401  its listener must run before ours (see read_router)
+
+# topic -> (global tags, tags of the event's user)
+INVALIDATIONS = {
+    events.SIGNALS_BATCH: ({"signals"}, set()),
+    events.SIGNAL_UPDATED: ({"signals"}, set()),
+    events.POSITION_OPENED: (set(), {"orders"}),
+    events.ORDER_UPDATED: (set(), {"orders"}),
+    events.POSITION_CLOSED: (set(), {"pnl", "risk"}),
+    events.RISK_UPDATED: (set(), {"risk"}),
+}
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    def __init__(self, ttl_sec: int = settings.RESPONSE_CACHE_TTL_SEC,
+                 max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (body, etag, expires_at, scoped tags)
+        self._by_tag = {}               # (tag, user_id) -> {keys}
+        self._gen = {}                  # (tag, user_id) -> bumped on every invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    # ------------------------
+    # Serving
+    # ------------------------
+    def respond(self, request: Request, tags: Iterable[str], load: Callable, user_id: Optional[int] = None,
+                adapter=None) -> Response:
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), user_id)
+        scoped = [(tag, user_id) for tag in tags]  # shared routes pass no user: global tags
+        if_none_match = request.headers.get("if-none-match")
+
+        entry = self._get(key)
+        if entry is None:
+            with self._lock:
+                gens = [self._gen.get(t, 0) for t in scoped]
+            data = load()
+            body = (adapter.dump_json(adapter.validate_python(data, from_attributes=True)) if adapter
+                    else json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode())
+            entry = (body, _etag(body), time.monotonic() + self.entry_ttl(), scoped)
+            self._put(key, entry, gens)
+
+        body, etag, _, _ = entry
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}  # browsers revalidate every poll
+        if _matches(if_none_match, etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def entry_ttl(self) -> float:
+        """Event-invalidated entries can live the full TTL only when every process's events arrive."""
+        if event_bus.cross_process:
+            return self.ttl_sec
+        return min(self.ttl_sec, settings.LOCAL_STATE_TTL_SEC)
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def _put(self, key, entry, gens):
+        with self._lock:
+            # invalidated while loading: the result may predate the change, don't keep it
+            if [self._gen.get(t, 0) for t in entry[3]] != gens:
+                return
+            self._drop(key)
+            self._entries[key] = entry
+            for t in entry[3]:
+                self._by_tag.setdefault(t, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        """Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for t in entry[3]:
+            keys = self._by_tag.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[t]
+
+    # ------------------------
+    # Invalidation (event bus listener)
+    # ------------------------
+    def invalidate(self, tag: str, user_id: Optional[int] = None):
+        with self._lock:
+            scoped = (tag, user_id)
+            self._gen[scoped] = self._gen.get(scoped, 0) + 1
+            for key in list(self._by_tag.get(scoped, ())):
+                self._drop(key)
+            self.invalidations += 1
+
+    def handle_event(self, event: dict):
+        global_tags, user_tags = INVALIDATIONS.get(event.get("topic"), ((), ()))
+        for tag in global_tags:
+            self.invalidate(tag)
+        if event.get("user_id") is not None:
+            for tag in user_tags:
+                self.invalidate(tag, event["user_id"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_sec": self.entry_ttl(),
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
+event_bus.add_listener(response_cache.handle_event)
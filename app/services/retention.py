@@ -0,0 +1,182 @@
+# app/services/retention.py
+"""
+Retention / archival for the month-partitioned history tables.
+
+For each table in RETENTION, every monthly partition entirely older than the
+retention window is:
+    1. detached from the parent (queries stop seeing it immediately)
+    2. copied out with COPY ... TO STDOUT (CSV + header) into
+       ARCHIVE_DIR/<table>/<partition>.csv.gz (written to .tmp, fsynced, renamed)
+    3. dropped
+A partition that was detached but not archived (crash between steps) is picked up
+on the next run. It also creates the next few months' partitions so live writers
+never wait on DDL.
+
+Pre-creation also runs in every API process: once at startup and then every
+PARTITION_MAINTENANCE_SEC (start_partition_maintenance). Inserts never create
+partitions themselves; a month without one fails fast instead of blocking.
+
+    python -m app.services.retention            # archive + pre-create (run from cron)
+    python -m app.services.retention --dry-run  # list what would be archived
+"""
+import argparse
+import gzip
+import logging
+import os
+import re
+import threading
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.services.partitions import (
+    ensure_monthly_partitions, forget_partition, iter_months, list_partitions, month_start, next_month,
+    partition_name,
+)
+
+logger = logging.getLogger(__name__)
+
+# table -> months kept online (the current month counts as one)
+RETENTION = {
+    "signals": settings.SIGNALS_RETENTION_MONTHS,
+    "audit_logs": settings.AUDIT_RETENTION_MONTHS,
+}
+MONTHS_AHEAD = 3
+DDL_LOCK_TIMEOUT = "5s"  # don't queue reads behind a CREATE waiting on a long transaction
+_PARTITION_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def _partition_month(name: str):
+    m = _PARTITION_RE.search(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def _cutoff(today: date, keep_months: int) -> date:
+    """First month that is still kept."""
+    month = month_start(today)
+    for _ in range(max(keep_months, 1) - 1):
+        month = date(month.year - 1, 12, 1) if month.month == 1 else date(month.year, month.month - 1, 1)
+    return month
+
+
+def _detached_leftovers(conn, table: str) -> list:
+    """`<table>_yYYYYmMM` tables that exist but are no longer attached (interrupted archive)."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname LIKE :pattern AND NOT c.relispartition"
+    ), {"pattern": f"{table}_y%m%"}).all()
+    return [r[0] for r in rows if _partition_month(r[0])]
+
+
+def expired_partitions(conn, table: str, keep_months: int, today: date = None) -> list:
+    cutoff = _cutoff(today or date.today(), keep_months)
+    names = list_partitions(conn, table) + _detached_leftovers(conn, table)
+    return sorted({n for n in names if (_partition_month(n) or cutoff) < cutoff})
+
+
+def archive_partition(table: str, name: str, archive_dir: str = None) -> str:
+    """Detach (if still attached), export to gzip CSV, drop. Returns the archive path."""
+    archive_dir = os.path.join(archive_dir or settings.ARCHIVE_DIR, table)
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp = path + ".tmp"
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("SELECT relispartition FROM pg_class WHERE relname = %s", (name,))
+        row = cur.fetchone()
+        if row and row[0]:
+            cur.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+            raw.commit()
+
+        with gzip.open(tmp, "wb") as f:
+            cur.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        cur.execute(f"DROP TABLE {name}")
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    forget_partition(table, _partition_month(name))
+    logger.info(f"[Retention] archived {name} -> {path}")
+    return path
+
+
+def ensure_upcoming_partitions(today: date = None) -> dict:
+    """Create this month's and the next MONTHS_AHEAD months' partitions that are missing."""
+    today = today or date.today()
+    ahead = today
+    for _ in range(MONTHS_AHEAD):
+        ahead = next_month(ahead)
+    created = {}
+    for table in RETENTION:
+        with engine.begin() as conn:
+            existing = set(list_partitions(conn, table))
+            missing = [m for m in iter_months(today, ahead) if partition_name(table, m) not in existing]
+            if missing:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+                for month in missing:
+                    ensure_monthly_partitions(conn, table, month, month)
+        created[table] = [partition_name(table, m) for m in missing]
+        if missing:
+            logger.info(f"[Retention] created partitions {created[table]}")
+    return created
+
+
+_maintenance_stop = threading.Event()
+
+
+def _maintain():
+    while True:
+        try:
+            ensure_upcoming_partitions()
+        except Exception as e:
+            logger.warning(f"[Retention] partition pre-creation failed, retrying later: {e}")
+        if _maintenance_stop.wait(settings.PARTITION_MAINTENANCE_SEC):
+            break
+
+
+def start_partition_maintenance():
+    """Pre-create upcoming partitions now and every PARTITION_MAINTENANCE_SEC (background thread)."""
+    _maintenance_stop.clear()
+    threading.Thread(target=_maintain, name="partition-maintenance", daemon=True).start()
+
+
+def stop_partition_maintenance():
+    _maintenance_stop.set()
+
+
+def run_retention(today: date = None, dry_run: bool = False) -> dict:
+    """Archive expired partitions of every table in RETENTION; pre-create upcoming ones."""
+    today = today or date.today()
+    report = {}
+    for table, keep in RETENTION.items():
+        with engine.connect() as conn:
+            expired = expired_partitions(conn, table, keep, today)
+        archived = []
+        if not dry_run:
+            for name in expired:
+                archived.append(archive_partition(table, name))
+        report[table] = {"keep_months": keep, "expired": expired, "archived": archived}
+    if not dry_run:
+        ensure_upcoming_partitions(today)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    parser = argparse.ArgumentParser(description="Archive old signals / audit_logs partitions")
+    parser.add_argument("--dry-run", action="store_true", help="only list the partitions that would be archived")
+    args = parser.parse_args()
+    for table, r in run_retention(dry_run=args.dry_run).items():
+        print(f"📦 {table}: keep {r['keep_months']} months | expired: {r['expired'] or '-'}"
+              + ("" if args.dry_run else f" | archived: {len(r['archived'])}"))
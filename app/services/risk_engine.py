@@ -1,22 +1,257 @@
+# app/services/risk_engine.py
+"""
+In-memory pre-trade risk checks.
+
+Per user it keeps:
+    - the risk settings row (cached; dropped on `risk.updated`, published by
+      /risk/setup and /risk/update)
+    - an open-position ledger: gross exposure (entry * qty), exposure per symbol and
+      open risk (loss if every stop is hit), fed by positions.opened / positions.closed
+and reads today's realized PnL from pnl_tracker. After the first check of a user
+(one hydration query) every check is a few dict lookups, no DB round trip. Events
+that arrive during hydration are replayed onto the new ledger; opens and closes are
+applied at most once per position id.
+
+Cached state is only trusted indefinitely when the event bus crosses processes
+(redis). On the memory bus, closes by a standalone monitor and settings changed on
+another worker never arrive here, so limits and ledgers are re-read from the DB
+once they are LOCAL_STATE_TTL_SEC old.
+
+Checks, in order:
+    RISK_PER_TRADE_EXCEEDED         this trade's stop loss > capital * risk_per_trade_pct
+    DAILY_LOSS_LIMIT_EXCEEDED       realized - open risk - this trade's risk <= -capital * max_daily_loss_pct
+    EXPOSURE_LIMIT_EXCEEDED         gross exposure after the trade > capital * RISK_MAX_EXPOSURE_PCT
+    SYMBOL_CONCENTRATION_EXCEEDED   symbol exposure after the trade > capital * RISK_MAX_SYMBOL_PCT
+"""
+import threading
+import time
+from datetime import datetime
+
 from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import settings as app_settings
+from app.models.position import Position
 from app.models.risk_settings import RiskSettings
-from app.models.daily_pnl import DailyPnl
-from datetime import date
+from app.services import event_bus as events
+from app.services.broker import clean_symbol
+from app.services.event_bus import event_bus
+from app.services.pnl_tracker import CLOSE_DEDUPE_WINDOW, pnl_tracker
+
+# same fallbacks as GET /risk and the RiskSettings column defaults
+DEFAULT_LIMITS = {"capital": 100000.0, "risk_per_trade_pct": 0.01, "max_daily_loss_pct": 0.02}
+
+
+class _Limits:
+    __slots__ = ("capital", "risk_per_trade_pct", "max_daily_loss_pct", "loaded_at")
+
+    def __init__(self, capital, risk_per_trade_pct, max_daily_loss_pct):
+        self.capital = float(capital)
+        self.risk_per_trade_pct = float(risk_per_trade_pct)
+        self.max_daily_loss_pct = float(max_daily_loss_pct)
+        self.loaded_at = time.monotonic()
+
+
+class _Ledger:
+    def __init__(self):
+        self.exposure = 0.0
+        self.open_risk = 0.0
+        self.by_symbol = {}   # symbol -> exposure
+        self.positions = {}   # position_id -> (symbol, exposure, risk)
+        self.closed_ids = set()  # a late or repeated open for these must not come back
+        self.loaded_at = time.monotonic()
+
+    def add(self, position_id, symbol, qty, entry, sl):
+        if position_id in self.positions or position_id in self.closed_ids:
+            return
+        symbol = clean_symbol(symbol)
+        exposure = abs(entry * qty)
+        risk = abs(entry - sl) * qty if sl else 0.0
+        self.positions[position_id] = (symbol, exposure, risk)
+        self.exposure += exposure
+        self.open_risk += risk
+        self.by_symbol[symbol] = self.by_symbol.get(symbol, 0.0) + exposure
+
+    def remove(self, position_id):
+        self.closed_ids.add(position_id)
+        entry = self.positions.pop(position_id, None)
+        if entry is None:
+            return
+        symbol, exposure, risk = entry
+        self.exposure -= exposure
+        self.open_risk -= risk
+        left = self.by_symbol.get(symbol, 0.0) - exposure
+        if left <= 1e-9:
+            self.by_symbol.pop(symbol, None)
+        else:
+            self.by_symbol[symbol] = left
+
+
+def _fresh(state) -> bool:
+    """Cached limits / ledger still usable: kept current by events, or younger than the TTL."""
+    return state is not None and (
+        event_bus.cross_process or time.monotonic() - state.loaded_at < app_settings.LOCAL_STATE_TTL_SEC
+    )
+
+
+def _reject(code: str, message: str):
+    raise HTTPException(status_code=400, detail={"code": code, "message": message})
+
 
 class RiskEngine:
-    def check_trade(self, db, user_id: int, signal: dict):
-        settings = db.query(RiskSettings).filter(RiskSettings.user_id == user_id).first()
-        if not settings:
-            raise HTTPException(status_code=400, detail={"code": "NO_RISK_SETTINGS", "message": "Risk settings not found"})
+    def __init__(self):
+        self._limits = {}
+        self._ledgers = {}
+        self._hydrating = {}  # user_id -> [hydrations in flight, events seen meanwhile]
+        self._lock = threading.RLock()
+
+    # ------------------------
+    # Hydration
+    # ------------------------
+    def limits(self, db: Session, user_id: int) -> _Limits:
+        limits = self._limits.get(user_id)
+        if _fresh(limits):
+            return limits
+        row = db.query(RiskSettings).filter(RiskSettings.user_id == user_id).first()
+        limits = _Limits(
+            row.capital if row and row.capital is not None else DEFAULT_LIMITS["capital"],
+            row.risk_per_trade_pct if row and row.risk_per_trade_pct is not None else DEFAULT_LIMITS["risk_per_trade_pct"],
+            row.max_daily_loss_pct if row and row.max_daily_loss_pct is not None else DEFAULT_LIMITS["max_daily_loss_pct"],
+        )
+        with self._lock:
+            existing = self._limits.get(user_id)
+            if _fresh(existing):
+                return existing
+            self._limits[user_id] = limits
+            return limits
 
-        proposed_loss = abs(signal["entry"] - signal["sl"]) * signal["qty"]
-        max_loss = settings.capital * settings.risk_per_trade_pct
+    def _ledger(self, db: Session, user_id: int) -> _Ledger:
+        with self._lock:
+            ledger = self._ledgers.get(user_id)
+            if _fresh(ledger):
+                return ledger
+            pending = self._hydrating.setdefault(user_id, [0, []])
+            pending[0] += 1
+
+        try:
+            ledger = self._load(db, user_id)
+        finally:
+            with self._lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    self._hydrating.pop(user_id, None)
+
+        with self._lock:
+            existing = self._ledgers.get(user_id)
+            if _fresh(existing):
+                return existing  # another request hydrated first (and replayed the buffer)
+            for topic, data in pending[1]:
+                self._apply(ledger, topic, data)
+            pending[1].clear()
+            self._ledgers[user_id] = ledger
+            return ledger
+
+    def _load(self, db: Session, user_id: int) -> _Ledger:
+        ledger = _Ledger()
+        # open and recently closed in one statement, so a replayed open can't revive a closed position
+        rows = db.query(Position).filter(
+            Position.user_id == user_id,
+            or_(Position.status == "OPEN", Position.closed_at >= datetime.utcnow() - CLOSE_DEDUPE_WINDOW),
+        )
+        for pos in rows:
+            if pos.closed_at is None:
+                ledger.add(pos.id, pos.symbol, float(pos.qty), float(pos.avg_price), float(pos.sl or 0))
+            else:
+                ledger.closed_ids.add(pos.id)
+        return ledger
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._limits.pop(user_id, None)
+
+    # ------------------------
+    # Updates (event bus listener)
+    # ------------------------
+    def handle_event(self, event: dict):
+        topic = event.get("topic")
+        user_id = event.get("user_id")
+        data = event.get("data") or {}
+        if user_id is None:
+            return
+
+        if topic == events.RISK_UPDATED:
+            self.invalidate(user_id)
+            return
+
+        with self._lock:
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                pending = self._hydrating.get(user_id)
+                if pending is not None:
+                    pending[1].append((topic, data))  # replayed once the DB read lands
+                return  # otherwise the first read's DB query will include this change
+            self._apply(ledger, topic, data)
+
+    def _apply(self, ledger: _Ledger, topic: str, data: dict):
+        """Caller holds the lock."""
+        if topic == events.POSITION_OPENED:
+            ledger.add(data["position_id"], data["symbol"], float(data["qty"]),
+                       float(data["avg_price"]), float(data.get("sl") or 0))
+        elif topic == events.POSITION_CLOSED:
+            ledger.remove(data["position_id"])
+
+    # ------------------------
+    # Checks
+    # ------------------------
+    def check_trade(self, db: Session, user_id: int, signal: dict):
+        """signal: {symbol, entry, sl, qty}. Raises HTTPException(400) with a code on the first breach."""
+        limits = self.limits(db, user_id)
+        ledger = self._ledger(db, user_id)
+        realized = pnl_tracker.snapshot(db, user_id)["realized"]
+
+        entry, qty = float(signal["entry"]), float(signal["qty"])
+        symbol = clean_symbol(signal["symbol"])
+        proposed_loss = abs(entry - float(signal["sl"])) * qty
+        notional = abs(entry * qty)
+
+        max_loss = limits.capital * limits.risk_per_trade_pct
         if proposed_loss > max_loss:
-            raise HTTPException(status_code=400, detail={"code": "RISK_PER_TRADE_EXCEEDED", "message": f"Proposed loss {proposed_loss} > limit {max_loss}"})
-
-        daily_pnl = db.query(DailyPnl).filter(DailyPnl.user_id == user_id, DailyPnl.date == date.today()).first()
-        today_loss = daily_pnl.realized if daily_pnl else 0
-        max_daily_loss = settings.capital * settings.max_daily_loss_pct
-        if today_loss <= -max_daily_loss:
-            raise HTTPException(status_code=400, detail={"code": "DAILY_LOSS_LIMIT_EXCEEDED", "message": "Daily loss limit reached"})
-        return True
\ No newline at end of file
+            _reject("RISK_PER_TRADE_EXCEEDED", f"Proposed loss {proposed_loss} > limit {max_loss}")
+
+        with self._lock:
+            exposure, open_risk = ledger.exposure, ledger.open_risk
+            symbol_exposure = ledger.by_symbol.get(symbol, 0.0)
+
+        max_daily_loss = limits.capital * limits.max_daily_loss_pct
+        if realized <= -max_daily_loss:
+            _reject("DAILY_LOSS_LIMIT_EXCEEDED", "Daily loss limit reached")
+        worst_case = realized - open_risk - proposed_loss
+        if worst_case <= -max_daily_loss:
+            _reject("DAILY_LOSS_LIMIT_EXCEEDED",
+                    f"Worst case {worst_case:.2f} (realized - open risk - this trade) breaches -{max_daily_loss}")
+
+        max_exposure = limits.capital * app_settings.RISK_MAX_EXPOSURE_PCT
+        if exposure + notional > max_exposure:
+            _reject("EXPOSURE_LIMIT_EXCEEDED",
+                    f"Exposure {exposure + notional:.2f} would exceed {max_exposure:.2f}")
+
+        max_symbol = limits.capital * app_settings.RISK_MAX_SYMBOL_PCT
+        if symbol_exposure + notional > max_symbol:
+            _reject("SYMBOL_CONCENTRATION_EXCEEDED",
+                    f"{symbol} exposure {symbol_exposure + notional:.2f} would exceed {max_symbol:.2f}")
+        return True
+
+    def snapshot(self, db: Session, user_id: int) -> dict:
+        ledger = self._ledger(db, user_id)
+        with self._lock:
+            return {
+                "exposure": ledger.exposure,
+                "open_risk": ledger.open_risk,
+                "by_symbol": dict(ledger.by_symbol),
+                "open_positions": len(ledger.positions),
+            }
+
+
+risk_engine = RiskEngine()
+event_bus.add_listener(risk_engine.handle_event)
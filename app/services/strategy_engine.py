@@ -29,9 +29,10 @@ def generate_signal_from_ohlcv(
         Signal | None
     """
     # Fetch OHLCV rows
+    # Served by the (symbol, timeframe, ts) primary key, newest partitions first
     rows = (
-        db.query(OHLCV)
-        .filter_by(symbol=symbol, timeframe=timeframe)
+        db.query(OHLCV.ts, OHLCV.open, OHLCV.high, OHLCV.low, OHLCV.close, OHLCV.volume)
+        .filter(OHLCV.symbol == symbol, OHLCV.timeframe == timeframe)
         .order_by(OHLCV.ts.desc())
         .limit(lookback)
         .all()
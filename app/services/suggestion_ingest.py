@@ -7,8 +7,7 @@ from typing import Union, TextIO
 from sqlalchemy.orm import Session
 
 from app.models.singal_bd import Signal, SignalStatus
-from app.models.audit_log import AuditLog
-from app.utils.helpers import safe_json_dumps
+from app.services.audit_sink import audit_sink
 
 
 # ---------------- HELPER FUNCTIONS ----------------
@@ -133,7 +132,8 @@ def ingest_suggestions(db: Session, file_or_path: Union[str, TextIO]) -> dict:
                         qty=qty,
                         ttl_sec=ttl_sec,
                         status=SignalStatus.PENDING,
-                        created_at=signal_time or datetime.utcnow(),
+                        created_at=datetime.utcnow(),  # partition key: never outside the pre-created months
+                        ts=signal_time or datetime.utcnow(),
                         expires_at=expires_at or (datetime.utcnow() + timedelta(seconds=ttl_sec)),
                         payload_hash=_row_hash(row),
                         external_id=external_id,
@@ -164,18 +164,9 @@ def ingest_suggestions(db: Session, file_or_path: Union[str, TextIO]) -> dict:
         raise
 
     # --- AUDIT LOG ---
-    try:
-        payload = {"inserted": inserted, "updated": updated, "error_count": len(errors)}
-        db.add(AuditLog(
-            who="system",
-            what="SIGNAL_BATCH_INGEST",
-            payload_json=safe_json_dumps(payload)
-        ))
-        db.commit()
-        print("🧾 Audit log created.")
-    except Exception as e:
-        db.rollback()
-        print("⚠️ Audit log commit failed:", e)
+    audit_sink.record("system", "SIGNAL_BATCH_INGEST", {
+        "inserted": inserted, "updated": updated, "error_count": len(errors)
+    })
 
     return {
         "status": "success" if not errors else "partial_success",
@@ -0,0 +1,94 @@
+"""
+Flush overhead: the old before_flush Decimal->float hook vs FloatNumeric columns.
+
+Inserts N orders + positions, then updates their prices, and times session.flush()
+with and without the legacy hook re-attached. Runs on an in-memory SQLite DB by
+default (only the ORM side is measured); pass --url to use Postgres.
+
+    python bench_flush.py --rows 20000
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.order import Order
+from app.models.position import Position
+
+
+def legacy_convert_decimal_before_flush(session, flush_context, instances):
+    """The hook app/database.py used to install on every session."""
+    for instance in session.new.union(session.dirty):
+        for attr in instance.__dict__:
+            value = getattr(instance, attr)
+            if isinstance(value, Decimal):
+                setattr(instance, attr, float(value))
+
+
+_hook_seconds = [0.0]
+
+
+def timed_legacy_hook(session, flush_context, instances):
+    t0 = time.perf_counter()
+    legacy_convert_decimal_before_flush(session, flush_context, instances)
+    _hook_seconds[0] += time.perf_counter() - t0
+
+
+def run(url: str, rows: int, legacy: bool) -> dict:
+    engine = create_engine(url, future=True)
+    tables = [Order.__table__, Position.__table__]
+    Base.metadata.drop_all(engine, tables=tables)
+    Base.metadata.create_all(engine, tables=tables)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    if legacy:
+        event.listen(Session, "before_flush", timed_legacy_hook)
+
+    _hook_seconds[0] = 0.0
+    timings = {}
+    with Session() as db:
+        objs = []
+        for i in range(rows):
+            price = Decimal("100.5") + i
+            objs.append(Order(user_id=1, side="BUY", qty=Decimal("0.01"), price=price, sl=price - 1, tp=price + 2))
+            objs.append(Position(user_id=1, symbol="BTCUSDT", side="BUY", qty=Decimal("0.01"),
+                                 avg_price=price, sl=price - 1, tp=price + 2, status="OPEN"))
+        db.add_all(objs)
+        t0 = time.perf_counter()
+        db.flush()
+        timings["insert_flush"] = time.perf_counter() - t0
+
+        for obj in objs:
+            if isinstance(obj, Position):
+                obj.exit_price = obj.tp
+        t0 = time.perf_counter()
+        db.flush()
+        timings["update_flush"] = time.perf_counter() - t0
+        timings["in_hook"] = _hook_seconds[0]
+        db.rollback()
+
+    engine.dispose()
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark flush cost of the legacy Decimal hook")
+    parser.add_argument("--rows", type=int, default=20000, help="orders and positions each")
+    parser.add_argument("--url", default="sqlite://", help="database URL (default: in-memory SQLite)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"⏱  {args.rows} orders + {args.rows} positions, best of {args.repeat}")
+    results = {}
+    for label, legacy in (("before_flush hook", True), ("FloatNumeric", False)):
+        runs = [run(args.url, args.rows, legacy) for _ in range(args.repeat)]
+        results[label] = {k: min(r[k] for r in runs) for k in runs[0]}
+
+    for label, r in results.items():
+        print(f"  {label:<18} insert flush {r['insert_flush'] * 1000:8.1f} ms | "
+              f"update flush {r['update_flush'] * 1000:8.1f} ms")
+    hook = results["before_flush hook"]
+    print(f"  time spent inside the hook: {hook['in_hook'] * 1000:.1f} ms "
+          f"({hook['in_hook'] / (2 * args.rows) * 1e6:.2f} us per object per flush pair); FloatNumeric: 0")
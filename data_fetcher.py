@@ -1,7 +1,7 @@
 import ccxt
 import asyncio
 from app.database import SessionLocal
-from app.models.ohlcv import OHLCV
+from app.services.ohlcv_store import upsert_candles
 from datetime import datetime
 
 exchange = ccxt.binance({
@@ -14,18 +14,19 @@ exchange = ccxt.binance({
 async def fetch_and_store(symbol="BTC/USDT", timeframe="5m", limit=100):
     ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
     with SessionLocal() as db:
-        for candle in ohlcv:
-            db_ohlcv = OHLCV(
-                symbol=symbol,
-                timeframe=timeframe,
-                ts=datetime.fromtimestamp(candle[0] / 1000),
-                open=candle[1],
-                high=candle[2],
-                low=candle[3],
-                close=candle[4],
-                volume=candle[5]
-            )
-            db.add(db_ohlcv)
+        candles = [
+            {
+                "ts": datetime.utcfromtimestamp(candle[0] / 1000),
+                "open": candle[1],
+                "high": candle[2],
+                "low": candle[3],
+                "close": candle[4],
+                "volume": candle[5],
+            }
+            for candle in ohlcv
+        ]
+        # upsert: the latest candle is re-fetched every run while it is still forming
+        upsert_candles(db, symbol.replace("/", ""), timeframe, candles)
         db.commit()
     print(f"Fetched and stored {len(ohlcv)} candles for {symbol}")
 
@@ -20,5 +20,20 @@ module.exports = {
       merge_logs: true,
       time: true,
     },
+    {
+      name: "strategy-worker",
+      script: "worker.py",
+      interpreter: "python",
+      cwd: "./strategy",
+      instances: 1,                     // more instances only stand by (leader lock)
+      autorestart: true,
+      watch: false,
+      max_memory_restart: "512M",
+      log_date_format: "YYYY-MM-DD HH:mm:ss",
+      error_file: "./logs/pm2-worker-error.log",
+      out_file: "./logs/pm2-worker-out.log",
+      merge_logs: true,
+      time: true,
+    },
   ],
 };
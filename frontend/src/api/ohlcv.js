@@ -0,0 +1,12 @@
+// src/api/ohlcv.js
+import api from "./fetcher";
+
+/**
+ * Chart-ready candles, aggregated on the server.
+ * params: { start?, end?, bucket?: "1h" | "4h" | "1d", points?: number }
+ * Returns columnar arrays: { ts: [...ms], open: [...], high, low, close, volume, bucket_sec }
+ */
+export const getCandles = async (symbol, timeframe, params = {}) => {
+  const res = await api.get(`/ohlcv/${symbol.replace("/", "")}/${timeframe}`, { params });
+  return res.data;
+};
@@ -0,0 +1,31 @@
+// src/api/stream.js
+/**
+ * Server-push stream of dashboard changes (replaces setInterval polling).
+ * Topics: signals.batch, signals.updated, positions.opened, positions.closed, orders.updated, pnl.tick
+ *
+ * Usage:
+ *   const unsubscribe = subscribeEvents({ "pnl.tick": (data) => ... });
+ *   return unsubscribe; // in useEffect cleanup
+ */
+const BASE_URL = process.env.REACT_APP_API_URL || "http://localhost:8000";
+
+export const subscribeEvents = (handlers = {}) => {
+  const token = localStorage.getItem("token");
+  if (!token || typeof EventSource === "undefined") return () => {};
+
+  // EventSource reconnects on its own (server sends retry: 5000)
+  const source = new EventSource(`${BASE_URL}/stream?token=${encodeURIComponent(token)}`);
+
+  Object.entries(handlers).forEach(([topic, handler]) => {
+    source.addEventListener(topic, (e) => {
+      try {
+        const event = JSON.parse(e.data);
+        handler(event.data, event);
+      } catch (err) {
+        console.error(`Bad ${topic} event`, err);
+      }
+    });
+  });
+
+  return () => source.close();
+};
@@ -1,10 +1,11 @@
 // src/pages/Dashboard.js
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { getPendingSignals, getActiveSignals } from "../api/signals";
 import { getPositions } from "../api/positions";
 import { getTodayPnL } from "../api/pnl";
 import { getOrders } from "../api/orders";
 import axios from "../api/fetcher";
+import { subscribeEvents } from "../api/stream";
 import Spinner from "../components/Spinner";
 import { useToast } from "../context/ToastContext";
 
@@ -90,11 +91,52 @@ export default function Dashboard() {
     }
   };
 
+  // Refresh only what changed when a position opens/closes
+  const marksRef = useRef({}); // position_id -> latest unrealized from pnl.tick
+
+  const refreshPositions = async () => {
+    const [positionsData, orders, pnl] = await Promise.all([
+      getPositions().catch(() => []),
+      getOrders().catch(() => []),
+      getTodayPnL().catch(() => null),
+    ]);
+    setPositionsCount(Array.isArray(positionsData) ? positionsData.length : 0);
+    setPositions(positionsData);
+    setRecentOrders(Array.isArray(orders) ? orders.slice(0, 6) : []);
+    setTodayPnl(pnl || null);
+  };
+
   useEffect(() => {
     fetchAll();
     fetchUser(); // 🟢 fetch username once
-    const id = setInterval(fetchAll, 100000);
-    return () => clearInterval(id);
+
+    // 🔔 server push instead of polling
+    return subscribeEvents({
+      "signals.batch": (data) => {
+        setActiveCount(data.signals.length);
+        getPendingSignals()
+          .then((pending) => setPendingCount(Array.isArray(pending) ? pending.length : 0))
+          .catch(() => {});
+      },
+      "signals.updated": () => {
+        getPendingSignals()
+          .then((pending) => setPendingCount(Array.isArray(pending) ? pending.length : 0))
+          .catch(() => {});
+      },
+      "positions.opened": refreshPositions,
+      "positions.closed": (data) => {
+        delete marksRef.current[data?.position_id];
+        refreshPositions();
+      },
+      // each monitor shard only marks its own symbols: merge per position, then total
+      "pnl.tick": (data) => {
+        Object.entries(data.positions || {}).forEach(([id, mark]) => {
+          marksRef.current[id] = mark.unrealized;
+        });
+        const unrealized = Object.values(marksRef.current).reduce((sum, u) => sum + u, 0);
+        setTodayPnl((prev) => ({ ...(prev || {}), unrealized: Math.round(unrealized * 100) / 100 }));
+      },
+    });
   }, []);
 
   if (loading)
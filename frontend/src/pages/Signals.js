@@ -9,17 +9,16 @@ import {
   getSignal,
 } from "../api/signals";
 import SignalDetailModal from "../components/SignalDetailModal";
+import { subscribeEvents } from "../api/stream";
 
 /**
  * Signals page:
  * - shows table of signals
  * - supports filter: pending / active / all
- * - polls for pending signals every 5s
+ * - live updates pushed from /stream (new batches, approve/reject)
  * - optimistic UI on approve/reject
  */
 
-const POLL_INTERVAL_MS = 150000;
-
 const formatDate = (iso) => {
   if (!iso) return "";
   const d = new Date(iso);
@@ -55,14 +54,22 @@ const Signals = () => {
     // initial fetch
     fetchSignals();
 
-    // polling (only for pending by default to reduce load)
-    const interval = setInterval(() => {
-      // For 'pending' filter continue polling; if user switched to 'all' maybe still poll
-      fetchSignals();
-    }, POLL_INTERVAL_MS);
-
-    return () => clearInterval(interval);
-  }, [fetchSignals]);
+    // server push: a new Stage-4 batch replaces the active list,
+    // approve/reject updates a single row in place
+    return subscribeEvents({
+      "signals.batch": (data) => {
+        if (filter === "active") setSignals(data.signals);
+        else fetchSignals();
+      },
+      "signals.updated": (updated) => {
+        setSignals((prev) =>
+          filter === "pending" && updated.status !== "pending"
+            ? prev.filter((s) => s.id !== updated.id)
+            : prev.map((s) => (s.id === updated.id ? { ...s, ...updated } : s))
+        );
+      },
+    });
+  }, [fetchSignals, filter]);
 
   const openDetail = async (sig) => {
     // Optionally fetch single signal detail
@@ -1,4 +1,15 @@
+const BASE_URL = process.env.REACT_APP_API_URL || "http://localhost:8000";
+
 export const logout = () => {
+  const token = localStorage.getItem("token");
+  if (token) {
+    // revoke server-side too (fire-and-forget; an expired token just gets a 401)
+    fetch(`${BASE_URL}/auth/logout`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+      keepalive: true,
+    }).catch(() => {});
+  }
   localStorage.removeItem("token");
   window.location.href = "/"; // redirect to login
 };
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine, Base
 from app.models import OHLCV   # ✅ force import model
+from app.services.ohlcv_store import upsert_candles
 
 # Force table creation here
 print("🔄 Creating tables if not exist...")
@@ -34,25 +35,13 @@ def load_csv_to_db(file_path, symbol="ETHUSDT", timeframe="1h"):
 
     db: Session = SessionLocal()
     try:
-        records = []
-        for _, row in df.iterrows():
-            if row["ts"] is None:
-                continue
-            ohlcv = OHLCV(
-                symbol=symbol,
-                timeframe=timeframe,
-                ts=row["ts"],
-                open=row["open"],
-                high=row["high"],
-                low=row["low"],
-                close=row["close"],
-                volume=row["volume"]
-            )
-            records.append(ohlcv)
+        df = df[df["ts"].notna()]
+        records = df[["ts", "open", "high", "low", "close", "volume"]].to_dict("records")
 
-        db.bulk_save_objects(records)
+        # creates missing monthly partitions, updates candles that already exist
+        inserted = upsert_candles(db, symbol, timeframe, records)
         db.commit()
-        print(f"✅ Inserted {len(records)} OHLCV rows into DB for {symbol} ({timeframe})")
+        print(f"✅ Upserted {inserted} OHLCV rows into DB for {symbol} ({timeframe})")
 
     except Exception as e:
         db.rollback()
@@ -10,7 +10,7 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app.config import settings
 from app.database import Base
-from app.models import user, order, position, daily_pnl, risk_settings, strategy, approval, execution, audit_log, singal_bd
+from app.models import user, order, position, daily_pnl, risk_settings, strategy, approval, execution, audit_log, singal_bd, monitor_lease, pnl_rollup, revoked_token
 
 # Alembic Config object, which provides access to values within alembic.ini
 config = context.config
@@ -0,0 +1,91 @@
+"""Partitioned OHLCV with composite primary key"""
+
+revision = 'a1c3e5f7b901'
+down_revision = '7136b49f9643'
+branch_labels = None
+depends_on = None
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _next_month(d):
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def _create_month_partitions(conn, first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        upper = _next_month(month)
+        conn.execute(sa.text(
+            f"CREATE TABLE IF NOT EXISTS ohlcv_y{month.year:04d}m{month.month:02d} PARTITION OF ohlcv "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
+
+
+def upgrade():
+    conn = op.get_bind()
+    had_legacy = sa.inspect(conn).has_table('ohlcv')
+    if had_legacy:
+        op.rename_table('ohlcv', 'ohlcv_legacy')
+
+    op.execute("""
+        CREATE TABLE ohlcv (
+            symbol VARCHAR(20) NOT NULL,
+            timeframe VARCHAR(8) NOT NULL,
+            ts TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            open DOUBLE PRECISION NOT NULL,
+            high DOUBLE PRECISION NOT NULL,
+            low DOUBLE PRECISION NOT NULL,
+            close DOUBLE PRECISION NOT NULL,
+            volume DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (symbol, timeframe, ts)
+        ) PARTITION BY RANGE (ts)
+    """)
+
+    today = date.today()
+    first, last = today, today
+    if had_legacy:
+        lo, hi = conn.execute(sa.text("SELECT min(ts), max(ts) FROM ohlcv_legacy")).one()
+        if lo is not None:
+            first, last = min(lo.date(), today), hi.date()
+    # keep a few months ahead so live writers never miss a partition
+    ahead = today
+    for _ in range(3):
+        ahead = _next_month(ahead)
+    _create_month_partitions(conn, first, max(last, ahead))
+
+    if had_legacy:
+        op.execute("""
+            INSERT INTO ohlcv (symbol, timeframe, ts, open, high, low, close, volume)
+            SELECT DISTINCT ON (symbol, timeframe, ts)
+                   symbol, timeframe, ts, open, high, low, close, volume
+            FROM ohlcv_legacy
+            ORDER BY symbol, timeframe, ts, id DESC
+        """)
+        op.drop_table('ohlcv_legacy')
+
+
+def downgrade():
+    op.rename_table('ohlcv', 'ohlcv_partitioned')
+    op.create_table('ohlcv',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('timeframe', sa.String(), nullable=False),
+    sa.Column('ts', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Numeric(), nullable=False),
+    sa.Column('high', sa.Numeric(), nullable=False),
+    sa.Column('low', sa.Numeric(), nullable=False),
+    sa.Column('close', sa.Numeric(), nullable=False),
+    sa.Column('volume', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ohlcv_id'), 'ohlcv', ['id'], unique=False)
+    op.execute("""
+        INSERT INTO ohlcv (symbol, timeframe, ts, open, high, low, close, volume)
+        SELECT symbol, timeframe, ts, open, high, low, close, volume FROM ohlcv_partitioned
+    """)
+    op.execute("DROP TABLE ohlcv_partitioned CASCADE")
@@ -0,0 +1,26 @@
+"""Monitor leases for sharding the position monitor across workers"""
+
+revision = 'b4d2f6a8c013'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table('monitor_leases',
+    sa.Column('worker_id', sa.String(), nullable=False),
+    sa.Column('hostname', sa.String(), nullable=True),
+    sa.Column('pid', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('worker_id')
+    )
+    op.create_index(op.f('ix_monitor_leases_heartbeat_at'), 'monitor_leases', ['heartbeat_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_monitor_leases_heartbeat_at'), table_name='monitor_leases')
+    op.drop_table('monitor_leases')
@@ -0,0 +1,137 @@
+"""Partition signals (created_at) and audit_logs (ts) by month"""
+
+revision = 'c6e8a0b2d4f5'
+down_revision = 'b4d2f6a8c013'
+branch_labels = None
+depends_on = None
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+# table -> (partition key, indexes created on the partitioned parent)
+TABLES = {
+    'signals': ('created_at', [
+        "CREATE INDEX ix_signals_id ON signals (id)",
+        "CREATE INDEX idx_signal_symbol_side ON signals (symbol, side)",
+        "CREATE INDEX idx_signal_active ON signals (active) WHERE active",
+        "CREATE INDEX ix_signals_batch_id ON signals (batch_id)",
+        "CREATE INDEX idx_signal_status_created ON signals (status, created_at)",
+    ]),
+    'audit_logs': ('ts', [
+        "CREATE INDEX ix_audit_logs_id ON audit_logs (id)",
+        "CREATE INDEX idx_audit_logs_who_ts ON audit_logs (who, ts)",
+    ]),
+}
+# tables whose signal_id pointed at signals.id (an FK can't target a partitioned table's id alone)
+SIGNAL_REFERENCES = ['orders', 'approvals']
+
+
+def _next_month(d):
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def _create_month_partitions(conn, table, first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        upper = _next_month(month)
+        conn.execute(sa.text(
+            f"CREATE TABLE IF NOT EXISTS {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
+
+
+def _drop_indexes(conn, table):
+    """Free the index / pkey names on a renamed table so the new parent can reuse them."""
+    for (name,) in conn.execute(sa.text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :t AND indexname NOT LIKE '%pkey'"
+    ), {"t": table}):
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
+    for (name,) in conn.execute(sa.text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass) AND contype = 'p'"
+    ), {"t": table}):
+        op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT "{name}" TO "{table}_pkey"')
+
+
+def _partition(conn, table, key, indexes):
+    legacy = f"{table}_legacy"
+    seq = conn.execute(sa.text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+
+    op.rename_table(table, legacy)
+    _drop_indexes(conn, legacy)
+    op.execute(f"UPDATE {legacy} SET {key} = COALESCE({key}, timezone('utc', now())) WHERE {key} IS NULL")
+
+    # same columns, types and defaults (incl. the id sequence) as the live table
+    op.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL")
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+    if table == 'signals':
+        # columns the indexes need, in case the legacy table predates them
+        op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS active BOOLEAN NOT NULL DEFAULT true")
+        op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS batch_id VARCHAR")
+
+    today = date.today()
+    lo, hi = conn.execute(sa.text(f"SELECT min({key}), max({key}) FROM {legacy}")).one()
+    first = min(lo.date(), today) if lo is not None else today
+    last = hi.date() if hi is not None else today
+    ahead = today
+    for _ in range(3):  # after this, the API's partition maintenance keeps MONTHS_AHEAD months ready
+        ahead = _next_month(ahead)
+    _create_month_partitions(conn, table, first, max(last, ahead))
+
+    columns = ", ".join(
+        c for (c,) in conn.execute(sa.text(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = :t ORDER BY ordinal_position"
+        ), {"t": legacy})
+    )
+    op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy}")
+    for ddl in indexes:
+        op.execute(ddl)
+
+    if seq:
+        op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.drop_table(legacy)
+    if seq:
+        op.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for ref in SIGNAL_REFERENCES:
+        if not inspector.has_table(ref):
+            continue
+        for fk in inspector.get_foreign_keys(ref):
+            if fk['referred_table'] == 'signals' and fk.get('name'):
+                op.drop_constraint(fk['name'], ref, type_='foreignkey')
+        op.create_index(f'ix_{ref}_signal_id', ref, ['signal_id'], unique=False)
+
+    for table, (key, indexes) in TABLES.items():
+        _partition(conn, table, key, indexes)
+
+
+def downgrade():
+    conn = op.get_bind()
+    for table, (key, indexes) in TABLES.items():
+        partitioned = f"{table}_partitioned"
+        seq = conn.execute(sa.text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+        op.rename_table(table, partitioned)
+        _drop_indexes(conn, partitioned)
+        op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+        for ddl in indexes:
+            op.execute(ddl)
+        if seq:
+            op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+        op.execute(f"DROP TABLE {partitioned} CASCADE")
+        if seq:
+            op.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+
+    for ref in SIGNAL_REFERENCES:
+        op.drop_index(f'ix_{ref}_signal_id', table_name=ref)
+        # NOT VALID: archived signals may be gone while orders still point at them
+        op.execute(f"ALTER TABLE {ref} ADD CONSTRAINT {ref}_signal_id_fkey "
+                   f"FOREIGN KEY (signal_id) REFERENCES signals (id) NOT VALID")
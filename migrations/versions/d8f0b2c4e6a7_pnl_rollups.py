@@ -0,0 +1,65 @@
+"""PnL rollups per user per day / week / month, backfilled from daily_pnl"""
+
+revision = 'd8f0b2c4e6a7'
+down_revision = 'c6e8a0b2d4f5'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+# period -> date_trunc unit (Postgres weeks start on Monday, like period_start())
+ROLLUPS = {'W': 'week', 'M': 'month'}
+
+
+def upgrade():
+    op.create_table('pnl_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=1), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('realized', sa.Numeric(), nullable=False, server_default='0'),
+    sa.Column('unrealized', sa.Numeric(), nullable=False, server_default='0'),
+    sa.Column('max_dd', sa.Numeric(), nullable=False, server_default='0'),
+    sa.Column('trades', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start')
+    )
+
+    # daily rows: daily_pnl + number of closes (executions are only written on close)
+    op.execute("""
+        INSERT INTO pnl_rollups (user_id, period, period_start, realized, unrealized, max_dd, trades, updated_at)
+        SELECT d.user_id, 'D', d.date,
+               COALESCE(d.realized, 0), COALESCE(d.unrealized, 0), LEAST(COALESCE(d.max_dd, 0), 0),
+               COALESCE(t.trades, 0), timezone('utc', now())
+        FROM daily_pnl d
+        LEFT JOIN (
+            SELECT o.user_id, CAST(e.ts AS date) AS day, count(*) AS trades
+            FROM executions e JOIN orders o ON o.id = e.order_id
+            GROUP BY o.user_id, CAST(e.ts AS date)
+        ) t ON t.user_id = d.user_id AND t.day = d.date
+    """)
+
+    # weekly / monthly rows from the daily ones; a period's drawdown is the lowest
+    # (realized earlier in the period + that day's drawdown), unrealized is the last day's mark
+    for period, unit in ROLLUPS.items():
+        op.execute(f"""
+            INSERT INTO pnl_rollups (user_id, period, period_start, realized, unrealized, max_dd, trades, updated_at)
+            SELECT user_id, '{period}', bucket,
+                   SUM(realized), (array_agg(unrealized ORDER BY period_start DESC))[1],
+                   LEAST(MIN(before + max_dd), 0), SUM(trades), timezone('utc', now())
+            FROM (
+                SELECT user_id, period_start, realized, unrealized, max_dd, trades,
+                       CAST(date_trunc('{unit}', period_start) AS date) AS bucket,
+                       COALESCE(SUM(realized) OVER (
+                           PARTITION BY user_id, date_trunc('{unit}', period_start)
+                           ORDER BY period_start ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ), 0) AS before
+                FROM pnl_rollups WHERE period = 'D'
+            ) d
+            GROUP BY user_id, bucket
+        """)
+
+
+def downgrade():
+    op.drop_table('pnl_rollups')
@@ -6,6 +6,8 @@ import pandas as pd
 import ccxt
 from datetime import datetime, timedelta
 
+from features import load_features, update_features
+
 # ======================
 # CONFIGURATION
 # ======================
@@ -89,33 +91,11 @@ def update_csv(symbol: str, timeframe: str):
 
 
 def merge_timeframes(symbol: str, timeframes=TIMEFRAMES):
-    """Merge multiple timeframe CSVs into one aligned dataset"""
-    symbol_dir = os.path.join(DATA_DIR, symbol.replace("/", ""))
-    merged = None
-
-    for tf in timeframes:
-        tf_path = os.path.join(symbol_dir, f"{tf}.csv")
-        if not os.path.exists(tf_path):
-            continue
-
-        df = pd.read_csv(tf_path, parse_dates=["ts"])
-        df = df[["ts", "open", "high", "low", "close", "volume"]]
-        df = df.rename(columns={c: f"{c}_{tf}" for c in ["open","high","low","close","volume"]})
-
-        if merged is None:
-            merged = df
-        else:
-            merged = pd.merge_asof(
-                merged.sort_values("ts"),
-                df.sort_values("ts"),
-                on="ts",
-                direction="backward"
-            )
-
-    if merged is not None:
-        out_path = os.path.join(symbol_dir, "merged_multi_tf.csv")
-        merged.to_csv(out_path, index=False)
-        print(f"[MERGED] {symbol} -> {out_path} ({len(merged)} rows)")
+    """Append new candles to the symbol's aligned multi-timeframe feature store"""
+    written = update_features(symbol, timeframes)
+    feats = load_features(symbol)
+    if feats is not None:
+        print(f"[MERGED] {symbol} -> {len(feats)} rows ({written} updated)")
     else:
         print(f"[WARN] No data to merge for {symbol}")
 
@@ -1,13 +1,115 @@
 import pandas as pd
 import numpy as np
 
+FILL_MODELS = ("close", "intrabar")
+TIE_BREAKS = ("sl", "tp", "open")
+EXIT_SCAN_WINDOW = 256  # first slice scanned for an exit; doubles until found
+
+
+def find_exit(open_, high, low, close, start, side, sl, tp, fill_model="close", tie_break="sl"):
+    """
+    Vectorized search for the first bar >= start where a trade exits.
+
+    fill_model:
+      - "close":    exit when the bar CLOSES beyond SL/TP, filled at the close (original behaviour)
+      - "intrabar": exit when high/low TOUCHES SL/TP, filled at the level
+                    (or at the open if the bar gapped through it)
+    tie_break (intrabar only, when one bar touches both SL and TP):
+      - "sl":   assume SL was hit first (conservative, default)
+      - "tp":   assume TP was hit first
+      - "open": whichever level is closer to the bar's open was hit first
+
+    Returns (index, "SL" | "TP", exit_price) or (None, None, None) if the trade never exits.
+    """
+    n = len(close)
+    is_long = side == "long"
+    i, window = start, EXIT_SCAN_WINDOW
+
+    while i < n:
+        j = min(n, i + window)
+        if fill_model == "intrabar":
+            if is_long:
+                hit_sl, hit_tp = low[i:j] <= sl, high[i:j] >= tp
+            else:
+                hit_sl, hit_tp = high[i:j] >= sl, low[i:j] <= tp
+        else:
+            c = close[i:j]
+            if is_long:
+                hit_sl, hit_tp = c <= sl, c >= tp
+            else:
+                hit_sl, hit_tp = c >= sl, c <= tp
+
+        hit = hit_sl | hit_tp
+        if hit.any():
+            k = int(hit.argmax())
+            idx = i + k
+            if hit_sl[k] and hit_tp[k]:
+                if tie_break == "tp":
+                    result = "TP"
+                elif tie_break == "open":
+                    result = "SL" if abs(open_[idx] - sl) <= abs(open_[idx] - tp) else "TP"
+                else:
+                    result = "SL"
+            else:
+                result = "SL" if hit_sl[k] else "TP"
+
+            if fill_model != "intrabar":
+                return idx, result, float(close[idx])
+
+            level = sl if result == "SL" else tp
+            o = open_[idx]
+            # gap through the level: fill at the open, not at the level
+            if result == "SL":
+                price = min(level, o) if is_long else max(level, o)
+            else:
+                price = max(level, o) if is_long else min(level, o)
+            return idx, result, float(price)
+
+        i = j
+        window *= 2
+
+    return None, None, None
+
+
+def settle_trade(side, result, entry, entry_fill, exit_price, qty, risk_amt, reward_amt,
+                 fill_model="close", slippage=0.0, fee=0.0):
+    """Return (exit_fill, fees, pnl) for a closed trade. Shared with the vectorized optimizer."""
+    direction = 1 if side == "long" else -1
+    exit_fill = exit_price * (1 - direction * slippage)
+
+    if fill_model == "close":
+        # original accounting: fixed risk/reward amounts, slippage charged on top
+        gross = -risk_amt if result == "SL" else reward_amt
+        gross -= qty * (abs(entry_fill - entry) + abs(exit_fill - exit_price))
+    else:
+        gross = direction * (exit_fill - entry_fill) * qty
+    fees = qty * fee * (entry_fill + exit_fill)
+    return exit_fill, fees, gross - fees
+
+
 class Backtester:
-    def __init__(self, df, strategy, initial_balance=10000, risk=0.02):
+    def __init__(self, df, strategy, initial_balance=10000, risk=0.02,
+                 fill_model="close", tie_break="sl", slippage_bps=0.0, fee_bps=0.0):
+        """
+        fill_model / tie_break: see find_exit. The defaults reproduce the original
+        close-only results exactly.
+        slippage_bps: adverse slippage applied to entry and exit fills.
+        fee_bps: fee per side, charged on entry and exit notional.
+        """
+        if fill_model not in FILL_MODELS:
+            raise ValueError(f"fill_model must be one of {FILL_MODELS}")
+        if tie_break not in TIE_BREAKS:
+            raise ValueError(f"tie_break must be one of {TIE_BREAKS}")
+
         self.df = df.copy()
         self.strategy = strategy
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.risk = risk
+        self.fill_model = fill_model
+        self.tie_break = tie_break
+        self.slippage = slippage_bps / 10000.0
+        self.fee = fee_bps / 10000.0
         self.equity_curve = []
         self.trade_history = []
         self.position = None
@@ -16,42 +118,46 @@ class Backtester:
         self.tp_hits = 0
         self.sl_hits = 0
         self.max_drawdown = 0
-        peak = self.balance
-
-        for i in range(200, len(self.df)):
-            price = self.df["close"].iloc[i]
-            time = self.df["ts"].iloc[i]
-
-            # --- Manage Open Trade ---
-            if self.position:
-                side = self.position["side"]
-                if side == "long":
-                    if price <= self.position["SL"]:
-                        self._close_trade("SL", price, time)
-                        self.sl_hits += 1
-                    elif price >= self.position["TP"]:
-                        self._close_trade("TP", price, time)
-                        self.tp_hits += 1
-                elif side == "short":
-                    if price >= self.position["SL"]:
-                        self._close_trade("SL", price, time)
-                        self.sl_hits += 1
-                    elif price <= self.position["TP"]:
-                        self._close_trade("TP", price, time)
-                        self.tp_hits += 1
-
-            # --- Entry Logic ---
-            if not self.position:
-                signal = self.strategy(self.df, i)
-                if signal:
-                    self._open_trade(signal, price, time)
-
-            # Update equity
-            self.equity_curve.append(self.balance)
-            peak = max(peak, self.balance)
-            drawdown = peak - self.balance
-            if drawdown > self.max_drawdown:
-                self.max_drawdown = drawdown
+        self._peak = self.balance
+
+        # raw arrays for the exit scan; strategies may add indicator columns to self.df
+        close = self.df["close"].to_numpy(dtype=float)
+        high = self.df["high"].to_numpy(dtype=float) if "high" in self.df else close
+        low = self.df["low"].to_numpy(dtype=float) if "low" in self.df else close
+        open_ = self.df["open"].to_numpy(dtype=float) if "open" in self.df else close
+        ts = self.df["ts"]  # indexed only at entries/exits, keeps pandas Timestamps
+        n = len(close)
+
+        i = 200
+        while i < n:
+            # --- Entry Logic (only reached while flat) ---
+            signal = self.strategy(self.df, i)
+            if not signal:
+                self._record_equity(1)
+                i += 1
+                continue
+
+            self._open_trade(signal, close[i], ts.iloc[i])
+
+            # --- Manage Open Trade: jump straight to the exit bar ---
+            exit_idx, result, exit_price = find_exit(
+                open_, high, low, close, i + 1,
+                self.position["side"], self.position["SL"], self.position["TP"],
+                self.fill_model, self.tie_break,
+            )
+            if exit_idx is None:
+                # still open at the end of the data
+                self._record_equity(n - i)
+                break
+
+            self._record_equity(exit_idx - i)
+            self._close_trade(result, exit_price, ts.iloc[exit_idx])
+            if result == "SL":
+                self.sl_hits += 1
+            else:
+                self.tp_hits += 1
+            # the exit bar is re-checked for a new entry, like the per-bar loop did
+            i = exit_idx
 
         # Compute win rate
         win_rate = (self.tp_hits / len(self.trade_history) * 100) if self.trade_history else 0
@@ -67,28 +173,46 @@ class Backtester:
             "max_drawdown": round(self.max_drawdown, 2)
         }
 
+    def _record_equity(self, bars):
+        """Append the (unchanged) balance for `bars` bars and update drawdown."""
+        if bars <= 0:
+            return
+        self.equity_curve.extend([self.balance] * bars)
+        self._peak = max(self._peak, self.balance)
+        drawdown = self._peak - self.balance
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+
     def _open_trade(self, signal, price, time):
         side, sl, tp = signal
         risk_amt = self.balance * self.risk
+        direction = 1 if side == "long" else -1
 
         self.position = {
             "side": side,
             "entry_time": time,
             "entry": price,
+            "entry_fill": price * (1 + direction * self.slippage),
             "SL": sl,
             "TP": tp,
+            "qty": risk_amt / max(1e-12, abs(price - sl)),
             "risk_amt": risk_amt,
             "reward_amt": risk_amt * (abs(tp - price) / abs(price - sl)),
         }
 
     def _close_trade(self, result, exit_price, exit_time):
-        if result == "SL":
-            self.balance -= self.position["risk_amt"]
-        else:
-            self.balance += self.position["reward_amt"]
+        pos = self.position
+        exit_fill, fees, pnl = settle_trade(
+            pos["side"], result, pos["entry"], pos["entry_fill"], exit_price, pos["qty"],
+            pos["risk_amt"], pos["reward_amt"], self.fill_model, self.slippage, self.fee,
+        )
+
+        self.balance += pnl
 
-        self.position["result"] = result
-        self.position["exit_price"] = exit_price
-        self.position["exit_time"] = exit_time
-        self.trade_history.append(self.position)
+        pos["result"] = result
+        pos["exit_price"] = exit_fill
+        pos["exit_time"] = exit_time
+        pos["fees"] = fees
+        pos["pnl"] = pnl
+        self.trade_history.append(pos)
         self.position = None
@@ -0,0 +1,88 @@
+# bootstrap.py
+"""
+Monte Carlo bootstrap of a strategy's trade sequence.
+
+Trade returns are expressed in R (pnl / risk amount), resampled with replacement
+into `n_resamples` synthetic sequences of `horizon` trades (all sequences advance
+together as float32 vectors), and summarised as expected-return / drawdown distributions with confidence intervals.
+10k x 50-trade resamples take a few milliseconds.
+
+    r = trade_returns(trades, side="long")
+    stats = bootstrap_stats(r)
+"""
+import numpy as np
+
+N_RESAMPLES = 10000
+CI = 0.90            # central interval reported as *_lo / *_hi
+MIN_TRADES = 5       # fewer trades than this -> no distribution
+SEED = 42            # fixed so Stage-2 output is reproducible run to run
+
+
+def trade_returns(trades, side=None, last_n=None):
+    """R-multiple per closed trade (oldest -> newest), optionally one side / the last N."""
+    if side is not None:
+        trades = [t for t in trades if t.get("side", "").lower() == side.lower()]
+    trades = sorted(trades, key=lambda t: t["entry_time"])
+    if last_n:
+        trades = trades[-last_n:]
+
+    r = []
+    for t in trades:
+        if t.get("pnl") is not None and t.get("risk_amt"):
+            r.append(t["pnl"] / t["risk_amt"])
+        else:
+            # trades without pnl: fixed-fractional outcome from the SL/TP geometry
+            rr = abs(t.get("TP", 0) - t.get("entry", 0)) / max(1e-9, abs(t.get("entry", 0) - t.get("SL", 0)))
+            r.append(rr if t.get("result") == "TP" else -1.0)
+    return np.asarray(r, dtype=float)
+
+
+def bootstrap_stats(returns, n_resamples=N_RESAMPLES, horizon=None, ci=CI, seed=SEED):
+    """
+    Distribution of total return and max drawdown (both in R) over `horizon` trades.
+    Returns a flat dict of floats (None values if there are too few trades).
+    """
+    returns = np.asarray(returns, dtype=float)
+    keys = ("bs_exp_r", "bs_ret_lo", "bs_ret_med", "bs_ret_hi",
+            "bs_dd_med", "bs_dd_hi", "bs_prob_profit")
+    if len(returns) < MIN_TRADES:
+        return dict.fromkeys(keys)
+
+    horizon = horizon or len(returns)
+    rng = np.random.default_rng(seed)
+    # horizon-major float32 paths: each step below is one contiguous vector op
+    idx = rng.integers(0, len(returns), size=(horizon, n_resamples), dtype=np.int32)
+    paths = np.take(returns.astype(np.float32), idx)
+
+    # running equity / peak / drawdown (in R, starting at 0R) updated in place
+    equity = np.zeros(n_resamples, dtype=np.float32)
+    peak = np.zeros_like(equity)
+    max_dd = np.zeros_like(equity)
+    dd = np.empty_like(equity)
+    for step in paths:
+        equity += step
+        np.maximum(peak, equity, out=peak)
+        np.subtract(peak, equity, out=dd)
+        np.maximum(max_dd, dd, out=max_dd)
+    total = equity.astype(float)
+
+    lo_q, hi_q = (1 - ci) / 2, 1 - (1 - ci) / 2
+    ret_lo, ret_med, ret_hi = np.quantile(total, (lo_q, 0.5, hi_q))
+    dd_med, dd_hi = np.quantile(max_dd, (0.5, hi_q))
+
+    return {
+        "bs_exp_r": round(float(total.mean() / horizon), 4),   # expected R per trade
+        "bs_ret_lo": round(float(ret_lo), 3),
+        "bs_ret_med": round(float(ret_med), 3),
+        "bs_ret_hi": round(float(ret_hi), 3),
+        "bs_dd_med": round(float(dd_med), 3),
+        "bs_dd_hi": round(float(dd_hi), 3),                     # worst-case (upper CI) drawdown
+        "bs_prob_profit": round(float((total > 0).mean() * 100.0), 2),
+    }
+
+
+def bootstrap_score(stats):
+    """Single ranking number: lower-CI return per unit of worst-case drawdown."""
+    if not stats or stats.get("bs_ret_lo") is None:
+        return None
+    return round(stats["bs_ret_lo"] / max(1.0, stats["bs_dd_hi"]), 4)
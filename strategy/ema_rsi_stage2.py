@@ -1,6 +1,9 @@
 # ema_rsi_stage2.py
 import ta
 import numpy as np
+import pandas as pd
+
+import indicators
 
 def ensure_sl_tp_orientation(side: str, entry: float, sl: float, tp: float):
     """
@@ -22,46 +25,103 @@ def ensure_sl_tp_orientation(side: str, entry: float, sl: float, tp: float):
             tp = entry - abs(tp - entry) - 1e-6
     return sl, tp
 
-def ema_rsi_strategy(df, i, adx_threshold=20):
+# defaults reproduce the original hard-coded stage-2 rules
+DEFAULT_PARAMS = {
+    "ema_fast": 50,
+    "ema_slow": 200,
+    "rsi_window": 14,
+    "adx_threshold": 20,
+    "sl_atr": 1.0,
+    "tp_atr": 1.8,
+    "rsi_long_max": 75,
+    "rsi_short_min": 25,
+}
+ATR_WINDOW = 14
+ADX_WINDOW = 14
+WARMUP_BARS = 200
+
+
+def _indicator(df, name, compute):
+    """Compute an indicator column once per DataFrame."""
+    if name not in df:
+        df[name] = compute()
+    return df[name]
+
+
+def ema_rsi_strategy(df, i, adx_threshold=20, ema_fast=50, ema_slow=200, rsi_window=14,
+                     sl_atr=1.0, tp_atr=1.8, rsi_long_max=75, rsi_short_min=25):
     """
     Stage-2 EMA+RSI strategy with ADX filter and ATR-based dynamic SL/TP.
     returns (side, SL, TP) or None.
     """
-    # compute indicators once
-    if "EMA50" not in df:
-        df["EMA50"] = ta.trend.ema_indicator(df["close"], window=50)
-        df["EMA200"] = ta.trend.ema_indicator(df["close"], window=200)
-        df["RSI"] = ta.momentum.rsi(df["close"], window=14)
-        df["ATR"] = ta.volatility.average_true_range(df["high"], df["low"], df["close"], window=14)
-        df["ADX"] = ta.trend.adx(df["high"], df["low"], df["close"], window=14).fillna(0)
+    # compute indicators once (one column per distinct window)
+    ema_f = _indicator(df, f"EMA{ema_fast}", lambda: ta.trend.ema_indicator(df["close"], window=ema_fast))
+    ema_s = _indicator(df, f"EMA{ema_slow}", lambda: ta.trend.ema_indicator(df["close"], window=ema_slow))
+    rsi_col = "RSI" if rsi_window == 14 else f"RSI{rsi_window}"
+    rsi_s = _indicator(df, rsi_col, lambda: ta.momentum.rsi(df["close"], window=rsi_window))
+    # array ATR/ADX: bit-identical to ta.volatility.average_true_range / ta.trend.adx
+    atr_s = _indicator(df, "ATR", lambda: pd.Series(
+        indicators.average_true_range(df["high"], df["low"], df["close"], window=ATR_WINDOW), index=df.index))
+    adx_s = _indicator(df, "ADX", lambda: pd.Series(
+        indicators.adx(df["high"], df["low"], df["close"], window=ADX_WINDOW), index=df.index))
 
     # protect against NaNs early in series
-    if i < 200 or np.isnan(df["ATR"].iloc[i]) or np.isnan(df["EMA50"].iloc[i]) :
+    if i < max(WARMUP_BARS, ema_slow) or np.isnan(atr_s.iloc[i]) or np.isnan(ema_f.iloc[i]):
         return None
 
     price = float(df["close"].iloc[i])
-    atr = float(df["ATR"].iloc[i])
-    adx = float(df["ADX"].iloc[i])
-    rsi = float(df["RSI"].iloc[i])
-    ema50 = float(df["EMA50"].iloc[i])
-    ema200 = float(df["EMA200"].iloc[i])
+    atr = float(atr_s.iloc[i])
+    adx = float(adx_s.iloc[i])
+    rsi = float(rsi_s.iloc[i])
+    ema50 = float(ema_f.iloc[i])
+    ema200 = float(ema_s.iloc[i])
 
     # Trend strength filter
     if adx < adx_threshold:
         return None
 
     # LONG rules
-    if ema50 > ema200 and rsi < 75:
-        sl = price - 1.0 * atr      # tighter SL for stage-2
-        tp = price + 1.8 * atr
+    if ema50 > ema200 and rsi < rsi_long_max:
+        sl = price - sl_atr * atr      # tighter SL for stage-2
+        tp = price + tp_atr * atr
         sl, tp = ensure_sl_tp_orientation("long", price, sl, tp)
         return ("long", sl, tp)
 
     # SHORT rules
-    if ema50 < ema200 and rsi > 25:
-        sl = price + 1.0 * atr
-        tp = price - 1.8 * atr
+    if ema50 < ema200 and rsi > rsi_short_min:
+        sl = price + sl_atr * atr
+        tp = price - tp_atr * atr
         sl, tp = ensure_sl_tp_orientation("short", price, sl, tp)
         return ("short", sl, tp)
 
     return None
+
+
+def ema_rsi_signals(close, ema_fast, ema_slow, rsi, atr, adx, params):
+    """
+    Vectorized ema_rsi_strategy over whole arrays (same rules, same NaN handling).
+    Indicator arrays are passed in so a parameter sweep computes each window once.
+    Returns (side, sl, tp) arrays; side is +1 long, -1 short, 0 no signal.
+    """
+    p = {**DEFAULT_PARAMS, **params}
+    n = len(close)
+
+    valid = ~np.isnan(atr) & ~np.isnan(ema_fast)
+    valid[:min(n, max(WARMUP_BARS, p["ema_slow"]))] = False
+    valid &= adx >= p["adx_threshold"]
+
+    # NaN comparisons are False, exactly like the scalar version
+    long_ = valid & (ema_fast > ema_slow) & (rsi < p["rsi_long_max"])
+    short = valid & ~long_ & (ema_fast < ema_slow) & (rsi > p["rsi_short_min"])
+    side = np.where(long_, 1, np.where(short, -1, 0)).astype(np.int8)
+
+    direction = side.astype(float)
+    sl = close - direction * p["sl_atr"] * atr
+    tp = close + direction * p["tp_atr"] * atr
+
+    # ensure_sl_tp_orientation, vectorized
+    bad_sl = np.where(side > 0, sl >= close, sl <= close) & (side != 0)
+    bad_tp = np.where(side > 0, tp <= close, tp >= close) & (side != 0)
+    sl = np.where(bad_sl, close - direction * (np.abs(close - sl) + 1e-6), sl)
+    tp = np.where(bad_tp, close + direction * (np.abs(tp - close) + 1e-6), tp)
+    return side, sl, tp
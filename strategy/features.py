@@ -0,0 +1,210 @@
+# features.py
+"""
+Incremental multi-timeframe feature store.
+
+Per symbol, the base-timeframe rows with every higher timeframe aligned onto them
+(same result as the chained merge_asof in merge.py) are kept as one raw binary file
+per column plus a manifest:
+
+    data/BTCUSDT/features/
+        manifest.json        # rows, columns, dtypes, last candle per timeframe
+        ts.i8                # int64 epoch ns
+        open_5m.f8 ... volume_12h.f8
+
+`update_features` only appends base rows newer than the manifest. Rows aligned to a
+still-forming candle (the last base bar, the last bar of each higher timeframe)
+are rewritten in place, so the file always matches a from-scratch merge.
+`load_features` memory-maps the files: strategies get zero-copy, read-only column
+views instead of each re-merging CSVs.
+
+    update_features("BTC/USDT")
+    feats = load_features("BTC/USDT")
+    close_1h = feats["close_1h"]      # np.memmap view
+    df = feats.frame()                # pandas DataFrame over the same buffers
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "data"
+TIMEFRAMES = ["5m", "15m", "1h", "12h"]   # first entry is the base timeframe
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+FEATURES_DIR = "features"
+MANIFEST = "manifest.json"
+VERSION = 1
+
+
+def _symbol_dir(symbol: str) -> str:
+    return os.path.join(DATA_DIR, symbol.replace("/", ""))
+
+
+def _store_dir(symbol: str) -> str:
+    return os.path.join(_symbol_dir(symbol), FEATURES_DIR)
+
+
+def _column_path(store: str, name: str, dtype: str) -> str:
+    return os.path.join(store, f"{name}.{'i8' if dtype == 'int64' else 'f8'}")
+
+
+def load_timeframe(symbol: str, timeframe: str, since=None) -> pd.DataFrame:
+    """One timeframe (CSV or ZIP) with suffixed price columns, ts as datetime64[ns]."""
+    base = _symbol_dir(symbol)
+    csv_path = os.path.join(base, f"{timeframe}.csv")
+    zip_path = os.path.join(base, f"{timeframe}.zip")
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+    elif os.path.exists(zip_path):
+        df = pd.read_csv(zip_path, compression="zip")
+    else:
+        print(f"[WARN] Missing data: {symbol} {timeframe}")
+        return pd.DataFrame()
+
+    df = df[["ts"] + PRICE_COLUMNS]
+    df["ts"] = pd.to_datetime(df["ts"]).astype("datetime64[ns]")
+    df = df.drop_duplicates(subset="ts", keep="last").sort_values("ts").reset_index(drop=True)
+    if since is not None:
+        df = df[df["ts"] >= since].reset_index(drop=True)
+    df[PRICE_COLUMNS] = df[PRICE_COLUMNS].astype(float)
+    return df.rename(columns={c: f"{c}_{timeframe}" for c in PRICE_COLUMNS})
+
+
+# ---------------- Manifest ----------------
+def read_manifest(symbol: str):
+    path = os.path.join(_store_dir(symbol), MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(store: str, manifest: dict):
+    # data files are written first; the manifest swap is what publishes new rows
+    tmp = os.path.join(store, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(store, MANIFEST))
+
+
+# ---------------- Build / update ----------------
+def _aligned(base: pd.DataFrame, higher: dict) -> pd.DataFrame:
+    merged = base
+    for tf, df in higher.items():
+        if df.empty:
+            continue
+        merged = pd.merge_asof(merged, df, on="ts", direction="backward")
+    return merged
+
+
+def update_features(symbol: str, timeframes=TIMEFRAMES) -> int:
+    """
+    Bring the symbol's feature store up to date with its timeframe files.
+    Returns the number of rows written (appended + rewritten tail).
+    """
+    store = _store_dir(symbol)
+    base_tf, higher_tfs = timeframes[0], list(timeframes[1:])
+    columns = [("ts", "int64")] + [(f"{c}_{tf}", "float64") for tf in timeframes for c in PRICE_COLUMNS]
+
+    manifest = read_manifest(symbol)
+    if manifest and (manifest.get("version") != VERSION or manifest.get("timeframes") != list(timeframes)):
+        print(f"[INFO] {symbol}: feature schema changed, rebuilding")
+        manifest = None
+
+    rows = manifest["rows"] if manifest else 0
+    start_row = 0
+    since = None
+    if manifest and rows:
+        ts_view = np.memmap(_column_path(store, "ts", "int64"), dtype=np.int64, mode="r", shape=(rows,))
+        # rewrite from the first row aligned to a candle that may still have been forming;
+        # a timeframe that had no data before realigns every row
+        forming = [manifest["last_ts"].get(tf) for tf in timeframes]
+        if None not in forming:
+            start_row = int(np.searchsorted(ts_view, min(forming), side="left"))
+            since = pd.Timestamp(int(ts_view[start_row]), unit="ns")
+        del ts_view
+
+    base = load_timeframe(symbol, base_tf, since=since)
+    if base.empty:
+        return 0
+    higher = {tf: load_timeframe(symbol, tf) for tf in higher_tfs}
+    merged = _aligned(base, higher)
+
+    os.makedirs(store, exist_ok=True)
+    for name, dtype in columns:
+        if name == "ts":
+            values = merged["ts"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        elif name in merged:
+            values = merged[name].to_numpy(dtype=np.float64)
+        else:
+            values = np.full(len(merged), np.nan)  # timeframe with no data yet
+        path = _column_path(store, name, dtype)
+        mode = "r+b" if (manifest and os.path.exists(path)) else "wb"
+        with open(path, mode) as f:
+            f.truncate(start_row * 8)
+            f.seek(start_row * 8)
+            f.write(np.ascontiguousarray(values).tobytes())
+
+    last_ts = {base_tf: int(merged["ts"].iloc[-1].value)}
+    for tf in higher_tfs:
+        df = higher.get(tf)
+        last_ts[tf] = int(df["ts"].iloc[-1].value) if df is not None and not df.empty else None
+
+    total = start_row + len(merged)
+    _write_manifest(store, {
+        "version": VERSION,
+        "symbol": symbol.replace("/", ""),
+        "timeframes": list(timeframes),
+        "columns": [{"name": n, "dtype": d} for n, d in columns],
+        "rows": total,
+        "last_ts": last_ts,
+    })
+    print(f"[FEATURES] {symbol}: {total} rows ({len(merged)} written from row {start_row})")
+    return len(merged)
+
+
+# ---------------- Read (zero-copy) ----------------
+class FeatureSet:
+    """Read-only np.memmap column views over a symbol's feature store."""
+
+    def __init__(self, symbol: str, manifest: dict):
+        store = _store_dir(symbol)
+        self.symbol = symbol
+        self.timeframes = manifest["timeframes"]
+        self.rows = manifest["rows"]
+        self.columns = {
+            c["name"]: np.memmap(
+                _column_path(store, c["name"], c["dtype"]),
+                dtype=np.int64 if c["dtype"] == "int64" else np.float64,
+                mode="r",
+                shape=(self.rows,),
+            )
+            for c in manifest["columns"]
+        }
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self.columns["ts"].view("datetime64[ns]")
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        """DataFrame over the mapped buffers (pandas may copy on later mutation)."""
+        names = columns or list(self.columns)
+        data = {n: (self.ts if n == "ts" else self.columns[n]) for n in names}
+        return pd.DataFrame(data, copy=False)
+
+
+def load_features(symbol: str):
+    """Memory-mapped features for a symbol, or None if the store has not been built."""
+    manifest = read_manifest(symbol)
+    if not manifest or not manifest.get("rows"):
+        return None
+    return FeatureSet(symbol, manifest)
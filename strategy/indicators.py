@@ -0,0 +1,80 @@
+# indicators.py
+"""
+Array versions of the `ta` indicators whose reference implementations loop over
+pandas rows (ATR, ADX). Same formulas, warm-up zeros and summation order as ta,
+so results are bit-identical - but the recursions run over plain floats, ~10-50x
+faster on long histories.
+"""
+import numpy as np
+
+
+def _true_range(high, low, close):
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    # ta takes a NaN-skipping max of (h-l, |h-pc|, |l-pc|): bar 0 falls back to h-l
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _wilder_sum(values, first, count, window):
+    """out[0] = first; out[i] = out[i-1] - out[i-1]/window + values[window+i] for i in 1..count-2."""
+    out = [0.0] * count
+    out[0] = first
+    prev = first
+    vals = values.tolist()
+    w = float(window)
+    for i in range(1, count - 1):
+        prev = prev - (prev / w) + vals[window + i]
+        out[i] = prev
+    return np.array(out)
+
+
+def average_true_range(high, low, close, window=14):
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    tr = _true_range(high, low, close)
+    n = len(close)
+    atr = [0.0] * n
+    if n >= window:
+        prev = tr[:window].mean()
+        atr[window - 1] = prev
+        trl = tr.tolist()
+        w = float(window)
+        for i in range(window, n):
+            prev = (prev * (window - 1) + trl[i]) / w
+            atr[i] = prev
+    return np.array(atr)
+
+
+def adx(high, low, close, window=14):
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    n = len(close)
+    count = n - (window - 1)
+    if count <= window:
+        return np.zeros(n)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    # NaN on bar 0 (no previous close), dropped before ta's first sum like pos/neg
+    directional_range = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+
+    diff_up = np.concatenate(([np.nan], high[1:] - high[:-1]))
+    diff_down = np.concatenate(([np.nan], low[:-1] - low[1:]))
+    pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    trs = _wilder_sum(directional_range, directional_range[1:window + 1].sum(), count, window)
+    dip = _wilder_sum(pos, pos[1:window + 1].sum(), count, window)
+    din = _wilder_sum(neg, neg[1:window + 1].sum(), count, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        di_pos = np.where(trs != 0, 100 * (dip / trs), 0.0)
+        di_neg = np.where(trs != 0, 100 * (din / trs), 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100 * np.abs((di_pos - di_neg) / di_sum), 0.0)
+
+    out = [0.0] * count
+    prev = dx[:window].mean()
+    out[window] = prev
+    dxl = dx.tolist()
+    w = float(window)
+    for i in range(window + 1, count):
+        prev = ((prev * (window - 1)) + dxl[i - 1]) / w
+        out[i] = prev
+    return np.concatenate((np.zeros(window - 1), out))
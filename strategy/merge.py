@@ -3,6 +3,8 @@
 import os
 import pandas as pd
 
+from features import FEATURES_DIR, load_features, update_features
+
 DATA_DIR = "data"   # where your CSVs are stored
 TIMEFRAMES = ["5m", "15m", "1h", "12h"]
 
@@ -24,41 +26,32 @@ def load_timeframe(symbol: str, timeframe: str) -> pd.DataFrame:
 
 
 def merge_timeframes(symbol: str, timeframes=TIMEFRAMES) -> pd.DataFrame:
-    """Merge multiple timeframe CSVs into one aligned dataset"""
-    merged = None
-    for tf in timeframes:
-        df = load_timeframe(symbol, tf)
-        if df.empty:
-            continue
-        if merged is None:
-            merged = df
-        else:
-            merged = pd.merge_asof(
-                merged.sort_values("ts"),
-                df.sort_values("ts"),
-                on="ts",
-                direction="backward"  # align smaller candles to latest higher timeframe
-            )
-    return merged
+    """
+    Aligned multi-timeframe dataset for a symbol.
+    Backed by the incremental feature store (features.py): only new base rows are
+    merged, and the result is a DataFrame over memory-mapped columns.
+    """
+    update_features(symbol, timeframes)
+    feats = load_features(symbol)
+    return feats.frame() if feats is not None else None
 
 
 def merge_all_symbols():
-    """Loop over all symbol folders and create merged dataset"""
+    """Loop over all symbol folders and update their feature stores"""
     for symbol_folder in os.listdir(DATA_DIR):
         folder_path = os.path.join(DATA_DIR, symbol_folder)
         if not os.path.isdir(folder_path):
             continue
 
         print(f"\n[INFO] Processing {symbol_folder}...")
-        merged_df = merge_timeframes(symbol_folder)
+        update_features(symbol_folder)
+        feats = load_features(symbol_folder)
 
-        if merged_df is None or merged_df.empty:
+        if feats is None:
             print(f"[SKIP] No data for {symbol_folder}")
             continue
 
-        out_path = os.path.join(folder_path, "merged_multi_tf.csv")
-        merged_df.to_csv(out_path, index=False)
-        print(f"[OK] Saved {out_path} ({len(merged_df)} rows)")
+        print(f"[OK] {symbol_folder}: {len(feats)} aligned rows in {os.path.join(folder_path, FEATURES_DIR)}")
 
 
 if __name__ == "__main__":
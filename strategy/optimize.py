@@ -0,0 +1,249 @@
+# optimize.py
+"""
+Parameter-sweep optimizer for the Stage-2 EMA+RSI strategy.
+
+Each indicator is computed once per distinct window (EMA per ema window, RSI per
+rsi window, ATR/ADX once), then every parameter combination is evaluated with the
+vectorized signal function + the array backtest below, spread over a process pool.
+
+Usage:
+    python optimize.py BTC/USDT 1h --mode grid
+    python optimize.py BTC/USDT 1h --mode random --samples 10000 --workers 8
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import ta
+
+import indicators
+from backtester import find_exit, settle_trade
+from ema_rsi_stage2 import ADX_WINDOW, ATR_WINDOW, DEFAULT_PARAMS, WARMUP_BARS, ema_rsi_signals
+from run_stage2 import load_df
+
+RESULTS_DIR = "optimize_results"
+
+# Default search space (grid = cartesian product, random = sampled from these values)
+PARAM_GRID = {
+    "ema_fast": [20, 30, 50, 80],
+    "ema_slow": [100, 150, 200],
+    "rsi_window": [7, 14, 21],
+    "adx_threshold": [15, 20, 25, 30],
+    "sl_atr": [0.8, 1.0, 1.5, 2.0],
+    "tp_atr": [1.2, 1.8, 2.5, 3.0],
+    "rsi_long_max": [70, 75, 80],
+    "rsi_short_min": [20, 25, 30],
+}
+
+RANK_METRICS = ("net_profit", "profit_factor", "expectancy_r", "win_rate", "return_dd")
+MIN_TRADES = 20       # combos with fewer trades are ranked last
+BATCH_SIZE = 64       # combos per pool task
+
+
+def with_defaults(combo):
+    """A (possibly partial) combo filled from DEFAULT_PARAMS, as evaluate() runs it."""
+    return {**DEFAULT_PARAMS, **combo}
+
+
+# ---------------- Indicators (once per distinct window) ----------------
+def build_indicator_cache(df, combos):
+    close, high, low = df["close"], df["high"], df["low"]
+    combos = [with_defaults(c) for c in combos]
+    ema_windows = sorted({c["ema_fast"] for c in combos} | {c["ema_slow"] for c in combos})
+    rsi_windows = sorted({c["rsi_window"] for c in combos})
+
+    return {
+        "open": df["open"].to_numpy(dtype=float),
+        "high": high.to_numpy(dtype=float),
+        "low": low.to_numpy(dtype=float),
+        "close": close.to_numpy(dtype=float),
+        "atr": indicators.average_true_range(high, low, close, window=ATR_WINDOW),
+        "adx": indicators.adx(high, low, close, window=ADX_WINDOW),
+        "ema": {w: ta.trend.ema_indicator(close, window=w).to_numpy(dtype=float) for w in ema_windows},
+        "rsi": {w: ta.momentum.rsi(close, window=w).to_numpy(dtype=float) for w in rsi_windows},
+    }
+
+
+# ---------------- Array backtest ----------------
+def simulate(open_, high, low, close, side, sl, tp, initial_balance=10000, risk=0.02,
+             fill_model="close", tie_break="sl", slippage_bps=0.0, fee_bps=0.0):
+    """
+    Same trade sequence and accounting as Backtester.run(), but on precomputed signal
+    arrays: the next entry is found with searchsorted, the exit with find_exit.
+    Returns summary metrics only (no per-bar equity curve).
+    """
+    slippage, fee = slippage_bps / 10000.0, fee_bps / 10000.0
+    entries = np.flatnonzero(side)
+    n = len(close)
+
+    balance = peak = float(initial_balance)
+    max_dd = gross_win = gross_loss = r_sum = 0.0
+    trades = wins = 0
+
+    i = WARMUP_BARS
+    while i < n:
+        k = np.searchsorted(entries, i)
+        if k == len(entries):
+            break
+        i = int(entries[k])
+
+        s = "long" if side[i] > 0 else "short"
+        price = close[i]
+        risk_amt = balance * risk
+        stop = abs(price - sl[i])
+        qty = risk_amt / max(1e-12, stop)
+        reward_amt = risk_amt * (abs(tp[i] - price) / stop)
+        entry_fill = price * (1 + (1 if s == "long" else -1) * slippage)
+
+        exit_idx, result, exit_price = find_exit(open_, high, low, close, i + 1, s, sl[i], tp[i],
+                                                 fill_model, tie_break)
+        if exit_idx is None:
+            break  # still open at the end of the data (not counted, like Backtester)
+
+        _, _, pnl = settle_trade(s, result, price, entry_fill, exit_price, qty,
+                                 risk_amt, reward_amt, fill_model, slippage, fee)
+        balance += float(pnl)
+        trades += 1
+        r_sum += float(pnl / risk_amt)
+        if result == "TP":
+            wins += 1
+        if pnl > 0:
+            gross_win += pnl
+        else:
+            gross_loss -= pnl
+        peak = max(peak, balance)
+        max_dd = max(max_dd, peak - balance)
+        i = exit_idx
+
+    net = balance - initial_balance
+    return {
+        "trades": trades,
+        "final_balance": round(balance, 2),
+        "net_profit": round(net, 2),
+        "win_rate": round(wins / trades * 100, 2) if trades else 0.0,
+        "profit_factor": round(gross_win / gross_loss, 3) if gross_loss else (float("inf") if gross_win else 0.0),
+        "expectancy_r": round(r_sum / trades, 4) if trades else 0.0,
+        "max_drawdown": round(max_dd, 2),
+        "return_dd": round(net / max_dd, 3) if max_dd else 0.0,
+    }
+
+
+# ---------------- Worker ----------------
+_CACHE = None
+_SIM_KW = None
+
+
+def _init_worker(cache, sim_kw):
+    # indicator arrays are shipped once per worker process, not once per task
+    global _CACHE, _SIM_KW
+    _CACHE, _SIM_KW = cache, sim_kw
+
+
+def evaluate(params, cache=None, sim_kw=None):
+    c = cache if cache is not None else _CACHE
+    p = with_defaults(params)
+    side, sl, tp = ema_rsi_signals(
+        c["close"], c["ema"][p["ema_fast"]], c["ema"][p["ema_slow"]],
+        c["rsi"][p["rsi_window"]], c["atr"], c["adx"], p,
+    )
+    stats = simulate(c["open"], c["high"], c["low"], c["close"], side, sl, tp,
+                     **(sim_kw if sim_kw is not None else _SIM_KW))
+    return {**p, **stats}  # the parameters actually run, defaults included
+
+
+def _evaluate_batch(batch):
+    return [evaluate(p) for p in batch]
+
+
+# ---------------- Search spaces ----------------
+def grid_combos(grid):
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [c for c in combos if with_defaults(c)["ema_fast"] < with_defaults(c)["ema_slow"]]
+
+
+def random_combos(grid, samples, seed=None):
+    rng = random.Random(seed)
+    seen, combos = set(), []
+    total = len(grid_combos(grid))
+    while len(combos) < min(samples, total):
+        c = {k: rng.choice(v) for k, v in grid.items()}
+        key = tuple(c.values())
+        full = with_defaults(c)
+        if full["ema_fast"] >= full["ema_slow"] or key in seen:
+            continue
+        seen.add(key)
+        combos.append(c)
+    return combos
+
+
+# ---------------- Runner ----------------
+def optimize(df, combos, workers=None, rank_by="net_profit", min_trades=MIN_TRADES, **sim_kw):
+    """Evaluate every combo on df and return a ranked DataFrame (best first)."""
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by must be one of {RANK_METRICS}")
+
+    cache = build_indicator_cache(df, combos)
+    batches = [combos[i:i + BATCH_SIZE] for i in range(0, len(combos), BATCH_SIZE)]
+
+    rows = []
+    if workers == 1:
+        for batch in batches:
+            rows.extend(evaluate(p, cache, sim_kw) for p in batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cache, sim_kw)) as pool:
+            for result in pool.map(_evaluate_batch, batches):
+                rows.extend(result)
+
+    out = pd.DataFrame(rows)
+    out["eligible"] = out["trades"] >= min_trades
+    out = out.sort_values(["eligible", rank_by], ascending=[False, False]).reset_index(drop=True)
+    out.insert(0, "rank", range(1, len(out) + 1))
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage-2 EMA+RSI parameter sweep")
+    parser.add_argument("symbol", help="e.g. BTC/USDT")
+    parser.add_argument("timeframe", help="e.g. 1h")
+    parser.add_argument("--mode", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=1000, help="random mode: number of combos")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--rank-by", choices=RANK_METRICS, default="net_profit")
+    parser.add_argument("--min-trades", type=int, default=MIN_TRADES)
+    parser.add_argument("--fill-model", choices=("close", "intrabar"), default="close")
+    parser.add_argument("--tie-break", choices=("sl", "tp", "open"), default="sl")
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--out", default=None, help="results CSV path")
+    args = parser.parse_args()
+
+    df = load_df(args.symbol, args.timeframe)
+    if df is None or len(df) < 300:
+        raise SystemExit(f"[ERROR] Not enough data for {args.symbol} {args.timeframe}")
+
+    combos = grid_combos(PARAM_GRID) if args.mode == "grid" else random_combos(PARAM_GRID, args.samples, args.seed)
+    print(f"[Optimize] {args.symbol} {args.timeframe}: {len(combos)} combos on {len(df)} candles, {args.workers} workers")
+
+    t0 = time.time()
+    results = optimize(
+        df, combos, workers=args.workers, rank_by=args.rank_by, min_trades=args.min_trades,
+        fill_model=args.fill_model, tie_break=args.tie_break,
+        slippage_bps=args.slippage_bps, fee_bps=args.fee_bps,
+    )
+    print(f"[Optimize] done in {time.time() - t0:.1f}s")
+    print(results.head(20).to_string(index=False))
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{args.symbol.replace('/', '')}_{args.timeframe}_{args.mode}.csv"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    results.to_csv(out, index=False)
+    print(f"\nSaved -> {out}")
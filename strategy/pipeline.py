@@ -0,0 +1,180 @@
+# pipeline.py
+"""
+Minimal in-process DAG runner for the strategy stages.
+
+Each node is a function that receives its dependencies' outputs (in memory) and
+returns its own output. Nodes whose dependencies are done run concurrently on a
+thread pool. Every run records per-node timings, and a node whose input
+fingerprint is unchanged since the last run reuses its previous output instead
+of running again (in memory, or from a StageCache on disk across processes).
+
+    p = Pipeline()
+    p.add("stage2", build_stage2, fingerprint=data_fingerprint)
+    p.add("stage3", build_stage3, deps=["stage2"])
+    p.add("stage4", build_stage4)          # independent: runs alongside 2 -> 3
+    report = p.run()
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# node statuses
+RAN = "ran"
+SKIPPED = "skipped"      # fingerprint unchanged, previous output reused
+CACHED = "cached"        # output loaded from the on-disk stage cache
+FAILED = "failed"
+BLOCKED = "blocked"      # an upstream node failed
+
+
+def fingerprint_value(value) -> str:
+    """Stable hash of a node output (DataFrames hashed by content)."""
+    h = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        h.update(",".join(map(str, value.columns)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+    else:
+        h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+class Node:
+    def __init__(self, name, fn, deps=(), fingerprint=None, sinks=()):
+        """
+        fn(inputs: dict[dep_name -> output]) -> output
+        fingerprint(inputs) -> str | None: key of everything the node depends on besides
+            its upstream outputs (data files, params...). None = always run.
+            Upstream outputs are folded in automatically.
+        sinks: callables(output) run after the node (e.g. CSV/JSON writers).
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.fingerprint = fingerprint
+        self.sinks = list(sinks)
+
+
+class Pipeline:
+    def __init__(self, max_workers=4, cache=None):
+        """cache: optional StageCache - outputs are persisted by fingerprint and reused across runs."""
+        self.nodes = {}
+        self.max_workers = max_workers
+        self.cache = cache
+        self._last = {}   # name -> (fingerprint, output) from previous runs
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, fn, deps=(), fingerprint=None, sinks=()):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"{name}: unknown dependency {dep!r} (add nodes in dependency order)")
+        self.nodes[name] = Node(name, fn, deps, fingerprint, sinks)
+        return self
+
+    # ------------------------
+    # Execution
+    # ------------------------
+    def _key(self, node, inputs):
+        if node.fingerprint is None:
+            return None
+        own = node.fingerprint(inputs)
+        if own is None:
+            return None
+        upstream = [f"{d}={self._fingerprints[d]}" for d in node.deps]
+        return hashlib.sha256("|".join([own] + upstream).encode()).hexdigest()
+
+    def _run_node(self, node, inputs):
+        start = time.perf_counter()
+        key = self._key(node, inputs)
+
+        with self._lock:
+            previous = self._last.get(node.name)
+        if key is not None and previous is not None and previous[0] == key:
+            return previous[1], SKIPPED, key, time.perf_counter() - start
+
+        hit, output = (False, None)
+        if key is not None and self.cache is not None:
+            hit, output = self.cache.get(node.name, key)
+
+        if hit:
+            status = CACHED
+        else:
+            output, status = node.fn(inputs), RAN
+            if key is not None and self.cache is not None:
+                self.cache.put(node.name, key, output)
+        # sinks see every fresh or cache-loaded output (e.g. files deleted since the last run)
+        for sink in node.sinks:
+            sink(output)
+        with self._lock:
+            self._last[node.name] = (key, output)
+
+        return output, status, key, time.perf_counter() - start
+
+    def run(self, only=None):
+        """
+        Run the graph (or `only` these nodes + their upstream). Returns a report:
+            {"ok": bool, "total_sec": float, "nodes": {name: {status, seconds, error}}, "outputs": {...}}
+        """
+        wanted = self._closure(only) if only else list(self.nodes)
+        outputs, report = {}, {}
+        self._fingerprints = {}
+        pending = {n: set(self.nodes[n].deps) for n in wanted}
+        running = {}
+        t0 = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                # blocked: any dependency failed / was blocked
+                for name in [n for n, deps in pending.items()
+                             if any(report.get(d, {}).get("status") in (FAILED, BLOCKED) for d in deps)]:
+                    pending.pop(name)
+                    report[name] = {"status": BLOCKED, "seconds": 0.0, "error": None}
+                    logger.warning(f"[Pipeline] {name} blocked by failed upstream")
+
+                for name in [n for n, deps in pending.items() if all(d in outputs for d in deps)]:
+                    pending.pop(name)
+                    node = self.nodes[name]
+                    inputs = {d: outputs[d] for d in node.deps}
+                    logger.info(f"[Pipeline] starting {name}")
+                    running[pool.submit(self._run_node, node, inputs)] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        output, status, key, seconds = fut.result()
+                    except Exception as e:
+                        report[name] = {"status": FAILED, "seconds": None, "error": str(e)}
+                        logger.error(f"[Pipeline] {name} failed: {e}", exc_info=True)
+                        continue
+                    outputs[name] = output
+                    self._fingerprints[name] = key or fingerprint_value(output)
+                    report[name] = {"status": status, "seconds": round(seconds, 3), "error": None}
+                    logger.info(f"[Pipeline] {name} {status} in {seconds:.2f}s")
+
+        ok = all(r["status"] in (RAN, SKIPPED, CACHED) for r in report.values())
+        return {
+            "ok": ok,
+            "total_sec": round(time.perf_counter() - t0, 3),
+            "nodes": report,
+            "outputs": outputs,
+        }
+
+    def _closure(self, names):
+        seen, stack = [], list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            if name not in self.nodes:
+                raise ValueError(f"unknown node {name!r}")
+            seen.append(name)
+            stack.extend(self.nodes[name].deps)
+        return [n for n in self.nodes if n in seen]
@@ -0,0 +1,250 @@
+# portfolio.py
+"""
+Portfolio-level backtest: all symbols co-simulated on one merged timestamp axis
+with shared capital and position limits (Backtester runs one symbol in isolation).
+
+Array-based: signals come from the vectorized strategy, each symbol's next entry is
+found with searchsorted and each exit with find_exit, so the Python loop only runs
+once per trade event - not once per bar.
+
+Usage:
+    python portfolio.py 5m
+    python portfolio.py 1h --max-positions 3 --risk 0.01
+"""
+import argparse
+import heapq
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester import find_exit, settle_trade
+from ema_rsi_stage2 import DEFAULT_PARAMS, WARMUP_BARS, ema_rsi_signals
+from optimize import build_indicator_cache
+from run_stage2 import DATA_DIR, load_df
+
+MAX_POSITIONS = 4        # concurrent open positions across all symbols
+MAX_LEVERAGE = 5.0       # total open notional <= balance * MAX_LEVERAGE (futures margin)
+MIN_SIZE_FRACTION = 0.1  # skip an entry if capital only allows < 10% of its size
+PORTFOLIO_TRADES_CSV = "portfolio_trades.csv"
+
+
+def ema_rsi_signal_arrays(df, params=None):
+    """Stage-2 signal arrays (side, sl, tp) for a whole DataFrame."""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    c = build_indicator_cache(df, [p])
+    return ema_rsi_signals(c["close"], c["ema"][p["ema_fast"]], c["ema"][p["ema_slow"]],
+                           c["rsi"][p["rsi_window"]], c["atr"], c["adx"], p)
+
+
+class _Book:
+    """Per-symbol arrays + cursor."""
+
+    def __init__(self, symbol, df, signal_fn):
+        self.symbol = symbol
+        self.ts = df["ts"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        self.open = df["open"].to_numpy(dtype=float)
+        self.high = df["high"].to_numpy(dtype=float)
+        self.low = df["low"].to_numpy(dtype=float)
+        self.close = df["close"].to_numpy(dtype=float)
+        self.side, self.sl, self.tp = signal_fn(df)
+        self.entries = np.flatnonzero(self.side)
+        self.entries = self.entries[self.entries >= WARMUP_BARS]
+        self.entry_ts = self.ts[self.entries]
+
+    def next_entry(self, from_bar=0, from_time=None):
+        """First signal bar >= from_bar (and at/after from_time), or None."""
+        k = np.searchsorted(self.entries, from_bar)
+        if from_time is not None:
+            k = max(k, np.searchsorted(self.entry_ts, from_time))
+        return int(self.entries[k]) if k < len(self.entries) else None
+
+
+class PortfolioBacktester:
+    def __init__(self, data, signal_fn=ema_rsi_signal_arrays, initial_balance=10000, risk=0.02,
+                 max_positions=MAX_POSITIONS, max_leverage=MAX_LEVERAGE,
+                 fill_model="close", tie_break="sl", slippage_bps=0.0, fee_bps=0.0):
+        """
+        data: {symbol: OHLCV DataFrame (same timeframe)}
+        signal_fn(df) -> (side, sl, tp) arrays; side +1 long / -1 short / 0 none.
+        Other options as in Backtester.
+        """
+        self.books = [_Book(sym, df, signal_fn) for sym, df in data.items()]
+        self.initial_balance = initial_balance
+        self.risk = risk
+        self.max_positions = max_positions
+        self.max_leverage = max_leverage
+        self.fill_model = fill_model
+        self.tie_break = tie_break
+        self.slippage = slippage_bps / 10000.0
+        self.fee = fee_bps / 10000.0
+
+    def run(self):
+        balance = peak = float(self.initial_balance)
+        max_dd = 0.0
+        trades, equity_curve = [], []
+        skipped_limit = skipped_capital = 0
+        max_concurrent = 0
+
+        exits = []        # heap: (exit_ns, book_idx, trade)
+        open_notional = 0.0
+        candidates = []   # heap: (entry_ns, book_idx, bar)
+        for b, book in enumerate(self.books):
+            bar = book.next_entry()
+            if bar is not None:
+                heapq.heappush(candidates, (book.ts[bar], b, bar))
+
+        def settle(exit_ns, b, trade):
+            nonlocal balance, peak, max_dd, open_notional
+            exit_fill, fees, pnl = settle_trade(
+                trade["side"], trade["result"], trade["entry"], trade["entry_fill"], trade["exit_price"],
+                trade["qty"], trade["risk_amt"], trade["reward_amt"], self.fill_model, self.slippage, self.fee,
+            )
+            balance += pnl
+            open_notional -= trade["notional"]
+            trade.update(exit_price=exit_fill, fees=fees, pnl=pnl, balance=balance)
+            trades.append(trade)
+            equity_curve.append((exit_ns, balance))
+            peak = max(peak, balance)
+            max_dd = max(max_dd, peak - balance)
+
+        while candidates:
+            entry_ns, b, bar = heapq.heappop(candidates)
+            book = self.books[b]
+
+            # exits at or before this bar are realised first (frees capital and slots)
+            while exits and exits[0][0] <= entry_ns:
+                settle(*heapq.heappop(exits))
+
+            if len(exits) >= self.max_positions:
+                # nothing can open before the earliest exit: jump this symbol there
+                skipped_limit += 1
+                nxt = book.next_entry(bar + 1, exits[0][0])
+                if nxt is not None:
+                    heapq.heappush(candidates, (book.ts[nxt], b, nxt))
+                continue
+
+            side = "long" if book.side[bar] > 0 else "short"
+            price, sl, tp = book.close[bar], book.sl[bar], book.tp[bar]
+            stop = max(1e-12, abs(price - sl))
+            risk_amt = balance * self.risk
+            qty = risk_amt / stop
+
+            # shared capital: scale down to what is left under the leverage cap
+            available = balance * self.max_leverage - open_notional
+            scale = min(1.0, available / (qty * price)) if qty * price > 0 else 0.0
+            if scale < MIN_SIZE_FRACTION:
+                # capital only frees up when something exits: jump there as well
+                skipped_capital += 1
+                nxt = book.next_entry(bar + 1, exits[0][0] if exits else None)
+                if nxt is not None:
+                    heapq.heappush(candidates, (book.ts[nxt], b, nxt))
+                continue
+            risk_amt, qty = risk_amt * scale, qty * scale
+
+            exit_idx, result, exit_price = find_exit(
+                book.open, book.high, book.low, book.close, bar + 1, side, sl, tp,
+                self.fill_model, self.tie_break,
+            )
+            trade = {
+                "symbol": book.symbol,
+                "side": side,
+                "entry_time": pd.Timestamp(book.ts[bar]),
+                "entry": price,
+                "entry_fill": price * (1 + (1 if side == "long" else -1) * self.slippage),
+                "SL": sl,
+                "TP": tp,
+                "qty": qty,
+                "notional": qty * price,
+                "risk_amt": risk_amt,
+                "reward_amt": risk_amt * (abs(tp - price) / stop),
+                "result": result,
+                "exit_price": exit_price,
+                "exit_time": pd.Timestamp(book.ts[exit_idx]) if exit_idx is not None else None,
+            }
+            open_notional += trade["notional"]
+
+            if exit_idx is None:
+                # open until the end of the data: holds its slot, never realised (like Backtester)
+                heapq.heappush(exits, (np.iinfo(np.int64).max, b, trade))
+            else:
+                heapq.heappush(exits, (book.ts[exit_idx], b, trade))
+                # the exit bar is re-checked for a new entry, like Backtester
+                nxt = book.next_entry(exit_idx)
+                if nxt is not None:
+                    heapq.heappush(candidates, (book.ts[nxt], b, nxt))
+            max_concurrent = max(max_concurrent, len(exits))
+
+        open_at_end = 0
+        while exits:
+            exit_ns, b, trade = heapq.heappop(exits)
+            if trade["exit_time"] is None:
+                open_at_end += 1
+            else:
+                settle(exit_ns, b, trade)
+
+        wins = sum(1 for t in trades if t["result"] == "TP")
+        return {
+            "final_balance": balance,
+            "net_profit": balance - self.initial_balance,
+            "trades": trades,
+            "equity_curve": equity_curve,
+            "win_rate": round(wins / len(trades) * 100, 2) if trades else 0,
+            "max_drawdown": round(max_dd, 2),
+            "max_concurrent": max_concurrent,
+            "skipped_position_limit": skipped_limit,
+            "skipped_capital": skipped_capital,
+            "open_at_end": open_at_end,
+        }
+
+
+def per_symbol_summary(trades):
+    if not trades:
+        return pd.DataFrame()
+    df = pd.DataFrame(trades)
+    return df.groupby("symbol").agg(
+        trades=("pnl", "size"),
+        net_profit=("pnl", "sum"),
+        win_rate=("result", lambda r: round((r == "TP").mean() * 100, 2)),
+    ).sort_values("net_profit", ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-symbol portfolio backtest with shared capital")
+    parser.add_argument("timeframe", help="e.g. 5m")
+    parser.add_argument("--symbols", nargs="*", default=None, help="default: every folder in data/")
+    parser.add_argument("--balance", type=float, default=10000)
+    parser.add_argument("--risk", type=float, default=0.02)
+    parser.add_argument("--max-positions", type=int, default=MAX_POSITIONS)
+    parser.add_argument("--max-leverage", type=float, default=MAX_LEVERAGE)
+    parser.add_argument("--fill-model", choices=("close", "intrabar"), default="close")
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    symbols = args.symbols or [
+        d.replace("USDT", "/USDT") for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))
+    ]
+    data = {}
+    for sym in symbols:
+        df = load_df(sym, args.timeframe)
+        if df is not None and len(df) >= 300:
+            data[sym] = df
+
+    t0 = time.time()
+    res = PortfolioBacktester(
+        data, initial_balance=args.balance, risk=args.risk,
+        max_positions=args.max_positions, max_leverage=args.max_leverage,
+        fill_model=args.fill_model, fee_bps=args.fee_bps, slippage_bps=args.slippage_bps,
+    ).run()
+    print(f"[Portfolio] {len(data)} symbols, {args.timeframe}, done in {time.time() - t0:.1f}s")
+    print(f"Final balance: {res['final_balance']:.2f}  trades: {len(res['trades'])}  "
+          f"win rate: {res['win_rate']}%  max DD: {res['max_drawdown']}  "
+          f"max concurrent: {res['max_concurrent']}  skipped (limit/capital): "
+          f"{res['skipped_position_limit']}/{res['skipped_capital']}")
+    print(per_symbol_summary(res["trades"]))
+
+    if res["trades"]:
+        pd.DataFrame(res["trades"]).to_csv(PORTFOLIO_TRADES_CSV, index=False)
+        print(f"\nSaved -> {PORTFOLIO_TRADES_CSV}")
@@ -1,9 +1,20 @@
-import subprocess
+import argparse
 import sys
-import os
 import logging
 from datetime import datetime
 
+import pandas as pd
+
+import backtester
+import bootstrap
+import ema_rsi_stage2
+import indicators
+import run_stage2
+import run_stage3
+import walk_forward
+from pipeline import Pipeline
+from stage_cache import StageCache
+
 # Set up logging
 log_file = 'all_stages.log'
 logging.basicConfig(
@@ -16,60 +27,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_stage(stage_num):
-    """Run a single stage script and log the result."""
-    script_name = f'run_stage{stage_num}.py'
-    if not os.path.exists(script_name):
-        logger.error(f"Script {script_name} not found!")
-        return False
-    
-    logger.info(f"Starting Stage {stage_num}: {script_name}")
-    try:
-        result = subprocess.run(['python', script_name], capture_output=True, text=True, timeout=300)  # 5-min timeout per stage
-        if result.returncode == 0:
-            logger.info(f"Stage {stage_num} completed successfully. Output: {result.stdout}")
-            # Check for expected output file
-            output_csv = f'trade_suggestions_stage{stage_num}.csv'
-            output_json = f'trade_suggestions_stage{stage_num}.json'
-            if os.path.exists(output_csv) or os.path.exists(output_json):
-                logger.info(f"Stage {stage_num} output files confirmed: {output_csv}, {output_json}")
-            else:
-                logger.warning(f"Stage {stage_num} output files not found—check script.")
-            return True
-        else:
-            logger.error(f"Stage {stage_num} failed with code {result.returncode}. Error: {result.stderr}")
-            return False
-    except subprocess.TimeoutExpired:
-        logger.error(f"Stage {stage_num} timed out!")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error in Stage {stage_num}: {e}")
-        return False
-
-def main():
+# shared across cron runs: identical inputs -> outputs loaded instead of recomputed
+stage_cache = StageCache()
+
+
+# ---------------- Stage nodes ----------------
+# Stages run in this process and hand DataFrames to each other in memory;
+# the CSV/JSON files are optional sinks, no longer the hand-off between stages.
+
+def stage2(inputs):
+    return pd.DataFrame(run_stage2.build_suggestions(run_stage2.detect_symbols()))
+
+
+def stage2_fingerprint(inputs):
+    # content of every data file + the code and parameters that turn it into suggestions
+    return stage_cache.make_key(
+        stage_cache.files_digest(run_stage2.data_files(run_stage2.detect_symbols())),
+        StageCache.code_version(run_stage2, backtester, ema_rsi_stage2, indicators, walk_forward, bootstrap),
+        {
+            "timeframes": run_stage2.TIMEFRAMES,
+            "strategies": sorted(run_stage2.STRATEGIES),
+            "recent_trade_window": run_stage2.RECENT_TRADE_WINDOW,
+            "walk_forward": run_stage2.WALK_FORWARD,
+        },
+    )
+
+
+def save_stage2(df):
+    if df.empty:
+        logger.info("Stage 2 produced no suggestions")
+        return
+    run_stage2.save_suggestions(df)
+
+
+def stage3(inputs):
+    return run_stage3.filter_and_rank(inputs["stage2"])
+
+
+def stage3_fingerprint(inputs):
+    # Stage 3 is a pure function of Stage 2's output (folded in by the pipeline) + its thresholds
+    return stage_cache.make_key(
+        StageCache.code_version(run_stage3),
+        [run_stage3.MIN_WIN_PROB, run_stage3.MIN_RR_RATIO, sorted(run_stage3.ALLOWED_CONFIDENCE)],
+    )
+
+
+def save_stage3(df):
+    run_stage3.save_results(df.copy())
+
+
+def stage4(inputs):
+    # live signals from the exchange: independent of the 2 -> 3 backtest branch
+    import run_stage4  # pulls in ccxt; only needed when Stage 4 runs
+    return run_stage4.generate_signals_once()
+
+
+def upload_stage4(signals):
+    import run_stage4
+    run_stage4.upload_to_backend(signals)
+
+
+def build_pipeline(write_files=True, upload=True, use_cache=True):
+    p = Pipeline(cache=stage_cache if use_cache else None)
+    p.add("stage2", stage2, fingerprint=stage2_fingerprint, sinks=[save_stage2] if write_files else [])
+    p.add("stage3", stage3, deps=["stage2"], fingerprint=stage3_fingerprint,
+          sinks=[save_stage3] if write_files else [])
+    p.add("stage4", stage4, sinks=[upload_stage4] if upload else [])
+    return p
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Stage 2 -> 3 and Stage 4 in one process")
+    parser.add_argument("--no-files", action="store_true", help="don't write trade_suggestions_stage*.csv/json")
+    parser.add_argument("--no-upload", action="store_true", help="don't upload Stage-4 signals to the backend")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the on-disk stage cache")
+    parser.add_argument("--only", nargs="*", default=None, help="run only these nodes (+ their upstream)")
+    args = parser.parse_args(argv)
+
     logger.info("=== Starting All Stages Orchestration ===")
     start_time = datetime.now()
-    
-    stages = [2, 3, 4]  # Run stage 2 -> 3 -> 4
-    success = True
-    for stage in stages:
-        if not run_stage(stage):
-            success = False
-            break  # Stop on first failure, or remove to continue
-    
-    end_time = datetime.now()
-    duration = end_time - start_time
-    
-    if success:
+
+    report = build_pipeline(
+        write_files=not args.no_files, upload=not args.no_upload, use_cache=not args.no_cache,
+    ).run(only=args.only)
+
+    for name, r in report["nodes"].items():
+        logger.info(f"  {name:<8} {r['status']:<8} {r['seconds'] if r['seconds'] is not None else '-'}s"
+                    + (f"  error: {r['error']}" if r["error"] else ""))
+
+    logger.info(f"  stage cache: {stage_cache.hits} hits / {stage_cache.misses} misses")
+
+    duration = datetime.now() - start_time
+    if report["ok"]:
         logger.info(f"=== All stages completed successfully in {duration} ===")
-        # Optional: Merge final outputs or notify
-        final_csv = 'trade_suggestions_stage4.csv'  # Adjust if stage 4 outputs differently
-        if os.path.exists(final_csv):
-            logger.info(f"Final output ready: {final_csv}")
-            # You could add code here to merge with backtest_summary.csv if needed
     else:
         logger.error("=== Orchestration failed - check logs ===")
         sys.exit(1)
+    return report
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
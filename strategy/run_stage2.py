@@ -5,6 +5,8 @@ import pandas as pd
 from datetime import datetime
 from backtester import Backtester
 from ema_rsi_stage2 import ema_rsi_strategy
+from bootstrap import bootstrap_score, bootstrap_stats, trade_returns
+from walk_forward import adjust_confidence, walk_forward, walk_forward_summary
 
 DATA_DIR = "data"
 TIMEFRAMES = ["5m", "15m", "1h", "12h"]
@@ -18,6 +20,7 @@ STRATEGIES = {
 }
 
 RECENT_TRADE_WINDOW = 50   # use last N trades for statistics (Stage-2 uses recent history)
+WALK_FORWARD = True        # also score the side over rolling train/test windows (see walk_forward.py)
 
 def load_df(symbol: str, timeframe: str):
     """Load CSV or ZIP file for given symbol/timeframe"""
@@ -132,6 +135,16 @@ def build_suggestions(symbols):
                 win_prob, avg_dur, avg_rr, sample_size = compute_side_stats(trades, side)
                 conf = confidence_label(win_prob, avg_rr, sample_size)
 
+                # walk-forward: same single backtest, sliced into rolling windows
+                wf = {}
+                if WALK_FORWARD:
+                    wf = walk_forward_summary(walk_forward(trades, df["ts"], side), confidence_label)
+                    conf = adjust_confidence(conf, wf)
+
+                # Monte Carlo: resample the same recent trades for return / drawdown CIs
+                bs = bootstrap_stats(trade_returns(trades, side, RECENT_TRADE_WINDOW))
+                bs["bs_score"] = bootstrap_score(bs)
+
                 rr_ratio_live = round(abs(tp - entry) / max(1e-9, abs(entry - sl)), 2)
 
                 suggestion = {
@@ -148,26 +161,46 @@ def build_suggestions(symbols):
                     "avg_rr": avg_rr,
                     "rr_ratio_live": rr_ratio_live,
                     "confidence": conf,
-                    "sample_size": sample_size
+                    "sample_size": sample_size,
+                    **wf,
+                    **bs,
                 }
                 suggestions.append(suggestion)
 
     return suggestions
 
-if __name__ == "__main__":
-    # detect symbols (folders in data/)
+def detect_symbols():
+    """Symbols from the folders in data/ ('BTCUSDT' -> 'BTC/USDT')"""
     symbols = [d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
-    # symbols folder names might be like 'BTCUSDT' so convert to 'BTC/USDT'
-    symbols = [s.replace("USDT","/USDT") for s in symbols]
+    return [s.replace("USDT", "/USDT") for s in symbols]
+
+
+def data_files(symbols):
+    """Every data file Stage-2 reads for these symbols (its input partitions)."""
+    paths = []
+    for sym in sorted(symbols):
+        base_path = os.path.join(DATA_DIR, sym.replace("/", ""))
+        for tf in TIMEFRAMES:
+            for ext in ("csv", "zip"):
+                path = os.path.join(base_path, f"{tf}.{ext}")
+                if os.path.exists(path):
+                    paths.append(path)
+    return paths
+
+
+def save_suggestions(df: pd.DataFrame):
+    """Write Stage-2 suggestions to CSV + JSON (for API/frontend)"""
+    df.to_csv(SUGGESTIONS_CSV, index=False)
+    with open(SUGGESTIONS_JSON, "w") as f:
+        f.write(df.to_json(orient="records", date_format="iso"))
+    print(f"\nSaved -> {SUGGESTIONS_CSV}, {SUGGESTIONS_JSON}")
 
-    suggestions = build_suggestions(symbols)
+
+if __name__ == "__main__":
+    suggestions = build_suggestions(detect_symbols())
     if not suggestions:
         print("No suggestions generated.")
     else:
         df = pd.DataFrame(suggestions)
         print(df)
-        df.to_csv(SUGGESTIONS_CSV, index=False)
-        # json for API/frontend
-        with open(SUGGESTIONS_JSON, "w") as f:
-            f.write(pd.DataFrame(suggestions).to_json(orient="records", date_format="iso"))
-        print(f"\nSaved -> {SUGGESTIONS_CSV}, {SUGGESTIONS_JSON}")
+        save_suggestions(df)
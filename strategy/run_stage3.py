@@ -38,14 +38,18 @@ def filter_and_rank(df: pd.DataFrame) -> pd.DataFrame:
     if filtered.empty:
         return filtered
 
-    # Rank: first by confidence, then win prob, then rr ratio
+    # Rank: first by confidence, then bootstrap score (lower-CI return / worst-case
+    # drawdown, see bootstrap.py), then win prob, then rr ratio
     confidence_order = {"HIGH": 2, "MEDIUM": 1, "LOW": 0}
     filtered["conf_rank"] = filtered["confidence"].map(confidence_order)
+    if "bs_score" not in filtered:
+        filtered["bs_score"] = None  # Stage-2 output from before the bootstrap columns
+    filtered["bs_rank"] = pd.to_numeric(filtered["bs_score"], errors="coerce").fillna(float("-inf"))
 
     ranked = filtered.sort_values(
-        by=["conf_rank", "win_probability", "rr_ratio_live"],
-        ascending=[False, False, False],
-    ).drop(columns=["conf_rank"])
+        by=["conf_rank", "bs_rank", "win_probability", "rr_ratio_live"],
+        ascending=[False, False, False, False],
+    ).drop(columns=["conf_rank", "bs_rank"])
 
     return ranked
 
@@ -70,6 +70,38 @@ def fetch_live_data(symbol: str, timeframe: str) -> pd.DataFrame:
         return None
 
 
+# ================================
+# SIGNAL FOR ONE SYMBOL / TIMEFRAME
+# ================================
+def build_signal(sym: str, tf: str, df: pd.DataFrame, now_utc: datetime):
+    """Run the strategy on the last candle of df -> upload payload, or None."""
+    idx = len(df) - 1
+
+    try:
+        result = ema_rsi_strategy(df, idx)
+    except Exception as e:
+        print(f"⚠ Strategy error for {sym} {tf}: {e}")
+        return None
+
+    if result is None:
+        return None
+
+    side, sl, tp = result
+    entry = float(df["close"].iloc[-1])
+
+    return {
+        "symbol": sym,
+        "side": side.upper(),
+        "entry": round(entry, 6),
+        "sl": round(sl, 6),
+        "tp": round(tp, 6),
+        "qty": None,
+        "strategy_id": 2,
+        "confidence": f"tf={tf}",
+        "generated_at": now_utc.isoformat(),
+    }
+
+
 # ================================
 # GENERATE SIGNALS (ONE RUN)
 # ================================
@@ -87,33 +119,9 @@ def generate_signals_once():
                 print(f"⚠ Not enough data for {sym} {tf}")
                 continue
 
-            idx = len(df) - 1
-
-            try:
-                result = ema_rsi_strategy(df, idx)
-            except Exception as e:
-                print(f"⚠ Strategy error for {sym} {tf}: {e}")
-                continue
-
-            if result is None:
-                continue
-
-            side, sl, tp = result
-            entry = float(df["close"].iloc[-1])
-
-            payload = {
-                "symbol": sym,
-                "side": side.upper(),
-                "entry": round(entry, 6),
-                "sl": round(sl, 6),
-                "tp": round(tp, 6),
-                "qty": None,
-                "strategy_id": 2,
-                "confidence": f"tf={tf}",
-                "generated_at": now_utc.isoformat(),
-            }
-
-            all_signals.append(payload)
+            payload = build_signal(sym, tf, df, now_utc)
+            if payload is not None:
+                all_signals.append(payload)
 
     print(f"✅ Generated {len(all_signals)} signals")
     return all_signals
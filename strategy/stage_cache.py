@@ -0,0 +1,170 @@
+# stage_cache.py
+"""
+Content-addressed disk cache for pipeline stage outputs.
+
+A stage's key is a hash of everything its output depends on:
+    - input data: SHA-256 of each data file's bytes (re-hashed only when the file's
+      size/mtime change; a touched-but-identical file keeps its digest)
+    - code version: hash of the source files of the modules the stage runs
+    - parameters: thresholds, windows, ...
+Outputs are pickled under .stage_cache/<stage>/<key>.pkl and evicted least-recently-
+used first once the cache exceeds its size budget, so cron runs reuse results
+whenever inputs are byte-identical.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import threading
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".stage_cache"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+FILE_INDEX = "file_digests.json"
+_HASH_CHUNK = 1 << 20
+
+
+def _sha256(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file_index = None
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------
+    # Key material
+    # ------------------------
+    def file_digest(self, path: str) -> str:
+        """Content hash of a file, memoised by (size, mtime) in the cache directory."""
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(os.path.abspath(path))
+            if entry and entry["stamp"] == stamp:
+                return entry["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+
+        with self._lock:
+            self._load_index()[os.path.abspath(path)] = {"stamp": stamp, "sha256": digest}
+            self._save_index()
+        return digest
+
+    def files_digest(self, paths) -> str:
+        """Hash of a set of input partitions (name + content of each)."""
+        return _sha256(*(f"{p}={self.file_digest(p)}" for p in sorted(paths)))
+
+    @staticmethod
+    def code_version(*modules) -> str:
+        """Hash of the source of the given modules (any edit invalidates their stages)."""
+        parts = []
+        for module in modules:
+            try:
+                parts.append(inspect.getsource(module))
+            except (OSError, TypeError):
+                parts.append(getattr(module, "__name__", repr(module)))
+        return _sha256(*parts)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return _sha256(*(json.dumps(p, sort_keys=True, default=str) for p in parts))
+
+    # ------------------------
+    # Get / put
+    # ------------------------
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def get(self, stage: str, key: str):
+        """(True, output) on a hit, (False, None) on a miss."""
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except Exception as e:
+            logger.warning(f"[StageCache] dropping unreadable entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return False, None
+        os.utime(path)  # LRU: last access = mtime
+        self.hits += 1
+        return True, value
+
+    def put(self, stage: str, key: str, value):
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".pkl"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            logger.info(f"[StageCache] evicted {path}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # ------------------------
+    # File digest index
+    # ------------------------
+    def _load_index(self):
+        if self._file_index is None:
+            path = os.path.join(self.cache_dir, FILE_INDEX)
+            try:
+                with open(path) as f:
+                    self._file_index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._file_index = {}
+        return self._file_index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, FILE_INDEX)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._file_index, f)
+        os.replace(tmp, path)
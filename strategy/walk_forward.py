@@ -0,0 +1,160 @@
+# walk_forward.py
+"""
+Walk-forward / rolling-window statistics for Stage-2.
+
+The history is simulated ONCE (Backtester.run); every window is then a slice of
+that single trade list. Trades are indexed by entry time and turned into prefix
+sums, so the stats for all train/test windows come from two searchsorted calls
+and a few subtractions - overlapping bars are never re-simulated.
+
+    windows = walk_forward(trades, df["ts"], "long")
+    summary = walk_forward_summary(windows, confidence_label)
+
+Test windows are sized by trade count, not a fixed bar count: a side that trades
+rarely gets longer test windows, so each holds about TARGET_TEST_TRADES trades and
+the full-sample label rules (which need 10+ trades for MEDIUM) can apply to it.
+Windows that still end up with fewer than MIN_TEST_TRADES are left out of the
+pass rate instead of counting as failures.
+"""
+import numpy as np
+import pandas as pd
+
+TRAIN_BARS = 1500   # in-sample window
+TEST_BARS = 300     # shortest out-of-sample window that follows it (longer for sparse sides)
+TARGET_TEST_TRADES = 20   # test windows are stretched to hold about this many trades
+MIN_TEST_TRADES = 10      # fewer than this: too few to label, not part of wf_pass_rate
+
+PASSING_LABELS = ("HIGH", "MEDIUM")
+
+
+def _to_ns(values):
+    """Timestamps -> int64 epoch ns (explicit unit: pandas may infer us/ms resolution)."""
+    return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def trade_arrays(trades, side=None):
+    """Trades (optionally one side) as entry-sorted arrays: entry ns, win, rr, duration (min)."""
+    if side is not None:
+        trades = [t for t in trades if t.get("side", "").lower() == side.lower()]
+    trades = [t for t in trades if t.get("entry_time") is not None and t.get("exit_time") is not None]
+
+    entry = _to_ns([t["entry_time"] for t in trades])
+    exit_ = _to_ns([t["exit_time"] for t in trades])
+    win = np.array([t.get("result") == "TP" for t in trades], dtype=float)
+    rr = np.array(
+        [abs(t.get("TP", 0) - t.get("entry", 0)) / max(1e-9, abs(t.get("entry", 0) - t.get("SL", 0)))
+         for t in trades],
+        dtype=float,
+    )
+    dur = (exit_ - entry) / 60e9
+
+    order = np.argsort(entry, kind="stable")
+    return {"entry": entry[order], "win": win[order], "rr": rr[order], "dur": dur[order]}
+
+
+def test_window_bars(n_trades, n_bars, target=TARGET_TEST_TRADES, floor=TEST_BARS):
+    """Bars a test window needs to hold ~`target` trades at this side's average trade rate."""
+    if n_trades <= 0:
+        return floor
+    return max(floor, int(np.ceil(target * n_bars / n_trades)))
+
+
+def window_bounds(ts, train_bars, test_bars, step_bars):
+    """(train_start, test_start, test_end) timestamps in ns for each window; test_end is exclusive."""
+    ts = _to_ns(ts)
+    n = len(ts)
+    if n < train_bars + test_bars:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    starts = np.arange(0, n - train_bars - test_bars + 1, step_bars)
+    test_start = ts[starts + train_bars]
+    # a window ending on the last bar is closed just past it
+    end_idx = starts + train_bars + test_bars
+    test_end = np.where(end_idx < n, ts[np.minimum(end_idx, n - 1)], ts[-1] + 1)
+    return ts[starts], test_start, test_end
+
+
+def window_stats(arrays, starts, ends):
+    """Vectorized stats for trades entered in [starts[k], ends[k]) for every k."""
+    lo = np.searchsorted(arrays["entry"], starts, side="left")
+    hi = np.searchsorted(arrays["entry"], ends, side="left")
+    count = hi - lo
+
+    def window_sum(values):
+        prefix = np.concatenate(([0.0], np.cumsum(values)))
+        return prefix[hi] - prefix[lo]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        safe = np.maximum(count, 1)
+        return {
+            "sample_size": count,
+            "win_prob": np.where(count > 0, window_sum(arrays["win"]) / safe * 100.0, 0.0),
+            "avg_rr": np.where(count > 0, window_sum(arrays["rr"]) / safe, 0.0),
+            "avg_dur": np.where(count > 0, window_sum(arrays["dur"]) / safe, 0.0),
+        }
+
+
+def walk_forward(trades, ts, side=None, train_bars=TRAIN_BARS, test_bars=None, step_bars=None):
+    """
+    One row per window with in-sample (train_*) and out-of-sample (test_*) stats.
+    test_bars defaults to test_window_bars() for this side; step_bars to test_bars.
+    """
+    arrays = trade_arrays(trades, side)
+    if test_bars is None:
+        test_bars = test_window_bars(len(arrays["entry"]), len(ts))
+    step_bars = step_bars or test_bars
+    train_start, test_start, test_end = window_bounds(ts, train_bars, test_bars, step_bars)
+    train = window_stats(arrays, train_start, test_start)
+    test = window_stats(arrays, test_start, test_end)
+
+    out = pd.DataFrame({
+        "train_start": pd.to_datetime(train_start),
+        "test_start": pd.to_datetime(test_start),
+        "test_end": pd.to_datetime(test_end),
+    })
+    for prefix, stats in (("train", train), ("test", test)):
+        for key, values in stats.items():
+            out[f"{prefix}_{key}"] = values
+    return out
+
+
+def walk_forward_summary(windows, label_fn, min_trades=MIN_TEST_TRADES):
+    """
+    Collapse per-window results into a few Stage-2 columns.
+    label_fn(win_prob, avg_rr, sample_size) -> "HIGH" | "MEDIUM" | "LOW" labels each test window;
+    wf_pass_rate is the share of test windows with at least `min_trades` trades labelled
+    MEDIUM or better (None when no window has that many).
+    """
+    if windows is None or windows.empty:
+        return {"wf_windows": 0, "wf_scored": 0, "wf_pass_rate": None, "wf_test_win_prob": None,
+                "wf_test_win_prob_std": None, "wf_decay": None, "wf_last_label": None}
+
+    labels = [
+        label_fn(wp, rr, int(n))
+        for wp, rr, n in zip(windows["test_win_prob"], windows["test_avg_rr"], windows["test_sample_size"])
+    ]
+    scored = [l for l, n in zip(labels, windows["test_sample_size"]) if n >= min_trades]
+    traded = windows["test_sample_size"] > 0
+    test_wp = windows.loc[traded, "test_win_prob"]
+    train_wp = windows.loc[traded, "train_win_prob"]
+
+    return {
+        "wf_windows": int(len(windows)),
+        "wf_scored": len(scored),
+        "wf_pass_rate": round(sum(l in PASSING_LABELS for l in scored) / len(scored), 2) if scored else None,
+        "wf_test_win_prob": round(float(test_wp.mean()), 2) if len(test_wp) else 0.0,
+        "wf_test_win_prob_std": round(float(test_wp.std(ddof=0)), 2) if len(test_wp) else 0.0,
+        # in-sample minus out-of-sample win rate: large positive = overfit / regime change
+        "wf_decay": round(float((train_wp - test_wp).mean()), 2) if len(test_wp) else 0.0,
+        "wf_last_label": labels[-1],
+    }
+
+
+def adjust_confidence(label, summary, min_pass_rate=0.5):
+    """Downgrade a full-history label by one step when it does not hold up out-of-sample."""
+    if not summary.get("wf_windows") or summary.get("wf_pass_rate") is None:
+        return label  # no out-of-sample evidence either way
+    if summary["wf_pass_rate"] < min_pass_rate:
+        return {"HIGH": "MEDIUM", "MEDIUM": "LOW"}.get(label, label)
+    return label
@@ -0,0 +1,275 @@
+# worker.py
+"""
+Standalone Stage-4 strategy worker.
+
+Replaces the per-API-worker subprocess spawn: run any number of these (pm2, docker,
+systemd...) and exactly one - the leader - runs the Stage-4 cycle every
+STRATEGY_INTERVAL_SEC and uploads the batch to the backend. Leadership is a Redis
+lock (SET NX + TTL, renewed while alive) or a Postgres session advisory lock; if the
+leader dies, a standby takes over within one lock TTL.
+
+The leader keeps its exchange client and the last STRATEGY_WARM_CANDLES candles per
+symbol/timeframe in memory, so each cycle only fetches candles newer than the ones
+it already has.
+
+Config (env / .env):
+    STRATEGY_INTERVAL_SEC   cadence, aligned to the wall clock (default 300)
+    STRATEGY_LOCK_URL       redis://... or postgresql://... (default: REDIS_URL, then DATABASE_URL)
+    STRATEGY_LOCK_TTL_SEC   Redis lock TTL, renewed every TTL/3 (default 30)
+    STRATEGY_WARM_CANDLES   candles kept per symbol/timeframe (default 500)
+    BACKEND_SIGNAL_UPDATE_URL  where batches are published (see run_stage4)
+
+Usage:
+    python worker.py            # run forever
+    python worker.py --once     # single cycle, no election (debugging)
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import run_stage4  # noqa: E402  (reads BACKEND_SIGNAL_UPDATE_URL at import)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("strategy-worker")
+
+INTERVAL_SEC = int(os.getenv("STRATEGY_INTERVAL_SEC", "300"))
+LOCK_TTL_SEC = int(os.getenv("STRATEGY_LOCK_TTL_SEC", "30"))
+WARM_CANDLES = int(os.getenv("STRATEGY_WARM_CANDLES", "500"))
+LOCK_URL = os.getenv("STRATEGY_LOCK_URL") or os.getenv("REDIS_URL") or os.getenv("DATABASE_URL") or ""
+LOCK_NAME = "strategy-worker-leader"
+ADVISORY_LOCK_KEY = 0x5354_4147_4534  # "STAGE4"
+MIN_CANDLES = 200
+
+
+# ---------------- Leader election ----------------
+class RedisLeaderLock:
+    """SET NX PX lock; only the owner (token) may renew or release it."""
+
+    _RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url, name=LOCK_NAME, ttl_sec=LOCK_TTL_SEC):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.name = name
+        self.ttl_ms = ttl_sec * 1000
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire_or_renew(self) -> bool:
+        try:
+            if self.client.eval(self._RENEW, 1, self.name, self.token, self.ttl_ms):
+                return True
+            return bool(self.client.set(self.name, self.token, nx=True, px=self.ttl_ms))
+        except Exception as e:
+            logger.warning(f"[Leader] Redis error, acting as standby: {e}")
+            return False
+
+    def release(self):
+        try:
+            self.client.eval(self._RELEASE, 1, self.name, self.token)
+        except Exception:
+            pass
+
+
+class PostgresLeaderLock:
+    """Session-level pg advisory lock on a dedicated connection (freed when it drops)."""
+
+    def __init__(self, url, key=ADVISORY_LOCK_KEY):
+        self.url = url.replace("postgresql+psycopg2://", "postgresql://")
+        self.key = key
+        self.conn = None
+        self.held = False
+
+    def acquire_or_renew(self) -> bool:
+        import psycopg2
+        try:
+            if self.conn is None or self.conn.closed:
+                self.conn = psycopg2.connect(self.url)
+                self.conn.autocommit = True
+                self.held = False
+            with self.conn.cursor() as cur:
+                if self.held:
+                    cur.execute("SELECT 1")  # connection alive = lock still ours
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (self.key,))
+                    self.held = bool(cur.fetchone()[0])
+            return self.held
+        except Exception as e:
+            logger.warning(f"[Leader] Postgres error, acting as standby: {e}")
+            self._close()
+            return False
+
+    def release(self):
+        if self.conn is not None and not self.conn.closed and self.held:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (self.key,))
+            except Exception:
+                pass
+        self._close()
+
+    def _close(self):
+        self.held = False
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+
+
+class NoLock:
+    """Single-instance fallback when no lock backend is configured."""
+
+    def acquire_or_renew(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+
+def make_leader_lock(url=LOCK_URL):
+    if url.startswith(("redis://", "rediss://")):
+        return RedisLeaderLock(url)
+    if url.startswith("postgresql"):
+        return PostgresLeaderLock(url)
+    logger.warning("[Leader] no STRATEGY_LOCK_URL/REDIS_URL/DATABASE_URL: run a single worker only")
+    return NoLock()
+
+
+# ---------------- Warm market data ----------------
+class WarmCandles:
+    """Rolling window of recent candles per symbol/timeframe, topped up incrementally."""
+
+    def __init__(self, max_candles=WARM_CANDLES):
+        import ccxt
+        self.exchange = ccxt.binance({"enableRateLimit": True})
+        self.exchange.set_sandbox_mode(True)  # same testnet as run_stage4
+        self.max_candles = max_candles
+        self.frames = {}
+
+    def refresh(self, symbol, timeframe):
+        df = self.frames.get((symbol, timeframe))
+        if df is None or df.empty:
+            since, limit = None, self.max_candles
+        else:
+            # re-fetch the last (possibly still forming) candle + anything newer
+            since, limit = int(df["ts"].iloc[-1].timestamp() * 1000), self.max_candles
+
+        ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+        if ohlcv:
+            new = pd.DataFrame(ohlcv, columns=["ts", "open", "high", "low", "close", "volume"])
+            new["ts"] = pd.to_datetime(new["ts"], unit="ms")
+            new[["open", "high", "low", "close", "volume"]] = new[
+                ["open", "high", "low", "close", "volume"]
+            ].astype(float)
+            df = new if df is None else (
+                pd.concat([df, new]).drop_duplicates(subset="ts", keep="last").sort_values("ts")
+            )
+            df = df.tail(self.max_candles).reset_index(drop=True)
+            self.frames[(symbol, timeframe)] = df
+        return df
+
+
+class LeaderElector(threading.Thread):
+    """Renews the lock every TTL/3 in the background, so long cycles never let it lapse."""
+
+    def __init__(self, lock, stop: threading.Event):
+        super().__init__(name="leader-elector", daemon=True)
+        self.lock = lock
+        self.stop = stop
+        self.is_leader = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            leader = self.lock.acquire_or_renew()
+            if leader != self.is_leader.is_set():
+                logger.info("Became leader" if leader else "Lost leadership, standing by")
+                (self.is_leader.set if leader else self.is_leader.clear)()
+            self.stop.wait(LOCK_TTL_SEC / 3)
+        self.is_leader.clear()
+        self.lock.release()
+
+
+def run_cycle(candles: WarmCandles, still_leader=lambda: True):
+    """One Stage-4 pass over SYMBOLS x TIMEFRAMES with warm data, then publish."""
+    t0 = time.time()
+    now_utc = datetime.now(timezone.utc).replace(tzinfo=None)
+    signals = []
+
+    for sym in run_stage4.SYMBOLS:
+        for tf in run_stage4.TIMEFRAMES:
+            try:
+                df = candles.refresh(sym, tf)
+            except Exception as e:
+                logger.warning(f"Failed to fetch {sym} {tf}: {e}")
+                continue
+            if df is None or len(df) < MIN_CANDLES:
+                logger.warning(f"Not enough data for {sym} {tf}")
+                continue
+            # the strategy adds indicator columns: give it a copy of the raw window
+            payload = run_stage4.build_signal(sym, tf, df[["ts", "open", "high", "low", "close", "volume"]].copy(), now_utc)
+            if payload is not None:
+                signals.append(payload)
+
+    if not still_leader():
+        logger.warning("Lost leadership during the cycle, not publishing")
+        return None
+
+    result = run_stage4.upload_to_backend(signals)
+    logger.info(f"Cycle done in {time.time() - t0:.1f}s: {len(signals)} signals, upload={result.get('status')}")
+    return result
+
+
+# ---------------- Main loop ----------------
+def next_boundary(now: float, interval: int) -> float:
+    return (int(now) // interval + 1) * interval
+
+
+def run_forever():
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    elector = LeaderElector(make_leader_lock(), stop)
+    elector.start()
+    logger.info(f"Strategy worker started (interval={INTERVAL_SEC}s, lock={type(elector.lock).__name__})")
+
+    candles = None
+    while not stop.is_set():
+        if not elector.is_leader.wait(timeout=1.0):
+            candles = None  # warm data would be stale by the time we lead again
+            continue
+
+        try:
+            candles = candles or WarmCandles()
+            run_cycle(candles, still_leader=elector.is_leader.is_set)
+        except Exception as e:
+            logger.error(f"Cycle failed: {e}", exc_info=True)
+
+        stop.wait(max(0.0, next_boundary(time.time(), INTERVAL_SEC) - time.time()))
+
+    elector.join(timeout=5)
+    logger.info("Strategy worker stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leader-elected Stage-4 strategy worker")
+    parser.add_argument("--once", action="store_true", help="run a single cycle without leader election")
+    args = parser.parse_args()
+
+    if args.once:
+        run_cycle(WarmCandles())
+    else:
+        run_forever()